@@ -1,5 +1,6 @@
 import board
 import random
+import time
 
 #####################
 # Agent definitions #
@@ -7,6 +8,38 @@ import random
 
 
 
+################
+# Move context #
+################
+
+class MoveContext(object):
+    """What the game tells an agent about the move it is asked for"""
+
+    # Class constructor.
+    #
+    # PARAM [float] deadline:    the time.perf_counter() value by which the
+    #                            move must be made, or None if untimed
+    # PARAM [float] limit:       the time limit for the move in seconds, or None
+    # PARAM [int]   move_number: the number of moves played so far in the game
+    # PARAM [int]   last_move:   the column of the opponent's last move, or None
+    def __init__(self, deadline, limit, move_number, last_move):
+        """Class constructor"""
+        self.deadline = deadline
+        self.limit = limit
+        self.move_number = move_number
+        self.last_move = last_move
+
+    # Get the time left to make the move.
+    #
+    # RETURN [float]: the seconds left before the deadline, or None if untimed
+    def time_left(self):
+        """Returns the seconds left before the deadline, or None if untimed"""
+        if self.deadline is None:
+            return None
+        return self.deadline - time.perf_counter()
+
+
+
 ##################
 # Abstract agent #
 ##################
@@ -14,8 +47,20 @@ import random
 class Agent(object):
     """Abstract agent class"""
 
+    # Whether go() takes a MoveContext as second argument. Agents that leave
+    # this False are called with the board only.
+    takes_context = False
+
+    # Whether the agent runs in the process of the game. Agents that run
+    # elsewhere (player_host.HostedAgent) set this to False.
+    in_process = True
+
+    # Whether the agent keeps searching on the opponent's time. The game only
+    # accepts such an agent against an opponent that runs in another process.
+    ponders = False
+
     # Class constructor.
-    #agent.Agagent.Agentent
+    #
     # PARAM [string] name: the name of this player
     def __init__(self, name):
         """Class constructor"""
@@ -28,10 +73,19 @@ class Agent(object):
     #
     # PARAM [board.Board] brd: the current board state
     # RETURN [int]: the column where the token must be added
+    #
+    # NOTE: if takes_context is True, go() is called as go(brd, ctx), where
+    #       ctx is a MoveContext.
     def go(self, brd):
         """Returns a column between 0 and (brd.w-1). The column must be free in the board."""
         raise NotImplementedError("Please implement this method")
 
+    # Called by the game once it is over, whatever the outcome. Agents that
+    # work in the background between moves stop here.
+    def end_game(self):
+        """Tells the agent that the game is over"""
+        pass
+
 
 
 ##########################
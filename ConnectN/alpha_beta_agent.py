@@ -1,5 +1,23 @@
 import math
+import time
 import agent
+import book
+import evaluator
+import lazy_smp
+import metrics
+import parallel_search
+import ponder
+import tablebase
+import transposition
+
+# Time kept in hand when searching up to a deadline given by the game, to
+# return the move and let the game check it, in seconds
+DEADLINE_MARGIN = 0.1
+
+# Raised by the in-place search when its deadline has passed
+class SearchTimeout(Exception):
+    pass
+
 
 ###########################
 # Alpha-Beta Search Agent #
@@ -7,6 +25,9 @@ import agent
 class AlphaBetaAgent(agent.Agent):
     """Agent that uses alpha-beta search"""
 
+    # go() gets the move deadline from the game
+    takes_context = True
+
     # Class constructor.
     #
     # PARAM [string] name:      the name of this player
@@ -18,10 +39,148 @@ class AlphaBetaAgent(agent.Agent):
     #     self.count = 0
     #     self.metrics = Metrics()
 
-    def __init__(self, name, max_depth, weight_self_potential = 3, weight_enemy_potential = 0, weight_in_a_row = 1, multiplier_growth_rate = 1, weight_token_height = 1):
+    # The options marked "in place" only apply to the in-place search, used
+    # with inplace, move_time, workers or smp_helpers; the constructor raises
+    # ValueError for combinations of options that would have no effect.
+    #
+    # PARAM [bool]   inplace:   search by playing and undoing moves on the
+    #                           board instead of copying it for every child;
+    #                           needs a board with play()/undo()
+    # PARAM [float]  tt_size_mb: in place: the transposition table size in
+    #                           MB; 0 disables the table
+    # PARAM [string] tt_policy: the table replacement policy, see
+    #                           transposition.TranspositionTable
+    # PARAM [float]  move_time: if given, search each move with iterative
+    #                           deepening (in place, up to max_depth) for
+    #                           this many seconds, or until shortly before
+    #                           the deadline given by the game if earlier
+    # PARAM [bool]   dynamic_ordering: in place: order the moves with killer
+    #                           moves and a history table
+    # PARAM [bool]   incremental_eval: in place: score the leaves with an
+    #                           evaluator.HeuristicEvaluator kept up to date
+    #                           move by move; same scores as heuristic()
+    # PARAM [bool]   window_eval: in place: score the leaves with an
+    #                           evaluator.WindowEvaluator kept up to date
+    #                           move by move, a different evaluation from
+    #                           heuristic() with the same weights; not with
+    #                           incremental_eval
+    # PARAM [bool]   symmetry:  in place, with window_eval: share table
+    #                           entries between a position and its mirror,
+    #                           and only search one of each pair of mirrored
+    #                           moves from a symmetric position; needs
+    #                           window_eval, whose scores are symmetric
+    #                           (those of heuristic() are not)
+    # PARAM [int]    workers:   if more than 1, search the root moves of the
+    #                           in-place search at max_depth in this many
+    #                           processes; not with move_time or
+    #                           smp_helpers
+    # PARAM [int]    smp_helpers: if more than 0, run this many helper
+    #                           processes that search the same root with
+    #                           iterative deepening at staggered depths,
+    #                           sharing a transposition table in shared
+    #                           memory (of tt_size_mb, or 16 MB if 0) with
+    #                           the main search (Lazy SMP); searches with
+    #                           iterative deepening even without move_time
+    # PARAM [bool]   threats:   only search a winning move when there is
+    #                           one, only the moves that block the opponent's
+    #                           wins when it has some, and skip the moves
+    #                           that let the opponent win right above
+    # PARAM [string] book:      the path of an opening book file (see
+    #                           make_book.py); positions found in it are
+    #                           played from the book without searching
+    # PARAM [string] tablebase: the path of an endgame tablebase file (see
+    #                           make_tablebase.py); once the board has no
+    #                           more empty cells than the table covers,
+    #                           positions found in it are played from the
+    #                           table without searching
+    # PARAM [bool]   ponder:    in place, not with workers: after each
+    #                           search, keep searching the position after
+    #                           the opponent's expected reply (the next move
+    #                           of the principal variation) in a background
+    #                           thread, filling the agent's tables; if the
+    #                           opponent plays it, the next move reuses the
+    #                           search, or its result if it ended. The
+    #                           thread competes for the GIL with the rest
+    #                           of the process, so game.Game only accepts a
+    #                           pondering agent against an opponent in
+    #                           another process (e.g. a
+    #                           player_host.HostedAgent); the thread stops
+    #                           when the game ends.
+    def __init__(self, name, max_depth, weight_self_potential = 3, weight_enemy_potential = 0, weight_in_a_row = 1, multiplier_growth_rate = 1, weight_token_height = 1, inplace = False, tt_size_mb = 0, tt_policy = "buckets", move_time = None, dynamic_ordering = False, incremental_eval = False, window_eval = False, symmetry = False, workers = 1, smp_helpers = 0, threats = False, book = None, tablebase = None, ponder = False):
         super().__init__(name)
+        if (workers > 1) and ((move_time is not None) or (smp_helpers > 0)):
+            raise ValueError("workers is not used with move_time or smp_helpers")
+        if not (inplace or (move_time is not None) or (workers > 1) or (smp_helpers > 0)):
+            for (option, on) in (("tt_size_mb", tt_size_mb > 0), ("dynamic_ordering", dynamic_ordering),
+                                 ("incremental_eval", incremental_eval), ("window_eval", window_eval),
+                                 ("symmetry", symmetry), ("ponder", ponder)):
+                if on:
+                    raise ValueError("{} needs the in-place search: set inplace, move_time, workers or smp_helpers".format(option))
+        if incremental_eval and window_eval:
+            raise ValueError("incremental_eval and window_eval are different evaluations: choose one")
+        if symmetry and not window_eval:
+            raise ValueError("symmetry needs window_eval: the scores of heuristic() are not mirror-symmetric")
+        if ponder and (workers > 1):
+            raise ValueError("ponder does not work with workers")
         # Max search depth
         self.max_depth = max_depth
+        # Whether to search in place with Board.play()/undo()
+        self.inplace = inplace
+        # Transposition table for the in-place search, if any
+        self.tt = None
+        if tt_size_mb > 0:
+            self.tt = transposition.TranspositionTable(tt_size_mb, tt_policy)
+        self.tt_size_mb = tt_size_mb
+        self.tt_policy = tt_policy
+        # The player the table scores are for
+        self.tt_player = 0
+        # Time budget for a move, for iterative deepening
+        self.move_time = move_time
+        # Deadline of the current search, if any
+        self.deadline = None
+        # Whether to order moves with killer moves and the history table
+        self.dynamic_ordering = dynamic_ordering
+        # Killer moves: the last two moves that caused a cutoff at each depth
+        self.killers = {}
+        # History table, kept between the moves of a game: the score of
+        # player p putting a token at (x,y) is history[p][x*h+y]
+        self.history = None
+        # The player and the root move count the history table is for
+        self.history_player = 0
+        self.history_ply = 0
+        # Search statistics (cutoffs)
+        self.metrics = metrics.Metrics()
+        # Whether to score the leaves with an incremental evaluator of
+        # heuristic() or with a window evaluator, and the evaluator (built
+        # for the board size of the first search)
+        self.incremental_eval = incremental_eval
+        self.window_eval = window_eval
+        self.evaluator = None
+        # Whether to treat mirrored positions as one
+        self.symmetry = symmetry
+        # Number of processes for the parallel search, and their pool
+        # (started on the first parallel search)
+        self.workers = workers
+        self.splitter = None
+        # Number of Lazy SMP helper processes, and the helpers (started on
+        # the first search)
+        self.smp_helpers = smp_helpers
+        self.smp = None
+        # Flag shared with the main search, set to stop a helper's search
+        self.stop = None
+        # Whether to prune moves with the immediate threats
+        self.threats = threats
+        # Path of the opening book, and the book (opened on the first move)
+        self.book_path = book
+        self.opening_book = None
+        # Path of the endgame tablebase, and the table (opened when first
+        # needed)
+        self.tablebase_path = tablebase
+        self.endgame_table = None
+        # Whether to ponder, and the pondering thread (started after the
+        # first search)
+        self.ponders = ponder
+        self.ponderer = None
         self.count = 0
         self.weight_self_potential = weight_self_potential # weight for how many potential in-a-rows we have
         self.weight_enemy_potential = weight_enemy_potential # weight for how many potential in-a-rows enemy has
@@ -32,16 +191,122 @@ class AlphaBetaAgent(agent.Agent):
     
     # Pick a column.
     #
-    # PARAM [board.Board] brd: the current board state
+    # PARAM [board.Board]       brd: the current board state
+    # PARAM [agent.MoveContext] ctx: the move deadline and history, if known
     # RETURN [int]: the column where the token must be added
     #
     # NOTE: make sure the column is legal, or you'll lose the game.
-    def go(self, brd):
+    def go(self, brd, ctx=None):
         """Search for the best move (choice of column for the token)"""
         cols = brd.free_cols()
-        choice = self.alphabeta_decision(brd)
+        # Stop pondering, and get the result if the pondered position is brd
+        pondered = None
+        if self.ponderer is not None:
+            pondered = self.ponderer.take(brd)
+        if self.book_path is not None:
+            if self.opening_book is None:
+                self.opening_book = book.OpeningBook(self.book_path)
+            x = self.opening_book.move(brd)
+            if x in cols:
+                return x
+        if self.tablebase_path is not None:
+            if self.endgame_table is None:
+                self.endgame_table = tablebase.Tablebase(self.tablebase_path)
+            if sum(brd.h - y for y in brd.heights) <= self.endgame_table.limit:
+                x = self.endgame_table.move(brd)
+                if x in cols:
+                    return x
+        if pondered in cols:
+            choice = pondered
+        elif self.move_time is not None:
+            deadline = time.perf_counter() + self.move_time
+            if (ctx is not None) and (ctx.deadline is not None):
+                deadline = min(deadline, ctx.deadline - DEADLINE_MARGIN)
+            if self.smp_helpers > 0:
+                choice = self.smp_decision(brd, deadline)
+            else:
+                choice = self.iterative_deepening(brd, deadline)
+        elif self.smp_helpers > 0:
+            choice = self.smp_decision(brd, None)
+        elif self.workers > 1:
+            choice = self.parallel_decision(brd)
+        elif self.inplace:
+            choice = self.inplace_decision(brd)
+        else:
+            choice = self.alphabeta_decision(brd)
+        if self.ponders and (self.move_time is not None or self.smp_helpers > 0 or
+                            (self.inplace and self.workers <= 1)):
+            self.start_pondering(brd, choice)
 
         return choice
+
+    # Start pondering on the opponent's expected reply to a move, if the
+    # principal variation of the search gives one.
+    #
+    # PARAM [board.Board] brd:    the board state before the move
+    # PARAM [int]         choice: the move
+    def start_pondering(self, brd, choice):
+        """Starts searching the position after choice and the expected reply"""
+        if (len(self.pv) < 2) or (self.pv[0] != choice):
+            return
+        if self.ponderer is None:
+            self.ponderer = ponder.Ponderer(self)
+        self.ponderer.start(brd, choice, self.pv[1])
+
+    # Stop pondering once the game is over, so that the thread does not run
+    # on the time of the next game.
+    def end_game(self):
+        """Stops the pondering thread, if any"""
+        if self.ponderer is not None:
+            self.ponderer.cancel()
+
+    # Search a position until the end, as go() would, unless stopped.
+    # Runs in the pondering thread.
+    #
+    # PARAM [board.Board] brd: the board state; it is restored on return
+    # RETURN [int]: the column chosen, or None if the search was stopped
+    #               before its end
+    def ponder_search(self, brd):
+        """Searches brd like go(); returns the choice, or None if stopped"""
+        if (self.move_time is None) and (self.smp_helpers == 0):
+            try:
+                return self.inplace_decision(brd)
+            except SearchTimeout:
+                return None
+        choice = self.iterative_deepening(brd, None)
+        empty = sum(brd.h - y for y in brd.heights)
+        if (self.completed_depth < self.max_depth) and (self.completed_depth + 1 < empty):
+            return None
+        return choice
+
+    # Get the state to pickle: everything but the worker processes.
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["splitter"] = None
+        state["smp"] = None
+        state["opening_book"] = None
+        state["endgame_table"] = None
+        state["ponderer"] = None
+        state["stop"] = None
+        return state
+
+    # Stop the worker processes of the parallel search, the Lazy SMP
+    # helpers and the pondering thread, if any.
+    def close(self):
+        """Stops the worker and helper processes and the pondering thread"""
+        if self.ponderer is not None:
+            self.ponderer.finish()
+            self.ponderer = None
+            self.stop = None
+        if self.splitter is not None:
+            self.splitter.close()
+            self.splitter = None
+        if self.smp is not None:
+            self.smp.close()
+            self.smp = None
+            self.tt = None
+            if self.tt_size_mb > 0:
+                self.tt = transposition.TranspositionTable(self.tt_size_mb, self.tt_policy)
     
     # ALPHABETA Algorithm 
     #
@@ -123,6 +388,422 @@ class AlphaBetaAgent(agent.Agent):
             local_beta = min(local_beta, v)
         return v
 
+    # ALPHABETA Algorithm, searching in place
+    #
+    # Same search as alphabeta_decision(), but the tree is walked by playing
+    # and undoing moves on brd, so no board is copied.
+    #
+    # PARAM [board.Board] brd: the board state; it is restored on return
+    # RETURN [int]: the column where the token must be added
+    def inplace_decision(self, brd):
+        self.start_search(brd)
+        self.search_depth = self.max_depth
+        (col, score) = self.inplace_root(brd)
+        return col
+
+    # ALPHABETA Algorithm, searching the root moves in parallel
+    #
+    # The first root move is searched here; the others are then searched by
+    # the worker processes, each starting with the best exact score found so
+    # far as alpha, as inplace_root() does. Without a transposition table,
+    # the choice is the same as inplace_decision(), whatever the number of
+    # workers. With one, each worker has its own, filled by the moves it
+    # searched before, and table hits can change scores, and rarely the
+    # choice, from run to run.
+    #
+    # PARAM [board.Board] brd: the board state; it is restored on return
+    # RETURN [int]: the column where the token must be added
+    def parallel_decision(self, brd):
+        self.start_search(brd)
+        self.search_depth = self.max_depth
+        cols = self.search_order(brd, 0, None)
+        self.make(brd, cols[0])
+        first_score = self.inplace_min_value(brd, float('-inf'), float('inf'), 1)
+        self.unmake(brd)
+        if len(cols) == 1:
+            return cols[0]
+        if self.splitter is None:
+            self.splitter = parallel_search.RootSplitter(self, self.workers)
+        (i, self.score, nodes) = self.splitter.search(brd, self.player, self.max_depth,
+                                                      cols, first_score)
+        self.nodes += nodes
+        return cols[i]
+
+    # ALPHABETA Algorithm, with Lazy SMP helpers
+    #
+    # The helpers search the same root as this process, with iterative
+    # deepening at staggered depths. Their only output is the shared table,
+    # which fills up with results the main search then finds; the move is
+    # the one chosen by the main search.
+    #
+    # PARAM [board.Board] brd:      the board state; it is restored on return
+    # PARAM [float]       deadline: the time.perf_counter() value by which the
+    #                               search must be over, or None to search up
+    #                               to max_depth
+    # RETURN [int]: the column where the token must be added
+    def smp_decision(self, brd, deadline):
+        if self.smp is None:
+            self.smp = lazy_smp.LazySMP(self, self.smp_helpers,
+                                        self.tt_size_mb or 16, self.tt_policy)
+        # Clear the table here, before the helpers start using it
+        if self.tt_player != self.player:
+            self.tt.clear()
+            self.tt_player = self.player
+        self.smp.start(brd, self.player, deadline)
+        try:
+            choice = self.iterative_deepening(brd, deadline)
+        finally:
+            self.helper_nodes = self.smp.finish()
+        return choice
+
+    # Iterative deepening, searching in place until a deadline
+    #
+    # Searches with depth first, first + step, ... up to max_depth, each
+    # depth starting with the principal variation of the previous one. The
+    # search of a depth is abandoned if the deadline passes before it ends,
+    # and a depth is not started if the previous one took longer than the
+    # time left.
+    #
+    # PARAM [board.Board] brd:      the board state; it is restored on return
+    # PARAM [float]       deadline: the time.perf_counter() value by which the
+    #                               search must be over, or None
+    # PARAM [int]         first:    the first depth to search
+    # PARAM [int]         step:     the step between depths
+    # RETURN [int]: the column chosen by the last completed depth
+    def iterative_deepening(self, brd, deadline, first=0, step=1):
+        self.start_search(brd)
+        choice = self.ordered_cols(brd)[0]
+        empty = sum(brd.h - y for y in brd.heights)
+        last_time = 0
+        self.deadline = deadline
+        try:
+            for d in range(min(first, self.max_depth), self.max_depth + 1, step):
+                st = time.perf_counter()
+                if (d > first) and (deadline is not None) and (deadline - st < last_time):
+                    break
+                self.search_depth = d
+                try:
+                    (choice, self.score) = self.inplace_root(brd)
+                except SearchTimeout:
+                    self.unwind(brd)
+                    break
+                self.completed_depth = d
+                last_time = time.perf_counter() - st
+                # Nothing more to learn once the search reaches the end of the game
+                if d + 1 >= empty:
+                    break
+        finally:
+            self.deadline = None
+        return choice
+
+    # Reset the per-move search state.
+    #
+    # PARAM [board.Board] brd: the board state at the root of the search
+    def start_search(self, brd):
+        """Prepares the in-place search of brd"""
+        # Scores are from our point of view: drop them if we changed sides
+        if (self.tt is not None) and (self.tt_player != self.player):
+            self.tt.clear()
+            self.tt_player = self.player
+        # Number of moves on the board at the root
+        self.root_ply = len(brd.moves)
+        # Principal variation of the last completed search
+        self.pv = []
+        # Best line found from each depth of the current search
+        self.pv_lines = {}
+        # Nodes visited
+        self.nodes = 0
+        # Last completed depth and its score
+        self.completed_depth = -1
+        self.score = None
+        # Killer moves are only kept during a search
+        self.killers = {}
+        # Bring the evaluator to the root position
+        if self.incremental_eval or self.window_eval:
+            ev = self.evaluator
+            if (ev is None) or ((ev.w, ev.h, ev.n) != (brd.w, brd.h, brd.n)):
+                kind = evaluator.HeuristicEvaluator
+                if self.window_eval:
+                    kind = evaluator.WindowEvaluator
+                ev = kind(brd.w, brd.h, brd.n,
+                          self.weight_self_potential,
+                          self.weight_enemy_potential,
+                          self.weight_in_a_row,
+                          self.multiplier_growth_rate,
+                          self.weight_token_height)
+                self.evaluator = ev
+            ev.reset(brd)
+        # Start a new history table with each game, and age it between moves
+        if ((self.history is None) or (self.history_player != self.player) or
+            (self.root_ply < self.history_ply)):
+            self.history = [None] + [[0] * (brd.w * brd.h) for p in range(2)]
+            self.history_player = self.player
+        else:
+            for table in self.history[1:]:
+                for i in range(len(table)):
+                    table[i] //= 2
+        self.history_ply = self.root_ply
+
+    # Take back the moves played by an interrupted search.
+    #
+    # PARAM [board.Board] brd: the board state
+    def unwind(self, brd):
+        """Undoes the moves played on brd since the root of the search"""
+        while len(brd.moves) > self.root_ply:
+            self.unmake(brd)
+
+    # Play a move in the in-place search.
+    #
+    # PARAM [board.Board] brd: the board state
+    # PARAM [int]         col: the column to play
+    def make(self, brd, col):
+        """Plays col on brd, keeping the evaluator up to date"""
+        p = brd.player
+        brd.play(col)
+        if self.evaluator is not None:
+            (x, y) = brd.last_move
+            self.evaluator.play(x, y, p)
+
+    # Take back the last move of the in-place search.
+    #
+    # PARAM [board.Board] brd: the board state
+    def unmake(self, brd):
+        """Undoes the last move on brd, keeping the evaluator up to date"""
+        if self.evaluator is not None:
+            x = brd.moves[-1]
+            self.evaluator.undo(x, brd.heights[x] - 1)
+        brd.undo()
+
+    # Score a leaf of the in-place search.
+    #
+    # PARAM [board.Board] brd: the board state
+    # RETURN [float]: the heuristic score of brd
+    def evaluate(self, brd):
+        """Returns the heuristic score of a leaf of the in-place search"""
+        if self.evaluator is not None:
+            return self.evaluator.score(self.player)
+        return self.heuristic(brd)
+
+    # Search the moves at the root.
+    #
+    # Each move is searched with the best score so far as alpha: a move that
+    # cannot beat it only needs a bound.
+    #
+    # PARAM [board.Board] brd: the board state; it is restored on return
+    # RETURN [(int, float)]: the best column and its score
+    def inplace_root(self, brd):
+        bestScore = float('-inf')
+        bestCol = 0
+        line = []
+        for col in self.search_order(brd, 0, None):
+            self.make(brd, col)
+            nextScore = self.inplace_min_value(brd, bestScore, float('inf'), 1)
+            self.unmake(brd)
+            if nextScore > bestScore:
+                bestScore = nextScore
+                bestCol = col
+                line = [col] + self.pv_lines[1]
+        self.pv = line
+        return (bestCol, bestScore)
+
+    # Maximizer function for the in-place alpha beta algorithm
+    #
+    # PARAM [board.Board] brd: the board state; it is restored on return
+    # PARAM alpha
+    # PARAM beta
+    # PARAM depth   Current depth
+    def inplace_max_value(self, brd, alpha, beta, depth):
+        self.visit()
+        self.pv_lines[depth] = []
+        if brd.get_outcome() != 0 or not brd.free_cols():
+            return self.utility(brd)
+        (v, ttmove) = self.tt_lookup(brd, alpha, beta, depth)
+        if v is not None:
+            return v
+        (a0, b0) = (alpha, beta)
+        v = float('-inf')
+        best = None
+        for (i, col) in enumerate(self.search_order(brd, depth, ttmove)):
+            self.make(brd, col)
+            score = self.inplace_min_value(brd, alpha, beta, depth + 1)
+            self.unmake(brd)
+            if score > v:
+                v = score
+                best = col
+                self.pv_lines[depth] = [col] + self.pv_lines[depth + 1]
+            if v >= beta:
+                self.cutoff(brd, col, i, depth)
+                break
+            alpha = max(alpha, v)
+        self.tt_save(brd, depth, v, a0, b0, best)
+        return v
+
+    # Minimizer function for the in-place alpha beta algorithm
+    #
+    # PARAM [board.Board] brd: the board state; it is restored on return
+    # PARAM alpha
+    # PARAM beta
+    # PARAM depth   Current depth
+    def inplace_min_value(self, brd, alpha, beta, depth):
+        self.visit()
+        self.pv_lines[depth] = []
+        if brd.get_outcome() != 0 or not brd.free_cols():
+            return self.utility(brd)
+        (v, ttmove) = self.tt_lookup(brd, alpha, beta, depth)
+        if v is not None:
+            return v
+        (a0, b0) = (alpha, beta)
+        v = float('inf')
+        best = None
+        for (i, col) in enumerate(self.search_order(brd, depth, ttmove)):
+            self.make(brd, col)
+            score = self.inplace_max_value(brd, alpha, beta, depth + 1)
+            self.unmake(brd)
+            if score < v:
+                v = score
+                best = col
+                self.pv_lines[depth] = [col] + self.pv_lines[depth + 1]
+            if v <= alpha:
+                self.cutoff(brd, col, i, depth)
+                break
+            beta = min(beta, v)
+        self.tt_save(brd, depth, v, a0, b0, best)
+        return v
+
+    # Count a visited node, and stop the search if the deadline has passed
+    # or, in a Lazy SMP helper or when pondering, if told to stop.
+    def visit(self):
+        """Counts a node; raises SearchTimeout past the deadline or when stopped"""
+        self.nodes += 1
+        if (self.deadline is not None) and (time.perf_counter() > self.deadline):
+            raise SearchTimeout()
+        if (self.stop is not None) and self.stop.value:
+            raise SearchTimeout()
+
+    # Record a cutoff: count it, and remember the move that caused it in the
+    # killer moves and the history table.
+    #
+    # PARAM [board.Board] brd:   the board state, before the move
+    # PARAM [int]         col:   the column that caused the cutoff
+    # PARAM [int]         i:     the index of col in the search order
+    # PARAM [int]         depth: the current depth
+    def cutoff(self, brd, col, i, depth):
+        """Records a cutoff caused by the i-th move searched, col"""
+        self.metrics.cutoff(i == 0)
+        if self.dynamic_ordering:
+            ks = self.killers.setdefault(depth, [])
+            if col not in ks:
+                ks.insert(0, col)
+                del ks[2:]
+            draft = self.search_depth + 1 - depth
+            self.history[brd.player][col * brd.h + brd.heights[col]] += draft * draft
+
+    # Get the columns to search from a node of the in-place search.
+    #
+    # The move of the previous principal variation comes first while the
+    # search follows it, then the best move stored in the table. With
+    # dynamic ordering, the killer moves of the depth come next, and the
+    # other moves follow by decreasing history score. With symmetry, only the
+    # left half of the moves is kept from a symmetric position. With threats,
+    # the moves are pruned by forced_cols().
+    #
+    # PARAM [board.Board] brd:    the board state
+    # PARAM [int]         depth:  the current depth
+    # PARAM [int]         ttmove: the best move stored for brd, or None
+    # RETURN [list of int]: the free columns, in the order they are searched
+    def search_order(self, brd, depth, ttmove):
+        """Returns the free columns of brd in search order"""
+        cols = self.ordered_cols(brd)
+        if self.symmetry and brd.is_symmetric():
+            cols = [x for x in cols if x <= brd.w - 1 - x]
+        if self.threats:
+            cols = self.forced_cols(brd, cols)
+        if self.dynamic_ordering:
+            table = self.history[brd.player]
+            h = brd.h
+            heights = brd.heights
+            cols.sort(key=lambda x: -table[x * h + heights[x]])
+            for k in reversed(self.killers.get(depth, [])):
+                if k in cols:
+                    cols.remove(k)
+                    cols.insert(0, k)
+        first = ttmove
+        if (len(self.pv) > depth) and (brd.moves[self.root_ply:] == self.pv[:depth]):
+            first = self.pv[depth]
+        if (first is not None) and (first in cols):
+            cols.remove(first)
+            cols.insert(0, first)
+        return cols
+
+    # Look up a non-terminal position in the transposition table, and score
+    # it if it is a leaf.
+    #
+    # PARAM [board.Board] brd: the board state
+    # PARAM alpha
+    # PARAM beta
+    # PARAM depth   Current depth
+    # RETURN [(float, int)]: the score if the search can stop here (None
+    #                        otherwise), and the best stored move (or None)
+    def tt_lookup(self, brd, alpha, beta, depth):
+        """Returns (score or None, stored move or None) for a non-terminal position"""
+        draft = self.search_depth + 1 - depth
+        if self.tt is None:
+            if draft <= 0:
+                return (self.evaluate(brd), None)
+            return (None, None)
+        (key, mirrored) = self.tt_key(brd)
+        e = self.tt.probe(key)
+        if e is None:
+            if draft <= 0:
+                h = self.evaluate(brd)
+                self.tt.store(key, 0, h, transposition.EXACT, None)
+                return (h, None)
+            return (None, None)
+        if e[1] >= draft:
+            if e[3] == transposition.EXACT:
+                return (e[2], None)
+            if (e[3] == transposition.LOWER) and (e[2] >= beta):
+                return (e[2], None)
+            if (e[3] == transposition.UPPER) and (e[2] <= alpha):
+                return (e[2], None)
+        if draft <= 0:
+            h = self.evaluate(brd)
+            self.tt.store(key, 0, h, transposition.EXACT, None)
+            return (h, None)
+        if mirrored and (e[4] is not None):
+            return (None, brd.w - 1 - e[4])
+        return (None, e[4])
+
+    # Get the table key of a position.
+    #
+    # With symmetry, a position and its mirror share their key, and the
+    # moves stored are those of the position with the smaller hash.
+    #
+    # PARAM [board.Board] brd: the board state
+    # RETURN [(int, bool)]: the key, and whether stored moves must be mirrored
+    def tt_key(self, brd):
+        """Returns (table key, whether stored moves are mirrored) for brd"""
+        if self.symmetry and (brd.mirror_hash < brd.hash):
+            return (brd.mirror_hash, True)
+        return (brd.hash, False)
+
+    # Store the result of a search in the transposition table, if any.
+    #
+    # PARAM [board.Board] brd:   the board state
+    # PARAM depth   Current depth
+    # PARAM [float]       score: the score found
+    # PARAM [float]       alpha: the alpha the position was searched with
+    # PARAM [float]       beta:  the beta the position was searched with
+    # PARAM [int]         move:  the best column found
+    def tt_save(self, brd, depth, score, alpha, beta, move):
+        """Stores a search result in the transposition table, if any"""
+        if self.tt is not None:
+            (key, mirrored) = self.tt_key(brd)
+            if mirrored and (move is not None):
+                move = brd.w - 1 - move
+            self.tt.store(key, self.search_depth + 1 - depth, score,
+                          transposition.bound(score, alpha, beta), move)
+
     # Assigns a score of a terminal state: win, loss, tie 
     def utility(self, brd):
         # determine how many pieces we have played 
@@ -219,6 +900,47 @@ class AlphaBetaAgent(agent.Agent):
         return self.weight_in_a_row * factor_in_a_row - self.weight_token_height * token_height # return the weighted final value
 
     
+    # Get the columns to search from the given board, in search order.
+    #
+    # PARAM [board.Board] brd: the board state
+    # RETURN [list of int]: the free columns, in the order they are searched
+    def ordered_cols(self, brd):
+        """Returns the free columns of brd in the order they are searched"""
+        freecols = brd.free_cols()
+        def sortFun(e):
+            return len(freecols)/2 - e
+        freecols.sort(key=sortFun)
+        return freecols
+
+    # Prune moves with the immediate threats on the board.
+    #
+    # A winning move is searched alone. Otherwise, if the opponent could win
+    # with its next token, only the moves that block it are kept; if not,
+    # the moves that let the opponent win on top of them are dropped, unless
+    # there is no other move.
+    #
+    # PARAM [board.Board]  brd:  the board state
+    # PARAM [list of int]  cols: the free columns, in search order
+    # RETURN [list of int]: the columns worth searching, in the same order
+    def forced_cols(self, brd, cols):
+        """Returns the columns of cols left after pruning with the immediate threats"""
+        me = brd.player
+        enemy = 1
+        if me == 1:
+            enemy = 2
+        wins = brd.winning_cols(me)
+        if wins:
+            return [x for x in cols if x in wins][:1]
+        blocks = brd.winning_cols(enemy)
+        if blocks:
+            return [x for x in cols if x in blocks]
+        safe = [x for x in cols
+                if (brd.heights[x] + 1 >= brd.h) or
+                   not brd.is_winning_cell(x, brd.heights[x] + 1, enemy)]
+        if safe:
+            return safe
+        return cols
+
     # Get the successors of the given board.
     #
     # PARAM [board.Board] brd: the board state
@@ -228,15 +950,14 @@ class AlphaBetaAgent(agent.Agent):
     def get_successors(self, brd):
         """Returns the reachable boards from the given board brd. The return value is a tuple (new board state, column number where last token was added)."""
         # Get possible actions
-        freecols = brd.free_cols()
+        freecols = self.ordered_cols(brd)
+        if self.threats:
+            freecols = self.forced_cols(brd, freecols)
         # Are there legal actions left?
         if not freecols:
             return []
         # Make a list of the new boards along with the corresponding actions
         succ = []
-        def sortFun(e):
-            return len(freecols)/2 - e
-        freecols.sort(key=sortFun)
         for col in freecols:
             # Clone the original board
             nb = brd.copy()
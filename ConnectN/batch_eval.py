@@ -0,0 +1,140 @@
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+###########################
+# Batched leaf evaluation #
+###########################
+
+class BatchEvaluator(object):
+    """Computes AlphaBetaAgent.heuristic() for many boards at once with NumPy"""
+
+    # Class constructor.
+    #
+    # Only large batches pay for the NumPy calls (see bench_batch_eval.py).
+    # The alpha-beta search does not use it: the leaves of one node are only
+    # w boards, slower to score in a batch than one by one, and scoring them
+    # all up front would lose the cutoffs among them.
+    #
+    # PARAM [int]   w: the board width
+    # PARAM [int]   h: the board height
+    # PARAM [int]   n: the number of tokens to line up to win
+    # PARAM [float] weight_self_potential:  see AlphaBetaAgent
+    # PARAM [float] weight_enemy_potential: see AlphaBetaAgent
+    # PARAM [float] weight_in_a_row:        see AlphaBetaAgent
+    # PARAM [float] multiplier_growth_rate: see AlphaBetaAgent
+    # PARAM [float] weight_token_height:    see AlphaBetaAgent
+    def __init__(self, w, h, n, weight_self_potential, weight_enemy_potential, weight_in_a_row, multiplier_growth_rate, weight_token_height):
+        """Class constructor"""
+        if np is None:
+            raise ImportError("BatchEvaluator needs NumPy")
+        self.w = w
+        self.h = h
+        self.n = n
+        self.weight_self_potential = weight_self_potential
+        self.weight_enemy_potential = weight_enemy_potential
+        self.weight_in_a_row = weight_in_a_row
+        self.weight_token_height = weight_token_height
+        # Line factor for k tokens after the first one, computed with the
+        # same operations as AlphaBetaAgent.potential_line_at()
+        factor = [1]
+        for k in range(1, n):
+            factor.append(multiplier_growth_rate * (factor[-1] + 1))
+        # Score of a line with k tokens after the first one, before the
+        # token height term
+        self.line_value = np.array([weight_in_a_row * f for f in factor], dtype=np.float64)
+
+    # Stack boards into one array.
+    #
+    # PARAM [list of board.Board] boards: boards of the evaluator's size
+    # RETURN [numpy.ndarray]: the (len(boards), h, w) array of their tokens
+    def stack(self, boards):
+        """Returns the tokens of the given boards as a (N, h, w) int8 array"""
+        return np.array([b.board for b in boards], dtype=np.int8).reshape(len(boards), self.h, self.w)
+
+    # Score the lines starting at every cell, in one direction, for a batch.
+    #
+    # Mirrors AlphaBetaAgent.potential_line_at(): a line that leaves the
+    # board or meets an enemy token is worth 0; otherwise it is worth
+    # weight_in_a_row * factor - weight_token_height * token_height, counting
+    # the player's tokens after the starting cell.
+    #
+    # PARAM [numpy.ndarray] mine:    (N, h, w) uint8, 1 for the player's tokens
+    # PARAM [numpy.ndarray] theirs:  (N, h, w) uint8, 1 for the enemy's tokens
+    # PARAM [numpy.ndarray] exposed: (N, h, w) uint8, 1 for the player's tokens with
+    #                                an empty cell above
+    # PARAM [int]           dx:      the step in the x direction
+    # PARAM [int]           dy:      the step in the y direction
+    # RETURN [numpy.ndarray]: (N, h, w) float, the line score at each cell
+    def line_scores(self, mine, theirs, exposed, dx, dy):
+        """Returns the score of the line starting at each cell in direction (dx,dy)"""
+        (N, h, w) = mine.shape
+        out = np.zeros((N, h, w), dtype=np.float64)
+        # Cells where the line stays on the board
+        x1 = w - (self.n-1) * dx
+        y0 = max(0, -(self.n-1) * dy)
+        y1 = min(h, h - (self.n-1) * dy)
+        if (x1 <= 0) or (y1 <= y0):
+            return out
+        k = np.zeros((N, y1 - y0, x1), dtype=np.uint8)
+        e = np.zeros((N, y1 - y0, x1), dtype=np.uint8)
+        blocked = np.zeros((N, y1 - y0, x1), dtype=np.uint8)
+        for i in range(1, self.n):
+            ys = slice(y0 + i*dy, y1 + i*dy)
+            xs = slice(i*dx, x1 + i*dx)
+            k += mine[:, ys, xs]
+            e += exposed[:, ys, xs]
+            blocked |= theirs[:, ys, xs]
+        score = self.line_value[k]
+        if self.weight_token_height != 0:
+            score -= self.weight_token_height * e
+        score[blocked != 0] = 0
+        out[:, y0:y1, 0:x1] = score
+        return out
+
+    # Compute the potential wins of a player for a batch, as
+    # AlphaBetaAgent.get_potential_wins() does for one board.
+    #
+    # PARAM [numpy.ndarray] grids:  (N, h, w) int8, the boards
+    # PARAM [int]           player: the player being scored
+    # RETURN [numpy.ndarray]: (N,) float, the potential wins of each board
+    def potential_wins(self, grids, player):
+        """Returns the potential wins of player on each board of the batch"""
+        enemy = 3 - player
+        mine = (grids == player).view(np.uint8)
+        theirs = (grids == enemy).view(np.uint8)
+        # A token is exposed if the cell above it is on the board and empty
+        exposed = np.zeros(mine.shape, dtype=np.uint8)
+        exposed[:, :-1, :] = mine[:, :-1, :] & (grids[:, 1:, :] == 0)
+        # First non-zero line score in the order horizontal, vertical,
+        # diagonal up, diagonal down
+        best = None
+        for (dx, dy) in ((1, 0), (0, 1), (1, 1), (1, -1)):
+            s = self.line_scores(mine, theirs, exposed, dx, dy)
+            if best is None:
+                best = s
+            else:
+                best = np.where(best != 0, best, s)
+        return (best * mine).sum(axis=(1, 2))
+
+    # Compute the heuristic of a batch of boards.
+    #
+    # PARAM [numpy.ndarray] grids:  (N, h, w) int8, the boards
+    # PARAM [int]           player: the player the scores are for
+    # RETURN [numpy.ndarray]: (N,) float, AlphaBetaAgent.heuristic() of each board
+    def evaluate(self, grids, player):
+        """Returns the heuristic of each board of the batch for player"""
+        return (self.weight_self_potential * self.potential_wins(grids, player) -
+                self.weight_enemy_potential * self.potential_wins(grids, 3 - player))
+
+    # Compute the heuristic of a list of boards.
+    #
+    # PARAM [list of board.Board] boards: the boards
+    # PARAM [int]                 player: the player the scores are for
+    # RETURN [list of float]: AlphaBetaAgent.heuristic() of each board
+    def evaluate_boards(self, boards, player):
+        """Returns the heuristic of each board for player"""
+        if not boards:
+            return []
+        return self.evaluate(self.stack(boards), player).tolist()
@@ -0,0 +1,155 @@
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+###########################
+# Batched random playouts #
+###########################
+
+class BatchPlayout(object):
+    """Plays many random games at once, in lockstep, with NumPy"""
+
+    # Class constructor.
+    #
+    # Boards with w*(h+1) <= 64 are stored as one uint64 bitmask per player,
+    # as in board.BitBoard; larger ones, up to 64x64, as one uint64 bitmask
+    # per player and line of cells: rows, columns and both diagonals.
+    #
+    # PARAM [int] w:    the board width
+    # PARAM [int] h:    the board height
+    # PARAM [int] n:    the number of tokens to line up to win
+    # PARAM [int] seed: the seed of the random generator, None for a random one
+    def __init__(self, w, h, n, seed=None):
+        """Class constructor"""
+        if np is None:
+            raise ImportError("BatchPlayout needs NumPy")
+        self.w = w
+        self.h = h
+        self.n = n
+        self.rng = np.random.default_rng(seed)
+        self.bitboards = w * (h + 1) <= 64
+        if (w > 64) or (h > 64):
+            raise ValueError("BatchPlayout only plays boards up to 64x64")
+
+    # Play random games.
+    #
+    # Every game moves at each step: its player picks a free column
+    # uniformly at random, like agent.RandomAgent.
+    #
+    # PARAM [int] games: the number of games to play
+    # RETURN [(numpy.ndarray, numpy.ndarray, numpy.ndarray)]: for each game,
+    #        the outcome (0 for a tie, else the winner), the columns played
+    #        (padded with -1) and the number of moves
+    def play(self, games):
+        """Returns (outcomes, moves, lengths) of a batch of random games"""
+        (w, h) = (self.w, self.h)
+        outcomes = np.zeros(games, dtype=np.int8)
+        moves = np.full((games, w * h), -1, dtype=np.int8)
+        lengths = np.full(games, w * h, dtype=np.int64)
+        # The state of a set of games, packed: their indices, whether they
+        # are still going on, column heights and tokens. Games that are over
+        # keep being played, all with the same number of tokens, and are
+        # only dropped once they are a quarter of the set, as packing copies
+        # the whole state.
+        live = np.arange(games)
+        going = np.ones(games, dtype=bool)
+        heights = np.zeros((games, w), dtype=np.int64)
+        if self.bitboards:
+            state = np.zeros((3, games), dtype=np.uint64)
+        else:
+            state = np.zeros((games, 3, 4, w + h - 1), dtype=np.uint64)
+        for ply in range(w * h):
+            player = 1 + ply % 2
+            # Pick a column at random in each game, and pick again among the
+            # free columns where it is full
+            rows = np.arange(live.size)
+            cols = self.rng.integers(0, w, size=live.size)
+            ys = heights[rows, cols]
+            full = np.flatnonzero(ys >= h)
+            if full.size:
+                r = self.rng.random((full.size, w))
+                r[heights[full] >= h] = -1.0
+                cols[full] = r.argmax(axis=1)
+                ys[full] = heights[full, cols[full]]
+            heights[rows, cols] = ys + 1
+            moves[live, ply] = cols
+            # Add the tokens and look for lines through them
+            if self.bitboards:
+                won = self.drop_bits(state, player, cols, ys)
+            else:
+                won = self.drop_lines(state, rows, player, cols, ys)
+            won &= going
+            if won.any():
+                outcomes[live[won]] = player
+                lengths[live[won]] = ply + 1
+                going &= ~won
+                left = np.count_nonzero(going)
+                if left == 0:
+                    break
+                if 4 * left <= 3 * live.size:
+                    live = live[going]
+                    heights = heights[going]
+                    if self.bitboards:
+                        state = state[:, going]
+                    else:
+                        state = state[going]
+                    going = np.ones(left, dtype=bool)
+        # Clear the moves played after the end of each game
+        moves[np.arange(w * h) >= lengths[:, None]] = -1
+        return (outcomes, moves, lengths)
+
+    # Add tokens to bitmask boards.
+    #
+    # PARAM [numpy.ndarray] bits:   (3, games) uint64, the masks of each player
+    # PARAM [int]           player: the player adding the tokens
+    # PARAM [numpy.ndarray] cols:   the column of each token
+    # PARAM [numpy.ndarray] ys:     the row of each token
+    # RETURN [numpy.ndarray]: bool, whether each game is won by the token
+    def drop_bits(self, bits, player, cols, ys):
+        """Adds the tokens to the masks; returns which games they win"""
+        pos = (cols * (self.h + 1) + ys).astype(np.uint64)
+        mask = bits[player] | (np.uint64(1) << pos)
+        bits[player] = mask
+        won = np.zeros(mask.size, dtype=bool)
+        for s in (1, self.h + 1, self.h, self.h + 2):
+            # After each step, bit i of m is set iff 'run' cells starting at
+            # i in direction s are all set, as in BitBoard.has_line()
+            m = mask
+            run = 1
+            while run < self.n:
+                step = min(run, self.n - run)
+                m = m & (m >> np.uint64(step * s))
+                run += step
+            won |= m != 0
+        return won
+
+    # Add tokens to line boards.
+    #
+    # PARAM [numpy.ndarray] lines:  (games, 3, 4, w+h-1) uint64, the masks
+    #                               of each player for each direction and line
+    # PARAM [numpy.ndarray] games:  the index of each game, 0 to games-1
+    # PARAM [int]           player: the player adding the tokens
+    # PARAM [numpy.ndarray] cols:   the column of each token
+    # PARAM [numpy.ndarray] ys:     the row of each token
+    # RETURN [numpy.ndarray]: bool, whether each game is won by the token
+    def drop_lines(self, lines, games, player, cols, ys):
+        """Adds the tokens to the line masks; returns which games they win"""
+        n = self.n
+        (xbits, ybits) = (np.uint64(1) << cols.astype(np.uint64),
+                          np.uint64(1) << ys.astype(np.uint64))
+        won = np.zeros(games.size, dtype=bool)
+        (size, lines) = (lines[0].size, lines.reshape(-1))
+        # The line through each token in each direction, and its bit there
+        for (family, line, bit) in ((0, ys, xbits), (1, cols, ybits),
+                                    (2, cols - ys + self.h - 1, xbits), (3, cols + ys, xbits)):
+            at = games * size + ((player * 4 + family) * (self.w + self.h - 1) + line)
+            m = lines[at] | bit
+            lines[at] = m
+            run = 1
+            while run < n:
+                step = min(run, n - run)
+                m = m & (m >> np.uint64(step))
+                run += step
+            won |= m != 0
+        return won
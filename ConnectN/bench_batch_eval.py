@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+
+import random
+import time
+import batch_eval
+import positions
+import alpha_beta_agent as aba
+
+#
+# Leaves per second of AlphaBetaAgent.heuristic(), scored one board at a
+# time versus in NumPy batches
+#
+
+# Set random seed for reproducibility
+rng = random.Random(1)
+
+# Run the benchmark for a board configuration
+def bench(w, h, n, count):
+    ab = aba.AlphaBetaAgent("bench", 1)
+    ab.player = 1
+    be = batch_eval.BatchEvaluator(w, h, n, ab.weight_self_potential,
+                                   ab.weight_enemy_potential, ab.weight_in_a_row,
+                                   ab.multiplier_growth_rate, ab.weight_token_height)
+    boards = positions.random_positions(rng, w, h, n, count, 0, (w * h) // 2)
+    # Scalar
+    st = time.perf_counter()
+    expected = [ab.heuristic(b) for b in boards]
+    scalar = count / (time.perf_counter() - st)
+    print("{}x{} n={}: scalar            {:10.0f} leaves/s".format(w, h, n, scalar))
+    # Batched, by sibling groups (w boards) and by large batches
+    for size in [w, 64, 1024]:
+        st = time.perf_counter()
+        got = []
+        for i in range(0, count, size):
+            got.extend(be.evaluate_boards(boards[i:i+size], 1))
+        batched = count / (time.perf_counter() - st)
+        assert got == expected, "batched scores differ from heuristic()"
+        print("{}x{} n={}: batches of {:4d}   {:10.0f} leaves/s  ({:.1f}x)".format(w, h, n, size, batched, batched / scalar))
+
+bench(7, 6, 4, 4096)
+bench(10, 10, 5, 4096)
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+
+import random
+import time
+import agent
+import board
+import game
+import batch_playout
+
+#
+# Random games per second, played one at a time with Game and RandomAgent
+# versus in NumPy batches with BatchPlayout
+#
+
+# Set random seed for reproducibility
+random.seed(1)
+
+# Check the outcomes of a batch by replaying its move sequences on boards
+def check(w, h, n, outcomes, moves, lengths, count):
+    for i in range(count):
+        brd = board.new_board(w, h, n)
+        for x in moves[i, :lengths[i]]:
+            assert brd.get_outcome() == 0, "move after the end of the game"
+            brd.add_token(int(x))
+        assert int(outcomes[i]) == brd.get_outcome(), "wrong outcome"
+        assert (brd.get_outcome() != 0) or not brd.free_cols(), "game not over"
+
+# Run the benchmark for a board configuration
+def bench(w, h, n, count, batch):
+    # One game at a time
+    st = time.perf_counter()
+    for i in range(count):
+        g = game.Game(w, h, n, agent.RandomAgent("r1"), agent.RandomAgent("r2"))
+        g.go()
+    loop = count / (time.perf_counter() - st)
+    print("{}x{} n={}: Game loop         {:10.0f} games/s".format(w, h, n, loop))
+    # Batched
+    bp = batch_playout.BatchPlayout(w, h, n, seed=1)
+    st = time.perf_counter()
+    (outcomes, moves, lengths) = bp.play(batch)
+    batched = batch / (time.perf_counter() - st)
+    check(w, h, n, outcomes, moves, lengths, 200)
+    wins = [(outcomes == p).mean() for p in range(3)]
+    print("{}x{} n={}: batches of {:5d}  {:10.0f} games/s  ({:.0f}x)  p1 {:.3f} p2 {:.3f} tie {:.3f}".format(
+        w, h, n, batch, batched, batched / loop, wins[1], wins[2], wins[0]))
+
+bench(7, 6, 4, 1000, 100000)
+bench(10, 10, 5, 200, 20000)
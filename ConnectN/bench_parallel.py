@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+
+import multiprocessing
+import random
+import sys
+import time
+import positions
+import alpha_beta_agent as aba
+
+#
+# Speedup of the parallel root search of AlphaBetaAgent versus the number of
+# worker processes. The serial search narrows the root window with the best
+# score so far, as the workers do, so the speedup only comes from the
+# workers. No transposition table is used: the workers' tables would fill
+# in a different order from run to run, and the choices must match.
+#
+# Usage: bench_parallel.py [depth] [max workers]
+#
+
+DEPTH = 4
+if len(sys.argv) > 1:
+    DEPTH = int(sys.argv[1])
+MAX_WORKERS = multiprocessing.cpu_count()
+if len(sys.argv) > 2:
+    MAX_WORKERS = int(sys.argv[2])
+
+# Make a suite of 7x6 positions that are not over yet
+suite = positions.random_positions(random.Random(1), 7, 6, 4, 8, 0, 12)
+
+# Time the whole suite with the given number of workers
+def run_suite(workers):
+    ab = aba.AlphaBetaAgent("bench", DEPTH, inplace=True, tt_size_mb=0,
+                            window_eval=True, workers=workers)
+    choices = []
+    st = time.perf_counter()
+    for brd in suite:
+        ab.player = brd.player
+        choices.append(ab.go(brd.copy()))
+    elapsed = time.perf_counter() - st
+    ab.close()
+    return (elapsed, choices)
+
+(serial, expected) = run_suite(1)
+print("workers  1: {:7.2f}s".format(serial))
+workers = 2
+while workers <= MAX_WORKERS:
+    (elapsed, choices) = run_suite(workers)
+    assert choices == expected, "parallel choices differ from the serial search"
+    print("workers {:2d}: {:7.2f}s  speedup {:.2f}x".format(workers, elapsed, serial / elapsed))
+    workers *= 2
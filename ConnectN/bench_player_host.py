@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+
+import random
+import time
+import agent
+import player_host
+import positions
+
+#
+# Time per move of an agent called directly and through a HostedAgent, i.e.
+# the cost of sending the board to the host process and the move back
+#
+
+# Set random seed for reproducibility
+rng = random.Random(1)
+
+# Agent that plays the first free column, so that the time is all overhead
+class FirstColumnAgent(agent.Agent):
+    def go(self, brd):
+        return brd.free_cols()[0]
+
+# Run the benchmark for a board configuration
+def bench(w, h, n, count):
+    boards = positions.random_positions(rng, w, h, n, count)
+    direct = FirstColumnAgent("direct")
+    hosted = player_host.HostedAgent(FirstColumnAgent("hosted"))
+    ctx = agent.MoveContext(None, None, 0, None)
+    hosted.go(boards[0], ctx)
+    try:
+        st = time.perf_counter()
+        expected = [direct.go(b.copy()) for b in boards]
+        direct_time = (time.perf_counter() - st) / count
+        st = time.perf_counter()
+        got = []
+        for b in boards:
+            ctx = agent.MoveContext(time.perf_counter() + 1, 1, len(b.moves), None)
+            got.append(hosted.go(b.copy(), ctx))
+        hosted_time = (time.perf_counter() - st) / count
+    finally:
+        hosted.close()
+    assert got == expected, "hosted moves differ"
+    print("{}x{} n={}: direct {:7.1f} us/move, hosted {:7.1f} us/move".format(w, h, n, 1e6 * direct_time, 1e6 * hosted_time))
+
+bench(7, 6, 4, 2000)
+bench(10, 10, 5, 2000)
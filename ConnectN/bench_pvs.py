@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+
+import random
+import sys
+import time
+import positions
+import alpha_beta_agent as aba
+import pvs_agent
+
+#
+# Nodes searched by AlphaBetaAgent and PVSAgent on a fixed suite of game
+# segments
+#
+# Usage: bench_pvs.py [depth]
+#
+
+DEPTH = 4
+if len(sys.argv) > 1:
+    DEPTH = int(sys.argv[1])
+
+# Plies played from each start position
+PLIES = 6
+
+# Make a suite of 7x6 start positions that are not over yet
+suite = positions.random_positions(random.Random(1), 7, 6, 4, 8, 0, 12)
+
+# Play PLIES moves from each start position with one agent per side, so that
+# each search follows one by the same agent
+def run_suite(make_agent):
+    nodes = 0
+    choices = []
+    st = time.perf_counter()
+    for start in suite:
+        agents = [None, make_agent(1), make_agent(2)]
+        brd = start.copy()
+        for ply in range(PLIES):
+            if (brd.get_outcome() != 0) or not brd.free_cols():
+                break
+            a = agents[brd.player]
+            x = a.go(brd.copy())
+            nodes += a.nodes
+            choices.append(x)
+            brd.play(x)
+    elapsed = time.perf_counter() - st
+    return (nodes, elapsed, choices)
+
+def make_alphabeta(player):
+    a = aba.AlphaBetaAgent("ab", DEPTH, inplace=True, tt_size_mb=16)
+    a.player = player
+    return a
+
+def make_pvs(player):
+    a = pvs_agent.PVSAgent("pvs", DEPTH, tt_size_mb=16)
+    a.player = player
+    return a
+
+(ab_nodes, ab_time, expected) = run_suite(make_alphabeta)
+(pvs_nodes, pvs_time, choices) = run_suite(make_pvs)
+assert choices == expected, "PVS choices differ from alpha-beta"
+print("alpha-beta: {:9d} nodes {:7.2f}s".format(ab_nodes, ab_time))
+print("PVS:        {:9d} nodes {:7.2f}s  ({:.1f}% of the nodes)".format(pvs_nodes, pvs_time, 100 * pvs_nodes / ab_nodes))
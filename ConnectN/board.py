@@ -1,10 +1,44 @@
-import copy
+import os
+import random
+
+###################
+# Zobrist hashing #
+###################
+
+# Zobrist keys for each board size, see zobrist_keys()
+ZOBRIST = {}
+
+# Get the Zobrist keys for a board size.
+#
+# The keys are drawn from a generator seeded with the board size, so every
+# process gets the same keys for the same size.
+#
+# PARAM [int] w: the board width
+# PARAM [int] h: the board height
+# RETURN [list of list of int]: the key of player p's token at (x,y) is
+#                               keys[p][x*h+y] (keys[0] is unused)
+def zobrist_keys(w, h):
+    """Returns the 64-bit Zobrist keys for a w x h board"""
+    if (w, h) not in ZOBRIST:
+        rng = random.Random("zobrist-{}x{}".format(w, h))
+        ZOBRIST[(w, h)] = [None] + [[rng.getrandbits(64) for i in range(w * h)] for p in range(2)]
+    return ZOBRIST[(w, h)]
+
+
 
 ##############
 # Game Board #
 ##############
 
 class Board(object):
+    """Board stored as a row-major list of lists of tokens"""
+
+    # The outcome, the column heights and the hashes are computed from the
+    # tokens in the constructor, then cached and kept up to date by
+    # add_token(), play() and undo(): board may only be changed through
+    # them. Writing to board directly leaves these values stale, and copy()
+    # carries them over; to set up a position, build a new board from its
+    # rows instead.
 
     # Class constructor.
     #
@@ -24,14 +58,43 @@ class Board(object):
         self.n = n
         # Current player
         self.player = 1
+        # Last token added, as (x,y), or None
+        self.last_move = None
+        # Cached game outcome, or None if it must be computed
+        self.outcome = None
+        # Number of tokens in each column
+        self.heights = [0] * w
+        for x in range(w):
+            while (self.heights[x] < h) and (board[self.heights[x]][x] != 0):
+                self.heights[x] += 1
+        # Columns played with add_token(), most recent last
+        self.moves = []
+        # (outcome, last_move) before each move in self.moves, for undo()
+        self.saved = []
+        # Zobrist keys and hash of the tokens on the board, and hash of the
+        # tokens of the left-right mirror of the board
+        self.zobrist = zobrist_keys(w, h)
+        self.hash = 0
+        self.mirror_hash = 0
+        for y in range(h):
+            for x in range(w):
+                if board[y][x] != 0:
+                    self.hash ^= self.zobrist[board[y][x]][x * h + y]
+                    self.mirror_hash ^= self.zobrist[board[y][x]][(w - 1 - x) * h + y]
 
     # Clone a board.
     #
     # RETURN [board.Board]: a deep copy of this object
     def copy(self):
         """Returns a copy of this board that can be independently modified"""
-        cpy = Board(copy.deepcopy(self.board), self.w, self.h, self.n)
+        cpy = Board([row[:] for row in self.board], self.w, self.h, self.n)
         cpy.player = self.player
+        cpy.last_move = self.last_move
+        cpy.outcome = self.outcome
+        cpy.moves = self.moves[:]
+        cpy.saved = self.saved[:]
+        cpy.hash = self.hash
+        cpy.mirror_hash = self.mirror_hash
         return cpy
 
     # Check if a line of identical tokens exists starting at (x,y) in direction (dx,dy)
@@ -67,17 +130,83 @@ class Board(object):
                 self.is_line_at(x, y, 1, 1) or # Diagonal up
                 self.is_line_at(x, y, 1, -1)) # Diagonal down
 
-    # Calculate the game outcome.
+    # Count the tokens identical to the one at (x,y) found by stepping from
+    # (x,y) in direction (dx,dy), not counting (x,y) itself
+    #
+    # PARAM [int] x:  the x coordinate of the starting cell
+    # PARAM [int] y:  the y coordinate of the starting cell
+    # PARAM [int] dx: the step in the x direction
+    # PARAM [int] dy: the step in the y direction
+    # RETURN [int]: the number of identical tokens, at most n-1
+    def count_from(self, x, y, dx, dy):
+        """Return the number of tokens identical to (x,y) that follow it in direction (dx,dy)"""
+        t = self.board[y][x]
+        for i in range(1, self.n):
+            xi = x + i*dx
+            yi = y + i*dy
+            if ((xi < 0) or (xi >= self.w) or (yi < 0) or (yi >= self.h) or
+                (self.board[yi][xi] != t)):
+                return i - 1
+        return self.n - 1
+
+    # Check if a line of identical tokens goes through (x,y) in any direction
+    #
+    # PARAM [int] x:  the x coordinate of the cell
+    # PARAM [int] y:  the y coordinate of the cell
+    # RETURN [Bool]: True if n tokens of the same type have been found, False otherwise
+    def is_line_through(self, x, y):
+        """Return True if a line of identical tokens goes through (x,y) in any direction"""
+        for (dx, dy) in ((1, 0), (0, 1), (1, 1), (1, -1)):
+            if (1 + self.count_from(x, y, dx, dy) +
+                self.count_from(x, y, -dx, -dy)) >= self.n:
+                return True
+        return False
+
+    # Calculate the game outcome by scanning the whole board.
     #
     # RETURN [int]: 1 for Player 1, 2 for Player 2, and 0 for no winner
-    def get_outcome(self):
-        """Returns the winner of the game: 1 for Player 1, 2 for Player 2, and 0 for no winner"""
+    def scan_outcome(self):
+        """Returns the winner of the game, looking at every cell of the board"""
         for x in range(self.w):
             for y in range(self.h):
                 if (self.board[y][x] != 0) and self.is_any_line_at(x,y):
                     return self.board[y][x]
         return 0
 
+    # Check if a token of player p at (x,y) would complete a line.
+    #
+    # PARAM [int] x: the x coordinate of the cell, assumed empty
+    # PARAM [int] y: the y coordinate of the cell, assumed empty
+    # PARAM [int] p: the player
+    # RETURN [Bool]: True if a token of p at (x,y) makes n in a row
+    def is_winning_cell(self, x, y, p):
+        """Return True if a token of player p at (x,y) would complete a line"""
+        self.board[y][x] = p
+        win = self.is_line_through(x, y)
+        self.board[y][x] = 0
+        return win
+
+    # Get the columns where a player would win by adding a token.
+    #
+    # PARAM [int] p: the player
+    # RETURN [list of int]: the free columns where a token of p makes n in a row
+    def winning_cols(self, p):
+        """Returns the columns where player p would win with its next token"""
+        return [x for x in range(self.w)
+                if (self.heights[x] < self.h) and self.is_winning_cell(x, self.heights[x], p)]
+
+    # Calculate the game outcome.
+    #
+    # The outcome is cached; add_token() keeps it up to date by only looking
+    # at the lines through the token it adds.
+    #
+    # RETURN [int]: 1 for Player 1, 2 for Player 2, and 0 for no winner
+    def get_outcome(self):
+        """Returns the winner of the game: 1 for Player 1, 2 for Player 2, and 0 for no winner"""
+        if self.outcome is None:
+            self.outcome = self.scan_outcome()
+        return self.outcome
+
     # Adds a token for the current player at the given column
     #
     # PARAM [int] x: The column where the token must be added; the column is assumed not full.
@@ -86,22 +215,85 @@ class Board(object):
     def add_token(self, x):
         """Adds a token for the current player at column x; the column is assumed not full"""
         # Find empty slot for token
-        y = 0
-        while self.board[y][x] != 0:
-            y = y + 1
+        y = self.heights[x]
         self.board[y][x] = self.player
+        self.heights[x] = y + 1
+        self.moves.append(x)
+        self.saved.append((self.outcome, self.last_move))
+        self.hash ^= self.zobrist[self.player][x * self.h + y]
+        self.mirror_hash ^= self.zobrist[self.player][(self.w - 1 - x) * self.h + y]
+        self.last_move = (x, y)
+        # Only the lines through the new token can change a 'no winner' outcome
+        if (self.outcome == 0) and self.is_line_through(x, y):
+            self.outcome = self.player
         # Switch player
         if self.player == 1:
             self.player = 2
         else:
             self.player = 1
 
+    # Adds a token for the current player at the given column, so that it
+    # can be taken back with undo().
+    #
+    # PARAM [int] x: The column where the token must be added; the column is assumed not full.
+    #
+    # NOTE: This method switches the current player.
+    def play(self, x):
+        """Adds a token for the current player at column x; undo() takes it back"""
+        self.add_token(x)
+
+    # Takes back the last token added with add_token() or play().
+    #
+    # NOTE: This method switches the current player back.
+    def undo(self):
+        """Removes the last token added and restores the state before it"""
+        x = self.moves.pop()
+        y = self.heights[x] - 1
+        self.board[y][x] = 0
+        self.heights[x] = y
+        (self.outcome, self.last_move) = self.saved.pop()
+        # Switch player back
+        if self.player == 1:
+            self.player = 2
+        else:
+            self.player = 1
+        self.hash ^= self.zobrist[self.player][x * self.h + y]
+        self.mirror_hash ^= self.zobrist[self.player][(self.w - 1 - x) * self.h + y]
+
+    # Check if the moves played give the whole position.
+    #
+    # A board built from rows holding tokens starts with tokens that are not
+    # in moves: two such boards with the same moves can differ, and the
+    # moves alone cannot rebuild them.
+    #
+    # RETURN [Bool]: True if every token on the board was added by a move in
+    #                self.moves
+    def has_full_history(self):
+        """Return True if self.moves holds every token on the board"""
+        return len(self.moves) == sum(self.heights)
+
+    # Get a key shared by the board and its left-right mirror.
+    #
+    # RETURN [int]: the smaller of the hashes of the board and of its mirror
+    def canonical_key(self):
+        """Returns the same hash for this board and its left-right mirror"""
+        return min(self.hash, self.mirror_hash)
+
+    # Check if the board is its own left-right mirror.
+    #
+    # RETURN [Bool]: True if every row reads the same both ways
+    def is_symmetric(self):
+        """Return True if the board is the same as its left-right mirror"""
+        if self.hash != self.mirror_hash:
+            return False
+        return all(row == row[::-1] for row in self.board)
+
     # Returns a list of the columns with at least one free slot.
     #
     # RETURN [list of int]: the columns with at least one free slot
     def free_cols(self):
         """Returns a list of the columns with at least one free slot"""
-        return [x for x in range(self.w) if self.board[-1][x] == 0 ]
+        return [x for x in range(self.w) if self.heights[x] < self.h]
 
     # Prints the current board state.
     def print_it(self):
@@ -119,3 +311,304 @@ class Board(object):
         for i in range(self.w):
             print(i, end='')
         print("")
+
+
+
+#######################
+# Bitboard Game Board #
+#######################
+
+class BitBoard(Board):
+    """Board stored as one bitmask per player plus the column heights"""
+
+    # Class constructor.
+    #
+    # Cell (x,y) is bit x*(h+1)+y of a player's mask. Each column has one
+    # extra bit on top that is never set, so that shifting a mask never wraps
+    # a line from the top of a column into the bottom of the next one.
+    #
+    # PARAM [2D list of int] board: the board configuration, row-major
+    # PARAM [int]            w:     the board width
+    # PARAM [int]            h:     the board height
+    # PARAM [int]            n:     the number of tokens to line up to win
+    def __init__(self, board, w, h, n):
+        """Class constructor"""
+        # Board width
+        self.w = w
+        # Board height
+        self.h = h
+        # How many tokens in a row to win
+        self.n = n
+        # Current player
+        self.player = 1
+        # Token masks, indexed by player (index 0 is unused)
+        self.bits = [0, 0, 0]
+        # Number of tokens in each column
+        self.heights = [0] * w
+        # Shifts to the next cell: vertical, horizontal, and the two diagonals
+        self.shifts = (1, h + 1, h, h + 2)
+        # Mask of the cells of the board
+        self.full = 0
+        for x in range(w):
+            self.full |= ((1 << h) - 1) << (x * (h + 1))
+        # Row-major view of the board, built on demand
+        self._grid = None
+        # Last token added, as (x,y), or None
+        self.last_move = None
+        # Cached game outcome, or None if it must be computed
+        self.outcome = None
+        # Columns played with add_token(), most recent last
+        self.moves = []
+        # (outcome, last_move) before each move in self.moves, for undo()
+        self.saved = []
+        # Zobrist keys and hash of the tokens on the board, and hash of the
+        # tokens of the left-right mirror of the board
+        self.zobrist = zobrist_keys(w, h)
+        self.hash = 0
+        self.mirror_hash = 0
+        for y in range(h):
+            for x in range(w):
+                if board[y][x] != 0:
+                    self.bits[board[y][x]] |= 1 << (x * (h + 1) + y)
+                    self.heights[x] = y + 1
+                    self.hash ^= self.zobrist[board[y][x]][x * h + y]
+                    self.mirror_hash ^= self.zobrist[board[y][x]][(w - 1 - x) * h + y]
+
+    # Row-major view of the board, as in Board.board.
+    #
+    # The view is rebuilt lazily and kept up to date by add_token(); changes
+    # made to it directly are not seen by the bitmasks.
+    #
+    # RETURN [2D list of int]: the board configuration, row-major
+    @property
+    def board(self):
+        """Row-major list of lists view of the board"""
+        if self._grid is None:
+            stride = self.h + 1
+            b1 = self.bits[1]
+            b2 = self.bits[2]
+            grid = [[0] * self.w for i in range(self.h)]
+            for x in range(self.w):
+                for y in range(self.heights[x]):
+                    bit = 1 << (x * stride + y)
+                    if b1 & bit:
+                        grid[y][x] = 1
+                    elif b2 & bit:
+                        grid[y][x] = 2
+            self._grid = grid
+        return self._grid
+
+    # Clone a board.
+    #
+    # RETURN [board.BitBoard]: a copy of this object
+    def copy(self):
+        """Returns a copy of this board that can be independently modified"""
+        cpy = BitBoard.__new__(BitBoard)
+        cpy.w = self.w
+        cpy.h = self.h
+        cpy.n = self.n
+        cpy.player = self.player
+        cpy.bits = self.bits[:]
+        cpy.heights = self.heights[:]
+        cpy.shifts = self.shifts
+        cpy.full = self.full
+        cpy.zobrist = self.zobrist
+        cpy._grid = None
+        cpy.last_move = self.last_move
+        cpy.outcome = self.outcome
+        cpy.moves = self.moves[:]
+        cpy.saved = self.saved[:]
+        cpy.hash = self.hash
+        cpy.mirror_hash = self.mirror_hash
+        return cpy
+
+    # Check if a mask contains n set bits in a row in any direction.
+    #
+    # PARAM [int] mask: the token mask of a player
+    # RETURN [Bool]: True if n tokens in a row have been found, False otherwise
+    def has_line(self, mask):
+        """Return True if the given token mask contains n tokens in a row"""
+        for s in self.shifts:
+            # After each step, bit i of m is set iff 'run' cells starting at
+            # i in direction s are all set
+            m = mask
+            run = 1
+            while run < self.n:
+                step = min(run, self.n - run)
+                m &= m >> (step * s)
+                run += step
+            if m:
+                return True
+        return False
+
+    # Check if a line of the token at (x,y) goes through (x,y) in any direction
+    #
+    # PARAM [int] x:  the x coordinate of the cell
+    # PARAM [int] y:  the y coordinate of the cell
+    # RETURN [Bool]: True if n tokens of the same type have been found, False otherwise
+    def is_line_through(self, x, y):
+        """Return True if a line of identical tokens goes through (x,y) in any direction"""
+        pos = x * (self.h + 1) + y
+        bit = 1 << pos
+        mask = self.bits[1] if self.bits[1] & bit else self.bits[2]
+        return self.has_line_through(mask, pos)
+
+    # Check if a mask has n set bits in a row through a bit, which must be set.
+    #
+    # PARAM [int] mask: the token mask of a player
+    # PARAM [int] pos:  the bit index of the cell
+    # RETURN [Bool]: True if n tokens in a row go through the cell
+    def has_line_through(self, mask, pos):
+        """Return True if mask contains n tokens in a row through bit pos"""
+        for s in self.shifts:
+            count = 1
+            # Walk up the line, then down, from the new token
+            p = pos + s
+            while (count < self.n) and ((mask >> p) & 1):
+                count += 1
+                p += s
+            p = pos - s
+            while (count < self.n) and (p >= 0) and ((mask >> p) & 1):
+                count += 1
+                p -= s
+            if count >= self.n:
+                return True
+        return False
+
+    # Check if a token of player p at (x,y) would complete a line.
+    #
+    # PARAM [int] x: the x coordinate of the cell, assumed empty
+    # PARAM [int] y: the y coordinate of the cell, assumed empty
+    # PARAM [int] p: the player
+    # RETURN [Bool]: True if a token of p at (x,y) makes n in a row
+    def is_winning_cell(self, x, y, p):
+        """Return True if a token of player p at (x,y) would complete a line"""
+        pos = x * (self.h + 1) + y
+        return self.has_line_through(self.bits[p] | (1 << pos), pos)
+
+    # Get the empty cells where a player would complete a line.
+    #
+    # PARAM [int] p: the player
+    # RETURN [int]: the mask of the empty cells, playable or not, where a
+    #               token of p makes n in a row
+    def winning_mask(self, p):
+        """Returns the mask of the empty cells that would complete a line for player p"""
+        mask = self.bits[p]
+        n = self.n
+        win = 0
+        for s in self.shifts:
+            # Bit c of after[k] (before[k]) is set iff the k cells after
+            # (before) c in direction s are all set; -1 has every bit set
+            after = [-1]
+            before = [-1]
+            (a, b) = (-1, -1)
+            for k in range(1, n):
+                a &= mask >> (k * s)
+                b &= mask << (k * s)
+                after.append(a)
+                before.append(b)
+            for k in range(n):
+                win |= after[k] & before[n - 1 - k]
+        return win & (self.full ^ (self.bits[1] | self.bits[2]))
+
+    # Get the columns where a player would win by adding a token.
+    #
+    # PARAM [int] p: the player
+    # RETURN [list of int]: the free columns where a token of p makes n in a row
+    def winning_cols(self, p):
+        """Returns the columns where player p would win with its next token"""
+        win = self.winning_mask(p)
+        if win == 0:
+            return []
+        stride = self.h + 1
+        return [x for x in range(self.w)
+                if (self.heights[x] < self.h) and ((win >> (x * stride + self.heights[x])) & 1)]
+
+    # Calculate the game outcome by looking for lines in both token masks.
+    #
+    # RETURN [int]: 1 for Player 1, 2 for Player 2, and 0 for no winner
+    def scan_outcome(self):
+        """Returns the winner of the game, looking at both token masks"""
+        if self.has_line(self.bits[1]):
+            return 1
+        if self.has_line(self.bits[2]):
+            return 2
+        return 0
+
+    # Adds a token for the current player at the given column
+    #
+    # PARAM [int] x: The column where the token must be added; the column is assumed not full.
+    #
+    # NOTE: This method switches the current player.
+    def add_token(self, x):
+        """Adds a token for the current player at column x; the column is assumed not full"""
+        y = self.heights[x]
+        self.bits[self.player] |= 1 << (x * (self.h + 1) + y)
+        self.heights[x] = y + 1
+        if self._grid is not None:
+            self._grid[y][x] = self.player
+        self.moves.append(x)
+        self.saved.append((self.outcome, self.last_move))
+        self.hash ^= self.zobrist[self.player][x * self.h + y]
+        self.mirror_hash ^= self.zobrist[self.player][(self.w - 1 - x) * self.h + y]
+        self.last_move = (x, y)
+        # Only the new token can complete a line when there was no winner
+        if (self.outcome == 0) and self.is_line_through(x, y):
+            self.outcome = self.player
+        # Switch player
+        if self.player == 1:
+            self.player = 2
+        else:
+            self.player = 1
+
+    # Takes back the last token added with add_token() or play().
+    #
+    # NOTE: This method switches the current player back.
+    def undo(self):
+        """Removes the last token added and restores the state before it"""
+        x = self.moves.pop()
+        y = self.heights[x] - 1
+        # Switch player back
+        if self.player == 1:
+            self.player = 2
+        else:
+            self.player = 1
+        self.bits[self.player] &= ~(1 << (x * (self.h + 1) + y))
+        self.hash ^= self.zobrist[self.player][x * self.h + y]
+        self.mirror_hash ^= self.zobrist[self.player][(self.w - 1 - x) * self.h + y]
+        self.heights[x] = y
+        if self._grid is not None:
+            self._grid[y][x] = 0
+        (self.outcome, self.last_move) = self.saved.pop()
+
+
+
+########################
+# Board implementation #
+########################
+
+# The available Board implementations
+IMPLEMENTATIONS = {
+    "list":     Board,
+    "bitboard": BitBoard,
+}
+
+# The implementation used by new_board() when none is given.
+# It can be picked with the CONNECTN_BOARD environment variable, so that the
+# tournament scripts (and the run_match.py processes they start) use it as-is.
+IMPLEMENTATION = os.environ.get("CONNECTN_BOARD", "list")
+
+# Make an empty board.
+#
+# PARAM [int]    w:    the board width
+# PARAM [int]    h:    the board height
+# PARAM [int]    n:    the number of tokens to line up to win
+# PARAM [string] impl: the implementation name, IMPLEMENTATION if None
+# RETURN [board.Board]: the empty board
+def new_board(w, h, n, impl=None):
+    """Returns an empty board using the given (or the default) implementation"""
+    if impl is None:
+        impl = IMPLEMENTATION
+    if impl not in IMPLEMENTATIONS:
+        raise ValueError("Unknown board implementation: {}".format(impl))
+    return IMPLEMENTATIONS[impl]([[0] * w for i in range(h)], w, h, n)
@@ -0,0 +1,116 @@
+import mmap
+import struct
+
+################
+# Opening book #
+################
+
+# File layout: a header, then fixed-size records sorted by key.
+#  - header: magic, board width, height, tokens to win, a limit whose
+#            meaning depends on the file (the plies covered by an opening
+#            book), record count
+#  - record: canonical position key (Board.canonical_key()), the move for
+#            the position whose hash is the key, and a signed byte of data
+#            whose meaning depends on the file (the search depth of the
+#            move in an opening book)
+MAGIC = b"CNBK"
+HEADER = struct.Struct("<4sBBBBQ")
+RECORD = struct.Struct("<QBb")
+
+# Write a book file.
+#
+# PARAM [string] path:    the file to write
+# PARAM [int]    w:       the board width
+# PARAM [int]    h:       the board height
+# PARAM [int]    n:       the number of tokens to line up to win
+# PARAM [int]    limit:   the limit stored in the header
+# PARAM [dict]   entries: key -> (move, data), with the move for the position
+#                         whose hash is the key
+# PARAM [bytes]  magic:   the magic of the file type
+def write_book(path, w, h, n, limit, entries, magic=MAGIC):
+    """Writes the entries to path as a sorted book file"""
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(magic, w, h, n, limit, len(entries)))
+        for key in sorted(entries):
+            (move, data) = entries[key]
+            f.write(RECORD.pack(key, move, data))
+
+class OpeningBook(object):
+    """Sorted book file of moves, read through mmap with binary search"""
+
+    # Magic of the files this class reads
+    MAGIC = MAGIC
+
+    # Class constructor.
+    #
+    # The file is mapped read-only, so processes that open the same book
+    # share it through the page cache, and nothing is read up front.
+    #
+    # PARAM [string] path: the book file
+    def __init__(self, path):
+        """Class constructor"""
+        self.path = path
+        with open(path, "rb") as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, self.w, self.h, self.n, self.limit, self.count) = HEADER.unpack_from(self.data, 0)
+        if magic != self.MAGIC:
+            raise ValueError("Wrong file type: {}".format(path))
+        if HEADER.size + self.count * RECORD.size > len(self.data):
+            raise ValueError("Truncated book file: {}".format(path))
+
+    # Look up a key.
+    #
+    # PARAM [int] key: a canonical position key
+    # RETURN [(int, int)]: the (move, data) stored for key, or None
+    def lookup(self, key):
+        """Returns the (move, data) record stored for key, or None"""
+        (lo, hi) = (0, self.count)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            (k, move, data) = RECORD.unpack_from(self.data, HEADER.size + mid * RECORD.size)
+            if k < key:
+                lo = mid + 1
+            elif k > key:
+                hi = mid
+            else:
+                return (move, data)
+        return None
+
+    # Look up a board.
+    #
+    # A position and its mirror share their record. The move is mirrored
+    # for the mirror, which is the same move in game terms, although the
+    # agent's heuristic may not score the two alike.
+    #
+    # PARAM [board.Board] brd: the board state
+    # RETURN [(int, int)]: the (move, data) stored for brd, with the move
+    #                      mirrored back if the key is that of the mirror of
+    #                      brd, or None if brd is not in the book
+    def probe(self, brd):
+        """Returns the (move, data) record for brd, or None"""
+        if (brd.w, brd.h, brd.n) != (self.w, self.h, self.n):
+            return None
+        key = brd.canonical_key()
+        e = self.lookup(key)
+        if e is None:
+            return None
+        (move, data) = e
+        if key != brd.hash:
+            move = brd.w - 1 - move
+        return (move, data)
+
+    # Get the book move for a board.
+    #
+    # PARAM [board.Board] brd: the board state
+    # RETURN [int]: the book column for brd, or None
+    def move(self, brd):
+        """Returns the book column for brd, or None"""
+        e = self.probe(brd)
+        if e is None:
+            return None
+        return e[0]
+
+    # Unmap the file.
+    def close(self):
+        """Releases the mapping"""
+        self.data.close()
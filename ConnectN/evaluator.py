@@ -0,0 +1,364 @@
+#######################
+# Heuristic evaluator #
+#######################
+
+class HeuristicEvaluator(object):
+    """AlphaBetaAgent.heuristic() kept up to date move by move"""
+
+    # Class constructor.
+    #
+    # heuristic() scores each token by the first non-zero line in the four
+    # directions starting from it, which only looks at the n-1 cells after
+    # the token and at the cells right above them. A move at (x,y) can thus
+    # only change the scores of its own token and of the tokens whose lines
+    # go through (x,y) or the cell below it; play()/undo() rescore those
+    # tokens only. The scores are summed in the order of heuristic(), so
+    # score() returns exactly what heuristic() does.
+    #
+    # PARAM [int]   w: the board width
+    # PARAM [int]   h: the board height
+    # PARAM [int]   n: the number of tokens to line up to win
+    # PARAM [float] weight_self_potential:  see AlphaBetaAgent
+    # PARAM [float] weight_enemy_potential: see AlphaBetaAgent
+    # PARAM [float] weight_in_a_row:        see AlphaBetaAgent
+    # PARAM [float] multiplier_growth_rate: see AlphaBetaAgent
+    # PARAM [float] weight_token_height:    see AlphaBetaAgent
+    def __init__(self, w, h, n, weight_self_potential, weight_enemy_potential, weight_in_a_row, multiplier_growth_rate, weight_token_height):
+        """Class constructor"""
+        self.w = w
+        self.h = h
+        self.n = n
+        self.weight_self_potential = weight_self_potential
+        self.weight_enemy_potential = weight_enemy_potential
+        self.weight_in_a_row = weight_in_a_row
+        self.weight_token_height = weight_token_height
+        # factor[k] for k tokens in a line after the first one, computed
+        # with the same operations as AlphaBetaAgent.potential_line_at()
+        self.factor = [1]
+        for k in range(1, n):
+            self.factor.append(multiplier_growth_rate * (self.factor[-1] + 1))
+        # The lines starting at each cell, in the order heuristic() tries
+        # them: None if the line leaves the board, else the (cell, cell
+        # above or -1) of its n-1 cells after the first; cell (x,y) is x*h+y
+        self.lines = []
+        for x in range(w):
+            for y in range(h):
+                lines = []
+                for (dx, dy) in ((1, 0), (0, 1), (1, 1), (1, -1)):
+                    ex = x + (n-1) * dx
+                    ey = y + (n-1) * dy
+                    if (ex >= w) or (ey < 0) or (ey >= h):
+                        lines.append(None)
+                        continue
+                    line = []
+                    for i in range(1, n):
+                        (cx, cy) = (x + i*dx, y + i*dy)
+                        above = -1
+                        if cy + 1 < h:
+                            above = cx * h + cy + 1
+                        line.append((cx * h + cy, above))
+                    lines.append(line)
+                self.lines.append(lines)
+        # The tokens to rescore after a move at each cell: its own, and
+        # those whose lines go through it or the cell below it
+        self.move_starts = []
+        for c in range(w * h):
+            changed = {c}
+            if c % h != 0:
+                changed.add(c - 1)
+            starts = {c}
+            for (s, lines) in enumerate(self.lines):
+                for line in lines:
+                    if (line is not None) and any(cell in changed for (cell, above) in line):
+                        starts.add(s)
+            self.move_starts.append(sorted(starts))
+        self.clear()
+
+    # Reset to an empty board.
+    def clear(self):
+        """Resets the scores to those of an empty board"""
+        # Owner of each cell, 0 if empty
+        self.cells = [0] * (self.w * self.h)
+        # Score of the token of each player at each cell, 0 if none (index 0
+        # is unused)
+        self.scores = [None] + [[0] * (self.w * self.h) for p in range(2)]
+
+    # Set the scores from a board.
+    #
+    # PARAM [board.Board] brd: the board state
+    def reset(self, brd):
+        """Recomputes all the scores for the given board"""
+        self.clear()
+        for x in range(brd.w):
+            for y in range(brd.h):
+                if brd.board[y][x] == 0:
+                    break
+                self.play(x, y, brd.board[y][x])
+
+    # Score a token, as AlphaBetaAgent.any_potential_line_at() does.
+    #
+    # PARAM [int] s: the cell of the token
+    # PARAM [int] p: the player of the token
+    # RETURN [float]: the score of the token
+    def token_score(self, s, p):
+        """Returns the score of the token of player p at cell s"""
+        cells = self.cells
+        factor = self.factor
+        v = 0
+        for line in self.lines[s]:
+            v = 0
+            if line is not None:
+                k = 0
+                token_height = 0
+                for (cell, above) in line:
+                    o = cells[cell]
+                    if o == p:
+                        if (above >= 0) and (cells[above] == 0):
+                            token_height += 1
+                        k += 1
+                    elif o != 0:
+                        break
+                else:
+                    v = self.weight_in_a_row * factor[k] - self.weight_token_height * token_height
+            if v:
+                return v
+        return v
+
+    # Update the scores for a token added.
+    #
+    # PARAM [int] x: the column of the token
+    # PARAM [int] y: the row of the token
+    # PARAM [int] p: the player of the token
+    def play(self, x, y, p):
+        """Updates the scores for a token of player p added at (x,y)"""
+        self.cells[x * self.h + y] = p
+        self.rescore(x * self.h + y)
+
+    # Update the scores for a token taken back.
+    #
+    # PARAM [int] x: the column of the token
+    # PARAM [int] y: the row of the token
+    def undo(self, x, y):
+        """Updates the scores for the token at (x,y) being removed"""
+        self.cells[x * self.h + y] = 0
+        self.rescore(x * self.h + y)
+
+    # Rescore the tokens a move at a cell can change.
+    #
+    # PARAM [int] c: the cell of the move
+    def rescore(self, c):
+        """Rescores the tokens affected by a move at cell c"""
+        cells = self.cells
+        (s1, s2) = (self.scores[1], self.scores[2])
+        for s in self.move_starts[c]:
+            o = cells[s]
+            if o == 1:
+                s1[s] = self.token_score(s, 1)
+            elif o == 2:
+                s2[s] = self.token_score(s, 2)
+            else:
+                s1[s] = 0
+                s2[s] = 0
+
+    # Get the heuristic score of the board for a player.
+    #
+    # PARAM [int] player: the player the score is for
+    # RETURN [float]: the heuristic score
+    def score(self, player):
+        """Returns the heuristic score of the board from player's point of view"""
+        # Sum the token scores in the order of heuristic(), so that float
+        # weights round the same way
+        own = 0
+        for v in self.scores[player]:
+            own += v
+        enemy = 0
+        for v in self.scores[3 - player]:
+            enemy += v
+        return self.weight_self_potential * own - self.weight_enemy_potential * enemy
+
+
+####################
+# Window evaluator #
+####################
+
+class WindowEvaluator(object):
+    """Window-count evaluation kept up to date move by move"""
+
+    # Class constructor.
+    #
+    # A window is a line of n cells in which a player could still line up n
+    # tokens. The score of a player in a window that holds c > 0 of its
+    # tokens and none of the opponent's is
+    #
+    #   weight_in_a_row * factor(c) - weight_token_height * e
+    #
+    # where factor(1) = 1, factor(c+1) = multiplier_growth_rate * (factor(c) + 1)
+    # and e is the number of the player's tokens in the window with an empty
+    # cell right above them. The heuristic of a player is
+    #
+    #   weight_self_potential * (its score) - weight_enemy_potential * (opponent's score)
+    #
+    # This is a different evaluation from AlphaBetaAgent.heuristic(), which
+    # scores each token by the first line starting from it: it uses the same
+    # five weights in the same roles, but over every window, so its scores
+    # differ from heuristic()'s for the same weights. Unlike them, they are
+    # the same for a position and its mirror. HeuristicEvaluator computes
+    # heuristic() itself incrementally.
+    #
+    # PARAM [int]   w: the board width
+    # PARAM [int]   h: the board height
+    # PARAM [int]   n: the number of tokens to line up to win
+    # PARAM [float] weight_self_potential:  see AlphaBetaAgent
+    # PARAM [float] weight_enemy_potential: see AlphaBetaAgent
+    # PARAM [float] weight_in_a_row:        see AlphaBetaAgent
+    # PARAM [float] multiplier_growth_rate: see AlphaBetaAgent
+    # PARAM [float] weight_token_height:    see AlphaBetaAgent
+    def __init__(self, w, h, n, weight_self_potential, weight_enemy_potential, weight_in_a_row, multiplier_growth_rate, weight_token_height):
+        """Class constructor"""
+        self.w = w
+        self.h = h
+        self.n = n
+        self.weight_self_potential = weight_self_potential
+        self.weight_enemy_potential = weight_enemy_potential
+        self.weight_in_a_row = weight_in_a_row
+        self.weight_token_height = weight_token_height
+        # factor[c] for c tokens in a window
+        self.factor = [0, 1]
+        for c in range(2, n + 1):
+            self.factor.append(multiplier_growth_rate * (self.factor[-1] + 1))
+        # Windows, as lists of cells; cell (x,y) is x*h+y
+        self.windows = []
+        for x in range(w):
+            for y in range(h):
+                for (dx, dy) in ((1, 0), (0, 1), (1, 1), (1, -1)):
+                    ex = x + (n-1) * dx
+                    ey = y + (n-1) * dy
+                    if (ex < w) and (ey >= 0) and (ey < h):
+                        self.windows.append([(x + i*dx) * h + (y + i*dy) for i in range(n)])
+        # The windows through each cell
+        self.cell_windows = [[] for c in range(w * h)]
+        for (i, win) in enumerate(self.windows):
+            for c in win:
+                self.cell_windows[c].append(i)
+        # The windows through each cell or the cell below it
+        self.move_windows = []
+        for c in range(w * h):
+            if c % h == 0:
+                self.move_windows.append(self.cell_windows[c])
+            else:
+                self.move_windows.append(sorted(set(self.cell_windows[c] + self.cell_windows[c - 1])))
+        self.clear()
+
+    # Reset to an empty board.
+    def clear(self):
+        """Resets the counts to those of an empty board"""
+        # Owner of each cell, 0 if empty
+        self.cells = [0] * (self.w * self.h)
+        # Tokens of each player in each window (index 0 is unused)
+        self.counts = [None] + [[0] * len(self.windows) for p in range(2)]
+        # Tokens of each player with an empty cell above, in each window
+        self.exposed = [None] + [[0] * len(self.windows) for p in range(2)]
+        # Sum of the window scores of each player
+        self.totals = [None, 0, 0]
+
+    # Set the counts from a board.
+    #
+    # PARAM [board.Board] brd: the board state
+    def reset(self, brd):
+        """Recomputes all the counts for the given board"""
+        self.clear()
+        for x in range(brd.w):
+            for y in range(brd.h):
+                if brd.board[y][x] == 0:
+                    break
+                self.play(x, y, brd.board[y][x])
+
+    # Get the score of a player in a window.
+    #
+    # PARAM [int] p: the player
+    # PARAM [int] i: the window index
+    # RETURN [float]: the score of p in window i
+    def window_score(self, p, i):
+        """Returns the score of player p in window i"""
+        c = self.counts[p][i]
+        if (c == 0) or (self.counts[3 - p][i] != 0):
+            return 0
+        return self.weight_in_a_row * self.factor[c] - self.weight_token_height * self.exposed[p][i]
+
+    # Update the counts for a token added.
+    #
+    # PARAM [int] x: the column of the token
+    # PARAM [int] y: the row of the token
+    # PARAM [int] p: the player of the token
+    def play(self, x, y, p):
+        """Updates the counts for a token of player p added at (x,y)"""
+        self.update(x, y, p, 1)
+
+    # Update the counts for a token taken back.
+    #
+    # PARAM [int] x: the column of the token
+    # PARAM [int] y: the row of the token
+    def undo(self, x, y):
+        """Updates the counts for the token at (x,y) being removed"""
+        self.update(x, y, self.cells[x * self.h + y], -1)
+
+    # Add (d=1) or remove (d=-1) a token and update the scores of the
+    # windows it changes: those through its cell, and those through the cell
+    # below, whose token stops (or starts) having an empty cell above.
+    #
+    # PARAM [int] x: the column of the token
+    # PARAM [int] y: the row of the token
+    # PARAM [int] p: the player of the token
+    # PARAM [int] d: 1 to add the token, -1 to remove it
+    def update(self, x, y, p, d):
+        """Adds (d=1) or removes (d=-1) a token of player p at (x,y)"""
+        c = x * self.h + y
+        affected = self.move_windows[c]
+        factor = self.factor
+        wr = self.weight_in_a_row
+        wt = self.weight_token_height
+        (c1, c2) = (self.counts[1], self.counts[2])
+        (e1, e2) = (self.exposed[1], self.exposed[2])
+        # Take out the old scores of the affected windows...
+        t1 = self.totals[1]
+        t2 = self.totals[2]
+        for i in affected:
+            if c2[i] == 0:
+                if c1[i] != 0:
+                    t1 -= wr * factor[c1[i]] - wt * e1[i]
+            elif c1[i] == 0:
+                t2 -= wr * factor[c2[i]] - wt * e2[i]
+        # ...update their counts...
+        counts = self.counts[p]
+        for i in self.cell_windows[c]:
+            counts[i] += d
+        if y + 1 < self.h:
+            exposed = self.exposed[p]
+            for i in self.cell_windows[c]:
+                exposed[i] += d
+        if y > 0:
+            exposed = self.exposed[self.cells[c - 1]]
+            for i in self.cell_windows[c - 1]:
+                exposed[i] -= d
+        if d > 0:
+            self.cells[c] = p
+        else:
+            self.cells[c] = 0
+        # ...and put their new scores back in
+        for i in affected:
+            if c2[i] == 0:
+                if c1[i] != 0:
+                    t1 += wr * factor[c1[i]] - wt * e1[i]
+            elif c1[i] == 0:
+                t2 += wr * factor[c2[i]] - wt * e2[i]
+        self.totals[1] = t1
+        self.totals[2] = t2
+
+    # Get the heuristic score of the board for a player.
+    #
+    # PARAM [int] player: the player the score is for
+    # RETURN [float]: the heuristic score
+    def score(self, player):
+        """Returns the heuristic score of the board from player's point of view"""
+        return (self.weight_self_potential * self.totals[player] -
+                self.weight_enemy_potential * self.totals[3 - player])
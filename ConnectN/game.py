@@ -17,14 +17,63 @@ class Game(object):
     # PARAM [int]         n:  the number of tokens to line up to win
     # PARAM [agent.Agent] p1: the agent for Player 1
     # PARAM [agent.Agent] p2: the agent for Player 2
-    def __init__(self, w, h, n, p1, p2):
+    # PARAM [string]      board_impl: the board implementation ("list" or
+    #                                 "bitboard"), board.IMPLEMENTATION if None
+    def __init__(self, w, h, n, p1, p2, board_impl=None):
         """Class constructor"""
         # Create board
-        self.board = board.Board([[0] * w for i in range(h)], w, h, n)
+        self.board = board.new_board(w, h, n, board_impl)
         # Players
         self.players = [ p1, p2 ]
         p1.player = 1
         p2.player = 2
+        # A pondering agent searches between its moves, and would take time
+        # from an opponent searching in the same process
+        for (p, q) in ((p1, p2), (p2, p1)):
+            if p.ponders and q.in_process:
+                raise ValueError("{} ponders: its opponent must run in another process, e.g. in a player_host.HostedAgent".format(p.name))
+        # Timing of each move: (player, column, wall time, CPU time), with
+        # the times in seconds
+        self.move_times = []
+
+    # Ask a player for a move.
+    #
+    # The wall time is measured with time.perf_counter() and the CPU time
+    # with time.process_time(), so the CPU time covers the whole process.
+    #
+    # PARAM  [int]   p:     the index of the player (0 or 1)
+    # PARAM  [float] limit: the time limit for the move in seconds, or None
+    # RETURN [(int, float)]: the column picked and the wall time taken
+    def ask(self, p, limit):
+        """Asks player p for a move; returns (column, wall time)"""
+        # Copy board so player can't modify it
+        brd = self.board.copy()
+        last_move = None
+        if brd.moves:
+            last_move = brd.moves[-1]
+        st = time.perf_counter()
+        ct = time.process_time()
+        if self.players[p].takes_context:
+            deadline = None
+            if limit is not None:
+                deadline = st + limit
+            ctx = agent.MoveContext(deadline, limit, len(brd.moves), last_move)
+            x = self.players[p].go(brd, ctx)
+        else:
+            x = self.players[p].go(brd)
+        et = time.perf_counter() - st
+        self.move_times.append((p + 1, x, et, time.process_time() - ct))
+        return (x, et)
+
+    # Tell both players that the game is over.
+    #
+    # PARAM  [int] outcome: the game outcome
+    # RETURN [int]: the game outcome
+    def end(self, outcome):
+        """Calls end_game() on both players; returns outcome"""
+        for p in self.players:
+            p.end_game()
+        return outcome
 
     # Execute the game.
     #
@@ -35,8 +84,7 @@ class Game(object):
         p = 0
         while self.board.free_cols() and self.board.get_outcome() == 0:
             # self.board.print_it()
-            # Copy board so player can't modify it
-            x = self.players[p].go(self.board.copy())
+            (x, et) = self.ask(p, None)
             # print(self.players[p].name, "move:", x)
             if not x in self.board.free_cols():
                 print("Illegal move")
@@ -44,7 +92,7 @@ class Game(object):
                 if p == 0:
                     outcome = 2
                 # print(self.players[outcome-1].name, "won!")
-                return outcome
+                return self.end(outcome)
             # Legal move, add token there
             self.board.add_token(x)
             # Switch player
@@ -62,7 +110,7 @@ class Game(object):
         else:
             # print(self.players[outcome-1].name, "won!")
             pass
-        return outcome
+        return self.end(outcome)
 
     # Execute a timed game.
     #
@@ -77,19 +125,15 @@ class Game(object):
         p = 0
         while self.board.free_cols() and self.board.get_outcome() == 0:
             # self.board.print_it()
-            # Get start time
-            st = time.time()
-            # Make move and copy board so player can't modify it
-            x = self.players[p].go(self.board.copy())
+            # Make move and get elapsed time
+            (x, et) = self.ask(p, limit)
             # print(self.players[p].name, "move:", x)
-            # Get elapsed time
-            et = time.time() - st
             # Is the move legal and within the time limit?
             if (not x in self.board.free_cols()) or (et > limit):
                 outcome = 1
                 if p == 0:
                     outcome = 2
-                return outcome
+                return self.end(outcome)
             # Legal move, add token there
             self.board.add_token(x)
             # Switch player
@@ -99,7 +143,7 @@ class Game(object):
                 p = 0
         # Return game outcome
         # self.board.print_it()
-        return self.board.get_outcome()
+        return self.end(self.board.get_outcome())
 
     # Execute a timed game.
     #
@@ -117,19 +161,15 @@ class Game(object):
             # Current player
             p = 0
             while self.board.free_cols() and self.board.get_outcome() == 0:
-                # Get start time
-                st = time.time()
-                # Make move and copy board so player can't modify it
-                x = self.players[p].go(self.board.copy())
-                # Get elapsed time
-                et = time.time() - st
+                # Make move and get elapsed time
+                (x, et) = self.ask(p, limit)
                 # Is the move legal and within the time limit?
                 if (not x in self.board.free_cols()) or (et > limit):
                     # Illegal/out of time, nothing to log, end of game
                     outcome = 1
                     if p == 0:
                         outcome = 2
-                    return outcome
+                    return self.end(outcome)
                 # Legal move, add token there
                 self.board.add_token(x)
                 # Log move
@@ -145,4 +185,4 @@ class Game(object):
             else:
                 log.write("{} wins\n".format(self.players[self.board.get_outcome()-1].name))
         # Return game outcome
-        return self.board.get_outcome()
+        return self.end(self.board.get_outcome())
@@ -0,0 +1,110 @@
+import multiprocessing
+import transposition
+
+############
+# Lazy SMP #
+############
+
+# Run a helper process: wait for search commands and search each root with
+# iterative deepening, until told to stop, then report the nodes visited.
+# The results only reach the main search through the shared table.
+#
+# PARAM [multiprocessing.Connection]      conn:  the command pipe
+# PARAM [alpha_beta_agent.AlphaBetaAgent] agent: the agent to search with
+# PARAM [tuple]                           table: (size_mb, policy, name) of
+#                                                the shared table
+# PARAM [multiprocessing.RawValue]        stop:  set to 1 to stop the search
+# PARAM [int]                             index: the helper number, from 1
+def helper_main(conn, agent, table, stop, index):
+    """Searches the roots sent on conn with the shared table"""
+    (size_mb, policy, name) = table
+    agent.tt = transposition.SharedTranspositionTable(size_mb, policy, name)
+    agent.stop = stop
+    agent.smp = None
+    # Odd helpers start one depth ahead, and every helper skips every other
+    # depth, so that they spread over the depths the main search is about
+    # to reach
+    first = 1 + index % 2
+    try:
+        while True:
+            command = conn.recv()
+            if command is None:
+                break
+            (brd, player, deadline) = command
+            agent.player = player
+            # The main search clears the table when it changes sides
+            agent.tt_player = player
+            agent.iterative_deepening(brd, deadline, first, 2)
+            conn.send(agent.nodes)
+    finally:
+        agent.tt.close()
+        conn.close()
+
+class LazySMP(object):
+    """Helper processes that search the same root, sharing one table"""
+
+    # Class constructor.
+    #
+    # The agent's table is replaced by the shared one.
+    #
+    # PARAM [alpha_beta_agent.AlphaBetaAgent] agent:   the agent to copy into
+    #                                                  each helper
+    # PARAM [int]                             helpers: the number of helper
+    #                                                  processes
+    # PARAM [float]                           size_mb: the table size in MB
+    # PARAM [string]                          policy:  the table replacement
+    #                                                  policy
+    def __init__(self, agent, helpers, size_mb, policy):
+        """Class constructor"""
+        self.tt = transposition.SharedTranspositionTable(size_mb, policy)
+        agent.tt = self.tt
+        self.stop = multiprocessing.RawValue('b', 0)
+        self.conns = []
+        self.procs = []
+        for i in range(1, helpers + 1):
+            (mine, theirs) = multiprocessing.Pipe()
+            p = multiprocessing.Process(target=helper_main,
+                                        args=(theirs, agent, (size_mb, policy, self.tt.name), self.stop, i),
+                                        daemon=True)
+            p.start()
+            theirs.close()
+            self.conns.append(mine)
+            self.procs.append(p)
+
+    # Start the helpers on a root.
+    #
+    # PARAM [board.Board] brd:      the board state
+    # PARAM [int]         player:   the player the scores are for
+    # PARAM [float]       deadline: the time.perf_counter() value by which
+    #                               the search must be over, or None
+    def start(self, brd, player, deadline):
+        """Sends the root to search to every helper"""
+        self.stop.value = 0
+        for conn in self.conns:
+            conn.send((brd, player, deadline))
+
+    # Stop the helpers and wait for them.
+    #
+    # RETURN [int]: the nodes visited by the helpers
+    def finish(self):
+        """Stops the helpers and returns the nodes they visited"""
+        self.stop.value = 1
+        nodes = 0
+        for conn in self.conns:
+            nodes += conn.recv()
+        return nodes
+
+    # Stop the helper processes and free the table.
+    def close(self):
+        """Terminates the helper processes"""
+        for conn in self.conns:
+            try:
+                conn.send(None)
+            except OSError:
+                pass
+            conn.close()
+        for p in self.procs:
+            p.join(1)
+            if p.is_alive():
+                p.terminate()
+        self.tt.close()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+
+import sys
+import time
+import board
+import book
+import alpha_beta_agent as aba
+
+#
+# Build an opening book: the move AlphaBetaAgent picks in every position
+# reachable in less than a given number of plies
+#
+# Usage: make_book.py <file> <board width> <board height> <tokens to win> <plies> <depth>
+#
+
+if len(sys.argv) != 7:
+    print("Usage:\n  {} <file> <board width> <board height> <tokens to win> <plies> <depth>".format(sys.argv[0]))
+    sys.exit(1)
+
+FILE_PATH    = sys.argv[1]
+BOARD_WIDTH  = int(sys.argv[2])
+BOARD_HEIGHT = int(sys.argv[3])
+TOKENS       = int(sys.argv[4])
+PLIES        = int(sys.argv[5])
+DEPTH        = int(sys.argv[6])
+
+# The search used for the book: the agent's own, in place with a table
+ab = aba.AlphaBetaAgent("book", DEPTH, inplace=True, tt_size_mb=64)
+
+# Get the orientation of a position whose hash is its canonical key.
+#
+# PARAM [board.BitBoard] brd: the board state
+# RETURN [board.BitBoard]: brd or its left-right mirror
+def canonical(brd):
+    """Returns brd, or its mirror if the mirror has the canonical key"""
+    if brd.hash == brd.canonical_key():
+        return brd
+    mirror = board.BitBoard([row[::-1] for row in brd.board], brd.w, brd.h, brd.n)
+    mirror.player = brd.player
+    return mirror
+
+# Positions of the current ply, by canonical key, in the orientation whose
+# hash is the key; a position and its mirror are searched once
+positions = {0: board.new_board(BOARD_WIDTH, BOARD_HEIGHT, TOKENS, "bitboard")}
+entries = {}
+st = time.perf_counter()
+for ply in range(PLIES):
+    following = {}
+    for (key, brd) in positions.items():
+        # Search every position afresh, for the same result as in a game
+        ab.player = brd.player
+        ab.tt.clear()
+        x = ab.go(brd.copy())
+        entries[key] = (x, DEPTH)
+        if ply + 1 < PLIES:
+            for col in brd.free_cols():
+                nb = brd.copy()
+                nb.add_token(col)
+                if nb.get_outcome() == 0:
+                    following.setdefault(nb.canonical_key(), canonical(nb))
+    print("ply {}: {} positions, {:.1f}s".format(ply, len(positions), time.perf_counter() - st))
+    positions = following
+
+book.write_book(FILE_PATH, BOARD_WIDTH, BOARD_HEIGHT, TOKENS, PLIES, entries)
+print("{}: {} positions, {} bytes".format(FILE_PATH, len(entries),
+                                          book.HEADER.size + len(entries) * book.RECORD.size))
@@ -14,6 +14,7 @@ for d in Path("unzipped").iterdir():
     players.append("    \"{0}\" : {0},".format(pname))
 
 # Print the file
+print("import copy")
 for i in imports:
     print(i)
 
@@ -21,3 +22,11 @@ print("PLAYERS = {")
 for p in players:
     print(p)
 print("}")
+
+# Factory of fresh agents, for the processes that play many matches
+print()
+print("# Make a fresh agent of a player: a copy of its agent in PLAYERS, which never")
+print("# plays itself. The submissions' modules are only run once, so what they keep")
+print("# at module level is shared by all the copies made in a process.")
+print("def make_player(name):")
+print("    return copy.deepcopy(PLAYERS[name])")
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+
+import os
+import random
+import sys
+import time
+import board
+import book
+import tablebase
+
+#
+# Build an endgame tablebase: solve every position with at most a given
+# number of empty cells reachable from the positions where random games
+# reach that many empty cells (enumerating all of them is out of reach on
+# the usual board sizes). In these games, neither player completes a line
+# while it can avoid it, so that they get to near-full boards.
+#
+# Usage: make_tablebase.py <file> <board width> <board height> <tokens to win> <empty cells> <games> [seed]
+#
+
+if not len(sys.argv) in [7,8]:
+    print("Usage:\n  {} <file> <board width> <board height> <tokens to win> <empty cells> <games> [seed]".format(sys.argv[0]))
+    sys.exit(1)
+
+FILE_PATH    = sys.argv[1]
+BOARD_WIDTH  = int(sys.argv[2])
+BOARD_HEIGHT = int(sys.argv[3])
+TOKENS       = int(sys.argv[4])
+EMPTY        = int(sys.argv[5])
+GAMES        = int(sys.argv[6])
+SEED         = 1
+if len(sys.argv) == 8:
+    SEED = int(sys.argv[7])
+
+# Set random seed for reproducibility
+random.seed(SEED)
+
+entries = {}
+roots = []
+st = time.perf_counter()
+for g in range(GAMES):
+    # Play at random until the board is full enough
+    brd = board.new_board(BOARD_WIDTH, BOARD_HEIGHT, TOKENS, "bitboard")
+    empty = BOARD_WIDTH * BOARD_HEIGHT
+    while (empty > EMPTY) and (brd.get_outcome() == 0):
+        cols = brd.free_cols()
+        wins = brd.winning_cols(brd.player)
+        quiet = [x for x in cols if x not in wins]
+        if quiet:
+            cols = quiet
+        brd.play(random.choice(cols))
+        empty -= 1
+    if brd.get_outcome() == 0:
+        tablebase.solve(brd, entries)
+        roots.append(brd)
+build_time = time.perf_counter() - st
+
+book.write_book(FILE_PATH, BOARD_WIDTH, BOARD_HEIGHT, TOKENS, EMPTY, entries, tablebase.MAGIC)
+print("{}: {} positions from {} games, built in {:.1f}s, {} bytes".format(
+    FILE_PATH, len(entries), len(roots), build_time, os.path.getsize(FILE_PATH)))
+
+# Probe latency, on the positions the games reached
+tb = tablebase.Tablebase(FILE_PATH)
+if roots:
+    probes = 0
+    st = time.perf_counter()
+    while probes < 100000:
+        for brd in roots:
+            tb.probe(brd)
+        probes += len(roots)
+    print("probe: {:.2f}us".format((time.perf_counter() - st) / probes * 1e6))
+tb.close()
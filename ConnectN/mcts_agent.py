@@ -0,0 +1,259 @@
+import array
+import math
+import random
+import time
+import agent
+import board
+from alpha_beta_agent import DEADLINE_MARGIN
+
+# Exploration constant of UCT
+EXPLORATION = math.sqrt(2)
+
+# Playouts between two looks at the clock
+CLOCK_CHECK = 16
+
+###########################
+# Monte Carlo Tree Search #
+###########################
+
+class MCTSAgent(agent.Agent):
+    """Agent that uses Monte Carlo tree search (UCT) with random playouts"""
+
+    # go() gets the move deadline from the game
+    takes_context = True
+
+    # Class constructor.
+    #
+    # The tree is stored in flat arrays indexed by node: the children of a
+    # node are expanded all at once, next to each other, so a node only
+    # keeps the index of its first child and their number.
+    #
+    # PARAM [string] name:        the name of this player
+    # PARAM [float]  move_time:   the seconds to search each move for, or
+    #                             None to run a fixed number of playouts
+    # PARAM [int]    playouts:    the playouts per move when move_time is
+    #                             None
+    # PARAM [float]  exploration: the UCT exploration constant
+    # PARAM [int]    seed:        the seed of the playout generator, None for
+    #                             a random one
+    def __init__(self, name, move_time=None, playouts=10000, exploration=EXPLORATION, seed=None):
+        """Class constructor"""
+        super().__init__(name)
+        self.move_time = move_time
+        self.max_playouts = playouts
+        self.exploration = exploration
+        self.rng = random.Random(seed)
+        # Columns played up to the root of the tree, to find the root again
+        # on the next move
+        self.root_moves = None
+        self.clear_tree()
+        # Statistics: playouts and time of the last move, and of all moves
+        self.playouts = 0
+        self.search_time = 0
+        self.total_playouts = 0
+        self.total_time = 0
+
+    # Start an empty tree, with only a root.
+    def clear_tree(self):
+        """Resets the tree to a single unexpanded root"""
+        self.first_child = array.array('i', [0])
+        self.child_count = array.array('i', [0])
+        self.move = array.array('b', [-1])
+        self.visits = array.array('i', [0])
+        # Sum of the rewards of the player who made the move into the node
+        self.reward = array.array('d', [0.0])
+
+    # Add a node to the tree.
+    #
+    # PARAM [int] col: the column played to reach the node
+    def add_node(self, col):
+        """Appends an unexpanded node reached by playing col"""
+        self.first_child.append(0)
+        self.child_count.append(0)
+        self.move.append(col)
+        self.visits.append(0)
+        self.reward.append(0.0)
+
+    # Keep the subtree of a node as the new tree.
+    #
+    # PARAM [int] node: the node to make the root
+    def reroot(self, node):
+        """Copies the subtree of node into a new tree rooted at node"""
+        (first_child, child_count, move, visits, reward) = (
+            self.first_child, self.child_count, self.move, self.visits, self.reward)
+        self.clear_tree()
+        self.visits[0] = visits[node]
+        self.reward[0] = reward[node]
+        # Copy level by level, so the children of a node stay contiguous
+        queue = [(node, 0)]
+        while queue:
+            following = []
+            for (old, new) in queue:
+                if child_count[old] == 0:
+                    continue
+                self.first_child[new] = len(self.move)
+                self.child_count[new] = child_count[old]
+                for c in range(first_child[old], first_child[old] + child_count[old]):
+                    self.add_node(move[c])
+                    self.visits[-1] = visits[c]
+                    self.reward[-1] = reward[c]
+                    following.append((c, len(self.move) - 1))
+            queue = following
+
+    # Find the tree node of a board, keeping the subtree of the moves played
+    # since the last search, or start a new tree.
+    #
+    # PARAM [board.Board] brd: the board state
+    def find_root(self, brd):
+        """Makes the tree root the node of brd, if the tree has it"""
+        moves = brd.moves
+        old = self.root_moves
+        self.root_moves = list(moves)
+        if not brd.has_full_history():
+            self.root_moves = None
+            old = None
+        if (old is None) or (len(moves) < len(old)) or (moves[:len(old)] != old):
+            self.clear_tree()
+            return
+        node = 0
+        for col in moves[len(old):]:
+            found = None
+            for c in range(self.first_child[node], self.first_child[node] + self.child_count[node]):
+                if self.move[c] == col:
+                    found = c
+                    break
+            if found is None:
+                self.clear_tree()
+                return
+            node = found
+        if node != 0:
+            self.reroot(node)
+
+    # Pick a column.
+    #
+    # PARAM [board.Board]       brd: the current board state
+    # PARAM [agent.MoveContext] ctx: the move deadline and history, if known
+    # RETURN [int]: the column where the token must be added
+    def go(self, brd, ctx=None):
+        """Search for the best move (choice of column for the token)"""
+        st = time.perf_counter()
+        deadline = None
+        if self.move_time is not None:
+            deadline = st + self.move_time
+        if (ctx is not None) and (ctx.deadline is not None):
+            if deadline is None:
+                deadline = ctx.deadline - DEADLINE_MARGIN
+            else:
+                deadline = min(deadline, ctx.deadline - DEADLINE_MARGIN)
+        self.find_root(brd)
+        # Playouts run on a bitboard, played and undone in place
+        sim = board.BitBoard(brd.board, brd.w, brd.h, brd.n)
+        sim.player = brd.player
+        sim.get_outcome()
+        self.playouts = 0
+        while True:
+            if deadline is None:
+                if self.playouts >= self.max_playouts:
+                    break
+            elif (self.playouts % CLOCK_CHECK == 0) and (time.perf_counter() > deadline):
+                break
+            self.iterate(sim)
+            self.playouts += 1
+        self.search_time = time.perf_counter() - st
+        self.total_playouts += self.playouts
+        self.total_time += self.search_time
+        # Play the most visited move
+        best = None
+        for c in range(self.first_child[0], self.first_child[0] + self.child_count[0]):
+            if (best is None) or (self.visits[c] > self.visits[best]):
+                best = c
+        if best is None:
+            return self.rng.choice(brd.free_cols())
+        return self.move[best]
+
+    # Run one iteration: select a leaf with UCT, expand it, play a random
+    # game from it and back the result up.
+    #
+    # PARAM [board.BitBoard] sim: the board at the root; it is restored on
+    #                             return
+    def iterate(self, sim):
+        """Runs one selection, expansion, playout and backup"""
+        first_child = self.first_child
+        child_count = self.child_count
+        visits = self.visits
+        reward = self.reward
+        c_explore = self.exploration
+        node = 0
+        path = [0]
+        # Player who made the move into each node of the path
+        movers = [3 - sim.player]
+        # Selection
+        while (child_count[node] != 0) and (sim.outcome == 0):
+            log_n = math.log(visits[node])
+            best = -1
+            best_u = -1.0
+            for c in range(first_child[node], first_child[node] + child_count[node]):
+                v = visits[c]
+                if v == 0:
+                    best = c
+                    break
+                u = reward[c] / v + c_explore * math.sqrt(log_n / v)
+                if u > best_u:
+                    (best, best_u) = (c, u)
+            movers.append(sim.player)
+            sim.play(self.move[best])
+            node = best
+            path.append(node)
+        # Expansion, once a node has been visited
+        if (sim.outcome == 0) and (visits[node] > 0):
+            cols = [x for x in range(sim.w) if sim.heights[x] < sim.h]
+            if cols:
+                first_child[node] = len(self.move)
+                child_count[node] = len(cols)
+                for x in cols:
+                    self.add_node(x)
+                node = first_child[node] + self.rng.randrange(len(cols))
+                movers.append(sim.player)
+                sim.play(self.move[node])
+                path.append(node)
+        # Playout
+        winner = self.playout(sim)
+        for i in range(len(path) - 1):
+            sim.undo()
+        # Backup
+        for (node, mover) in zip(path, movers):
+            visits[node] += 1
+            if winner == mover:
+                reward[node] += 1.0
+            elif winner == 0:
+                reward[node] += 0.5
+
+    # Play random moves until the game is over, then undo them.
+    #
+    # PARAM [board.BitBoard] sim: the board state; it is restored on return
+    # RETURN [int]: the winner, 0 for a draw
+    def playout(self, sim):
+        """Returns the winner of a random game from sim"""
+        (w, h) = (sim.w, sim.h)
+        heights = sim.heights
+        choice = self.rng.choice
+        played = 0
+        while sim.outcome == 0:
+            cols = [x for x in range(w) if heights[x] < h]
+            if not cols:
+                break
+            sim.play(choice(cols))
+            played += 1
+        winner = sim.outcome
+        for i in range(played):
+            sim.undo()
+        return winner
+
+    # Get the playout rate.
+    #
+    # RETURN [float]: the playouts per second over all moves so far
+    def playouts_per_second(self):
+        """Returns the playouts per second over all the moves searched"""
+        if self.total_time == 0:
+            return 0
+        return self.total_playouts / self.total_time
@@ -17,6 +17,9 @@ class Metrics():
         self.wins = 0
         self.losses = 0
         self.total_moves = 0
+
+        self.cutoffs = 0
+        self.first_child_cutoffs = 0
         
     # Start timer, record current time from perf_counter()  
     def start_timer(self):
@@ -45,6 +48,18 @@ class Metrics():
         if(self.debug and not self.nodesChecked%1000):
             print("Nodes Checked: " + str(self.nodesChecked))
 
+    #Keeps track of the alpha-beta cutoffs, and of those caused by the first child searched
+    def cutoff(self, first_child):
+        self.cutoffs += 1
+        if first_child:
+            self.first_child_cutoffs += 1
+
+    #Gets the share of cutoffs caused by the first child searched
+    def getFirstCutoffRate(self):
+        if self.cutoffs == 0:
+            return 0
+        return self.first_child_cutoffs / self.cutoffs
+
     #Gets the averages nodes checked per second
     def getNodePerSec(self):
         return self.total_nodes_checked / self.total_time
@@ -75,6 +90,8 @@ class Metrics():
         self.wins = 0
         self.losses = 0
         self.total_moves = 0
+        self.cutoffs = 0
+        self.first_child_cutoffs = 0
 
 
 
@@ -0,0 +1,108 @@
+import math
+import multiprocessing
+
+###########################
+# Parallel root splitting #
+###########################
+
+# State of a worker process, set by init_worker()
+WORKER_AGENT = None # the worker's copy of the searching agent
+WORKER_BEST = None  # the shared best root result: [score, move index]
+
+# Set up a worker process.
+#
+# PARAM [alpha_beta_agent.AlphaBetaAgent] agent: the agent to search with
+# PARAM [multiprocessing.Array]           best:  the shared best root result
+def init_worker(agent, best):
+    """Stores the worker's agent and the shared best root result"""
+    global WORKER_AGENT, WORKER_BEST
+    WORKER_AGENT = agent
+    WORKER_BEST = best
+
+# Get the alpha a root move must be searched with.
+#
+# A move found before the best one so far must beat it, one found after it
+# only needs to tie with it (the first best move is the one played). Any
+# score at or below that alpha cannot change the choice.
+#
+# PARAM [float] best_score: the best exact root score so far
+# PARAM [int]   best_index: the index of its move in the root move order
+# PARAM [int]   index:      the index of the move to search
+# RETURN [float]: the alpha to search the move with
+def root_alpha(best_score, best_index, index):
+    """Returns the alpha for root move number index, given the best move so far"""
+    if best_index < index:
+        return best_score
+    return math.nextafter(best_score, float('-inf'))
+
+# Search a root move in a worker process.
+#
+# PARAM [tuple] task: (board, player, depth, column, index)
+# RETURN [tuple]: (index, score, alpha, nodes); the score is exact if it is
+#                 above alpha, and an upper bound otherwise
+def search_root_move(task):
+    """Searches one root move with the worker's agent"""
+    (brd, player, depth, col, index) = task
+    with WORKER_BEST.get_lock():
+        alpha = root_alpha(WORKER_BEST[0], int(WORKER_BEST[1]), index)
+    agent = WORKER_AGENT
+    agent.player = player
+    agent.start_search(brd)
+    agent.search_depth = depth
+    agent.make(brd, col)
+    score = agent.inplace_min_value(brd, alpha, float('inf'), 1)
+    return (index, score, alpha, agent.nodes)
+
+class RootSplitter(object):
+    """Pool of processes that search the moves at the root in parallel"""
+
+    # Class constructor.
+    #
+    # PARAM [alpha_beta_agent.AlphaBetaAgent] agent:   the agent to copy into
+    #                                                  each worker
+    # PARAM [int]                             workers: the number of processes
+    def __init__(self, agent, workers):
+        """Class constructor"""
+        self.workers = workers
+        # Best exact root result so far, read by the workers before they
+        # start a move
+        self.best = multiprocessing.Array('d', [float('-inf'), -1])
+        self.pool = multiprocessing.Pool(workers, init_worker, (agent, self.best))
+
+    # Search root moves in parallel.
+    #
+    # The first move must have been searched already (young brothers wait):
+    # its exact score gives the other moves a bound from the start. Each
+    # exact result is shared with the moves that start after it.
+    #
+    # PARAM [board.Board]  brd:        the board state
+    # PARAM [int]          player:     the player the scores are for
+    # PARAM [int]          depth:      the search depth
+    # PARAM [list of int]  cols:       the root moves, in search order
+    # PARAM [float]        first_score: the exact score of cols[0]
+    # RETURN [(int, float, int)]: the index in cols of the first best move,
+    #                             its score, and the nodes searched
+    def search(self, brd, player, depth, cols, first_score):
+        """Returns (index of the best move, its score, nodes) for the root moves"""
+        (best_score, best_index) = (first_score, 0)
+        with self.best.get_lock():
+            self.best[0] = best_score
+            self.best[1] = best_index
+        nodes = 0
+        tasks = [(brd, player, depth, cols[i], i) for i in range(1, len(cols))]
+        for (i, score, alpha, n) in self.pool.imap_unordered(search_root_move, tasks):
+            nodes += n
+            # Only an exact score can be the best one
+            if (score > alpha) and ((score > best_score) or
+                                    ((score == best_score) and (i < best_index))):
+                (best_score, best_index) = (score, i)
+                with self.best.get_lock():
+                    self.best[0] = best_score
+                    self.best[1] = best_index
+        return (best_index, best_score, nodes)
+
+    # Stop the worker processes.
+    def close(self):
+        """Terminates the worker processes"""
+        self.pool.terminate()
+        self.pool.join()
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+
+import copy
+import json
+import multiprocessing
+import os
+import random
+import sys
+import tournament
+
+#
+# Play the tournament of tournament.py with the matches spread over a pool
+# of processes, saving each result to a checkpoint file as it comes in, so
+# an interrupted tournament picks up where it stopped when run again
+#
+# Usage: parallel_tournament.py <checkpoint file> [workers] [seed]
+#
+
+#############################
+# Match in a worker process #
+#############################
+
+# The agents of the tournament in a worker process, set by init_worker()
+WORKER_AGENTS = None
+
+# Set up a worker process.
+#
+# PARAM [list of agent.Agent] agents: the agents of the tournament
+def init_worker(agents):
+    """Stores the agents of the tournament in the worker"""
+    global WORKER_AGENTS
+    WORKER_AGENTS = agents
+
+# Get the seed of a match.
+#
+# PARAM [int]    seed: the seed of the tournament
+# PARAM [string] p1:   the name of Player 1 of the first game
+# PARAM [string] p2:   the name of Player 2 of the first game
+# RETURN [string]: the seed of the random generator for the match
+def match_seed(seed, p1, p2):
+    """Returns the seed of the match between p1 and p2"""
+    return "{}:{}:{}".format(seed, p1, p2)
+
+# Play a match in a worker process.
+#
+# Each match is played by fresh copies of the agents, with the random
+# generator seeded for the match, so its result does not depend on the
+# matches played before it in the same process.
+#
+# PARAM [tuple] task: (w, h, n, l, i, j, seed), with i and j the indices of
+#                     the agents
+# RETURN [(int, int, int, int)]: (i, j, score of i, score of j)
+def run_match(task):
+    """Plays the match between agents i and j"""
+    (w, h, n, l, i, j, seed) = task
+    p1 = copy.deepcopy(WORKER_AGENTS[i])
+    p2 = copy.deepcopy(WORKER_AGENTS[j])
+    random.seed(match_seed(seed, p1.name, p2.name))
+    try:
+        (s1, s2) = tournament.play_match(w, h, n, l, p1, p2)
+    finally:
+        for p in (p1, p2):
+            if hasattr(p, "close"):
+                p.close()
+    return (i, j, s1, s2)
+
+###################
+# Checkpoint file #
+###################
+
+# Read the results saved in a checkpoint file.
+#
+# A last line cut short by an interruption is removed from the file, so
+# that the next result appended starts on a line of its own.
+#
+# PARAM [string] path: the checkpoint file
+# PARAM [int]    seed: the seed of the tournament
+# RETURN [dict]: (name of p1, name of p2) -> (score of p1, score of p2)
+def read_checkpoint(path, seed):
+    """Returns the match results saved in path"""
+    results = {}
+    if not os.path.exists(path):
+        return results
+    with open(path, "rb+") as f:
+        data = f.read()
+        if not data.endswith(b"\n"):
+            data = data[:data.rfind(b"\n") + 1]
+            f.truncate(len(data))
+        for line in data.decode().splitlines():
+            try:
+                r = json.loads(line)
+            except ValueError:
+                continue
+            if r["seed"] != seed:
+                raise ValueError("{} was played with seed {}, not {}".format(path, r["seed"], seed))
+            results[(r["p1"], r["p2"])] = (r["s1"], r["s2"])
+    return results
+
+############################################
+# Play tournament in parallel and print it #
+############################################
+
+# Play a tournament in parallel.
+#
+# The scores are the same whatever the number of workers, and whether the
+# tournament was interrupted or not, as long as no agent runs out of time:
+# matches that are close to the time limit can go either way when the
+# workers compete for the cores.
+#
+# PARAM [int]                 w:          the board width
+# PARAM [int]                 h:          the board height
+# PARAM [int]                 n:          the number of tokens to line up to win
+# PARAM [int]                 l:          the time limit for a move in seconds
+# PARAM [list of agent.Agent] ps:         the agents in the tournament, with
+#                                         distinct names
+# PARAM [string]              checkpoint: the file the results are saved to
+# PARAM [int]                 workers:    the number of processes, None for
+#                                         one per core
+# PARAM [int]                 seed:       the seed of the match seeds
+# RETURN [dict]: name -> score
+def play_tournament(w, h, n, l, ps, checkpoint, workers=None, seed=1):
+    names = [p.name for p in ps]
+    if len(set(names)) != len(names):
+        raise ValueError("Agent names must be distinct")
+    results = read_checkpoint(checkpoint, seed)
+    tasks = []
+    for i in range(0, len(ps)-1):
+        for j in range(i + 1, len(ps)):
+            if (names[i], names[j]) not in results:
+                tasks.append((w, h, n, l, i, j, seed))
+    total_num_games = len(ps) * (len(ps) - 1) // 2
+    current_game_number = total_num_games - len(tasks)
+    print("TOURNAMENT START ({} of {} matches already played)".format(current_game_number, total_num_games))
+    with open(checkpoint, "a") as f:
+        if workers == 1:
+            init_worker(ps)
+            outcomes = map(run_match, tasks)
+            pool = None
+        else:
+            pool = multiprocessing.Pool(workers, init_worker, (ps,))
+            outcomes = pool.imap_unordered(run_match, tasks)
+        try:
+            for (i, j, s1, s2) in outcomes:
+                results[(names[i], names[j])] = (s1, s2)
+                f.write(json.dumps({"seed": seed, "p1": names[i], "p2": names[j], "s1": s1, "s2": s2}) + "\n")
+                f.flush()
+                current_game_number += 1
+                print("Progress: " + str(100*(current_game_number / total_num_games)))
+        finally:
+            if pool is not None:
+                pool.terminate()
+                pool.join()
+    print("TOURNAMENT END")
+    # Calculate and print scores
+    scores = {}
+    for name in names:
+        scores[name] = 0
+    for ((n1, n2), (s1, s2)) in results.items():
+        if (n1 in scores) and (n2 in scores):
+            scores[n1] += s1
+            scores[n2] += s2
+    sscores = sorted( ((v,k) for k,v in scores.items()), reverse=True)
+    print("\nSCORES:")
+    for v,k in sscores:
+        print(v,k)
+    return scores
+
+#######################
+# Run the tournament! #
+#######################
+
+if __name__ == "__main__":
+    if not len(sys.argv) in [2,3,4]:
+        print("Usage:\n  {} <checkpoint file> [workers] [seed]".format(sys.argv[0]))
+        sys.exit(1)
+    CHECKPOINT = sys.argv[1]
+    WORKERS = None
+    if len(sys.argv) > 2:
+        WORKERS = int(sys.argv[2])
+    SEED = 1
+    if len(sys.argv) > 3:
+        SEED = int(sys.argv[3])
+    play_tournament(6,                           # board width
+                    6,                           # board height
+                    4,                           # tokens in a row to win
+                    15,                          # time limit in seconds
+                    tournament.make_agents(4),   # player list
+                    CHECKPOINT,
+                    WORKERS,
+                    SEED)
@@ -0,0 +1,238 @@
+import math
+import multiprocessing
+import struct
+import time
+import agent
+import board
+
+###############
+# Player host #
+###############
+
+# Request: sequence number, board width, height, tokens to win, the player
+# the agent plays, the player to move, flags, move number, last move (-1 for
+# none), seconds left and time limit (NaN for none), then the board: the
+# columns played in order, or with GRID the cells row-major, one byte each
+REQUEST = struct.Struct("<IBBBBBBhbdd")
+# Reply: sequence number, column
+REPLY = struct.Struct("<Ih")
+
+# Message telling the host that the game is over
+END_GAME = b"\x00"
+
+# Request flags
+GRID = 1      # the board is sent as its cells, not its moves
+BITBOARD = 2  # the board is a board.BitBoard
+
+# Column sent back when the agent's go() returns something else than a column
+NO_MOVE = -1
+
+# Encode a move request.
+#
+# PARAM [int]               seq:    the sequence number of the request
+# PARAM [board.Board]       brd:    the board state
+# PARAM [int]               player: the player the agent plays
+# PARAM [agent.MoveContext] ctx:    the move deadline and history, or None
+# RETURN [bytes]: the request
+def encode_request(seq, brd, player, ctx):
+    """Returns the request for a move on brd"""
+    flags = 0
+    if isinstance(brd, board.BitBoard):
+        flags |= BITBOARD
+    if brd.has_full_history():
+        cells = bytes(brd.moves)
+    else:
+        flags |= GRID
+        cells = bytes(c for row in brd.board for c in row)
+    (move_number, last_move, left, limit) = (len(brd.moves), -1, math.nan, math.nan)
+    if ctx is not None:
+        move_number = ctx.move_number
+        if ctx.last_move is not None:
+            last_move = ctx.last_move
+        if ctx.deadline is not None:
+            left = ctx.deadline - time.perf_counter()
+        if ctx.limit is not None:
+            limit = ctx.limit
+    return REQUEST.pack(seq, brd.w, brd.h, brd.n, player, brd.player, flags,
+                        move_number, last_move, left, limit) + cells
+
+# Decode a move request.
+#
+# PARAM [bytes] data: the request
+# RETURN [(int, board.Board, int, agent.MoveContext)]: the sequence number,
+#        the board, the player the agent plays and the move context
+def decode_request(data):
+    """Returns (sequence number, board, player, context) of a request"""
+    (seq, w, h, n, player, to_move, flags, move_number, last_move, left, limit) = REQUEST.unpack_from(data)
+    impl = "list"
+    if flags & BITBOARD:
+        impl = "bitboard"
+    brd = board.new_board(w, h, n, impl)
+    cells = data[REQUEST.size:]
+    if flags & GRID:
+        grid = [list(cells[y * w:(y + 1) * w]) for y in range(h)]
+        brd = board.IMPLEMENTATIONS[impl](grid, w, h, n)
+    else:
+        for x in cells:
+            brd.add_token(x)
+    brd.player = to_move
+    deadline = None
+    if not math.isnan(left):
+        deadline = time.perf_counter() + left
+    if math.isnan(limit):
+        limit = None
+    if last_move < 0:
+        last_move = None
+    return (seq, brd, player, agent.MoveContext(deadline, limit, move_number, last_move))
+
+# Run an agent in a host process: answer the move requests sent on the pipe
+# until it is closed or an empty message comes, and pass on the ends of
+# games. An exception in the agent ends the process, like a crash.
+#
+# PARAM [multiprocessing.Connection] conn: the request pipe
+# PARAM [agent.Agent]                a:    the agent
+def host_main(conn, a):
+    """Answers the move requests sent on conn with the agent"""
+    while True:
+        try:
+            data = conn.recv_bytes()
+        except EOFError:
+            break
+        if not data:
+            break
+        if data == END_GAME:
+            a.end_game()
+            continue
+        (seq, brd, player, ctx) = decode_request(data)
+        a.player = player
+        if a.takes_context:
+            x = a.go(brd, ctx)
+        else:
+            x = a.go(brd)
+        try:
+            x = int(x)
+        except (TypeError, ValueError):
+            x = NO_MOVE
+        if not -32768 <= x <= 32767:
+            x = NO_MOVE
+        conn.send_bytes(REPLY.pack(seq, x))
+    conn.close()
+    if hasattr(a, "close"):
+        a.close()
+
+class HostedAgent(agent.Agent):
+    """Proxy that runs an agent in its own long-lived process"""
+
+    # go() gets the move deadline from the game
+    takes_context = True
+
+    # The agent runs in the host process
+    in_process = False
+
+    # Class constructor.
+    #
+    # The process is started on the first move, with a copy of the agent,
+    # and kept between moves and games. A move that is not back by the
+    # deadline is forfeited at once: go() returns NO_MOVE, which the game
+    # takes as an illegal move, and the late answer is dropped when it comes
+    # (the requests carry a sequence number). The process is only replaced
+    # if it dies; an agent that never answers forfeits every later move.
+    #
+    # PARAM [agent.Agent] a: the agent to host
+    def __init__(self, a):
+        """Class constructor"""
+        super().__init__(a.name)
+        self.agent = a
+        self.conn = None
+        self.proc = None
+        self.seq = 0
+        # Number of forfeited moves and process restarts
+        self.timeouts = 0
+        self.crashes = 0
+
+    # Start the host process.
+    def start(self):
+        """Starts the process the agent runs in"""
+        (mine, theirs) = multiprocessing.Pipe()
+        self.proc = multiprocessing.Process(target=host_main, args=(theirs, self.agent), daemon=True)
+        self.proc.start()
+        theirs.close()
+        self.conn = mine
+
+    # Replace a dead host process.
+    def restart(self):
+        """Starts a new host process after a crash"""
+        self.crashes += 1
+        self.conn.close()
+        self.proc.join()
+        self.start()
+
+    # Ask the hosted agent for a column.
+    #
+    # PARAM [board.Board]       brd: the current board state
+    # PARAM [agent.MoveContext] ctx: the move deadline and history, if known
+    # RETURN [int]: the column picked, or NO_MOVE if the agent crashed or
+    #               missed the deadline
+    def go(self, brd, ctx=None):
+        """Returns the column picked by the hosted agent, or NO_MOVE"""
+        if self.proc is None:
+            self.start()
+        elif not self.proc.is_alive():
+            self.restart()
+        self.seq += 1
+        try:
+            self.conn.send_bytes(encode_request(self.seq, brd, self.player, ctx))
+        except OSError:
+            self.restart()
+            self.conn.send_bytes(encode_request(self.seq, brd, self.player, ctx))
+        deadline = None
+        if ctx is not None:
+            deadline = ctx.deadline
+        while True:
+            timeout = None
+            if deadline is not None:
+                timeout = max(0, deadline - time.perf_counter())
+            if not self.conn.poll(timeout):
+                self.timeouts += 1
+                return NO_MOVE
+            try:
+                (seq, x) = REPLY.unpack(self.conn.recv_bytes())
+            except EOFError:
+                self.restart()
+                return NO_MOVE
+            # Drop the late answers to forfeited moves
+            if seq == self.seq:
+                return x
+
+    # Tell the hosted agent that the game is over, without waiting.
+    def end_game(self):
+        """Passes the end of the game on to the hosted agent"""
+        if (self.proc is None) or not self.proc.is_alive():
+            return
+        try:
+            self.conn.send_bytes(END_GAME)
+        except OSError:
+            pass
+
+    # Get the state to pickle: the agent, without its process.
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["conn"] = None
+        state["proc"] = None
+        return state
+
+    # Stop the host process.
+    def close(self):
+        """Stops the process the agent runs in"""
+        if self.proc is None:
+            return
+        try:
+            self.conn.send_bytes(b"")
+        except OSError:
+            pass
+        self.conn.close()
+        self.proc.join(1)
+        if self.proc.is_alive():
+            self.proc.terminate()
+            self.proc.join()
+        (self.conn, self.proc) = (None, None)
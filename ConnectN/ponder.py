@@ -0,0 +1,101 @@
+import threading
+
+#############
+# Pondering #
+#############
+
+class Ponderer(object):
+    """Background thread that searches the expected position on the opponent's time"""
+
+    # Class constructor.
+    #
+    # The thread runs the agent's own search, so everything it finds goes
+    # into the agent's caches (transposition table, history table). It
+    # shares the GIL with the rest of the process: an opponent searching in
+    # the same process is slowed down while it runs, so pondering only pays
+    # when the opponent runs in another process.
+    #
+    # PARAM [alpha_beta_agent.AlphaBetaAgent] agent: the agent to search with
+    def __init__(self, agent):
+        """Class constructor"""
+        self.agent = agent
+        # Flag that stops the search, checked by the agent's visit()
+        self.stop = StopFlag()
+        agent.stop = self.stop
+        self.thread = None
+        # The moves of the position searched, and the choice of the search
+        # once it is over
+        self.moves = None
+        self.choice = None
+        # Number of times the opponent played the expected move
+        self.hits = 0
+        self.misses = 0
+
+    # Start searching the position after a move and the expected reply.
+    #
+    # PARAM [board.Board] brd:   the board state before our move
+    # PARAM [int]         col:   our move
+    # PARAM [int]         reply: the opponent's expected reply
+    def start(self, brd, col, reply):
+        """Starts searching brd after col and reply in the background"""
+        self.finish()
+        brd = brd.copy()
+        brd.play(col)
+        brd.play(reply)
+        if (brd.get_outcome() != 0) or not brd.free_cols():
+            return
+        self.moves = list(brd.moves)
+        self.choice = None
+        self.stop.value = 0
+        self.thread = threading.Thread(target=self.run, args=(brd,), daemon=True)
+        self.thread.start()
+
+    # Search the position; runs in the background thread.
+    #
+    # PARAM [board.Board] brd: the board state, a copy owned by the thread
+    def run(self, brd):
+        """Searches brd with the agent, recording the choice if the search ends"""
+        self.choice = self.agent.ponder_search(brd)
+
+    # Stop the search and wait for the thread.
+    def finish(self):
+        """Stops the background search, if any"""
+        if self.thread is not None:
+            self.stop.value = 1
+            self.thread.join()
+            self.thread = None
+        self.stop.value = 0
+
+    # Stop the search and forget the position searched.
+    def cancel(self):
+        """Stops the background search and drops its result"""
+        self.finish()
+        self.moves = None
+        self.choice = None
+
+    # Stop the search and get its result for a board.
+    #
+    # PARAM [board.Board] brd: the board state the agent must move from
+    # RETURN [int]: the choice of the search of brd, or None if brd is not
+    #               the position searched or the search was stopped before
+    #               its end
+    def take(self, brd):
+        """Stops the background search; returns its choice if it was of brd"""
+        self.finish()
+        moves = self.moves
+        self.moves = None
+        if moves is None:
+            return None
+        if (brd.moves != moves) or not brd.has_full_history():
+            self.misses += 1
+            return None
+        self.hits += 1
+        return self.choice
+
+class StopFlag(object):
+    """Stop flag with the interface of multiprocessing.RawValue"""
+
+    # Class constructor.
+    def __init__(self):
+        """Class constructor"""
+        self.value = 0
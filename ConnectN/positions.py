@@ -0,0 +1,35 @@
+import board
+
+#
+# Random positions for the benchmarks and the tests
+#
+
+# Make random positions that are not over yet.
+#
+# Each position is reached from the empty board by a random number of
+# random moves, stopping early if the game ends.
+#
+# PARAM [random.Random] rng:        the random generator
+# PARAM [int]           w:          the board width
+# PARAM [int]           h:          the board height
+# PARAM [int]           n:          the number of tokens to line up to win
+# PARAM [int]           count:      the number of positions
+# PARAM [int]           min_tokens: the fewest moves to play
+# PARAM [int]           max_tokens: the most moves to play, w*h-1 if None
+# PARAM [string]        impl:       the board implementation, see
+#                                   board.new_board()
+# RETURN [list of board.Board]: the positions
+def random_positions(rng, w, h, n, count, min_tokens=0, max_tokens=None, impl=None):
+    """Returns count random w x h positions that are not over"""
+    if max_tokens is None:
+        max_tokens = w * h - 1
+    positions = []
+    while len(positions) < count:
+        brd = board.new_board(w, h, n, impl)
+        for i in range(rng.randint(min_tokens, max_tokens)):
+            if (brd.get_outcome() != 0) or not brd.free_cols():
+                break
+            brd.add_token(rng.choice(brd.free_cols()))
+        if (brd.get_outcome() == 0) and brd.free_cols():
+            positions.append(brd)
+    return positions
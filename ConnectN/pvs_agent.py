@@ -0,0 +1,166 @@
+import math
+import alpha_beta_agent
+
+# Half-width of the first aspiration window around the previous score
+ASPIRATION_WINDOW = 25
+
+# Factor the window grows by on its failing side after each failed search
+ASPIRATION_GROWTH = 4
+
+####################################
+# Principal Variation Search Agent #
+####################################
+class PVSAgent(alpha_beta_agent.AlphaBetaAgent):
+    """Agent that uses principal variation search with aspiration windows"""
+
+    # Class constructor.
+    #
+    # Takes the arguments of AlphaBetaAgent; the search is always in place.
+    #
+    # PARAM [string] name:      the name of this player
+    # PARAM [int]    max_depth: the maximum search depth
+    # PARAM [float]  aspiration_window: the half-width of the first root
+    #                           window around the previous score; 0 searches
+    #                           the root with a full window
+    def __init__(self, name, max_depth, aspiration_window = ASPIRATION_WINDOW, **kwargs):
+        kwargs["inplace"] = True
+        super().__init__(name, max_depth, **kwargs)
+        self.aspiration_window = aspiration_window
+        # Score of the last completed root search, the centre of the next
+        # aspiration window, and the player and root move count it is for
+        self.last_score = None
+        self.last_score_player = 0
+        self.last_score_ply = 0
+        # Root searches redone because the score fell outside the window
+        self.researches = 0
+
+    # Reset the per-move search state.
+    #
+    # The last score only centres the next window within a game and for the
+    # same side: it is dropped when the root goes back to fewer moves (a new
+    # game) or the agent plays the other side.
+    #
+    # PARAM [board.Board] brd: the board state at the root of the search
+    def start_search(self, brd):
+        """Prepares the in-place search of brd"""
+        if (self.last_score_player != self.player) or (len(brd.moves) < self.last_score_ply):
+            self.last_score = None
+        self.last_score_player = self.player
+        self.last_score_ply = len(brd.moves)
+        super().start_search(brd)
+
+    # Forget the last score once the game is over.
+    def end_game(self):
+        """Stops pondering and drops the score of the last search"""
+        super().end_game()
+        self.last_score = None
+
+    # Search the moves at the root, with an aspiration window.
+    #
+    # The first window is centred on the score of the last completed search
+    # (the previous depth of iterative deepening, or the previous move). If
+    # the score falls outside, the window grows on that side and the root is
+    # searched again.
+    #
+    # PARAM [board.Board] brd: the board state; it is restored on return
+    # RETURN [(int, float)]: the best column and its score
+    def inplace_root(self, brd):
+        delta = self.aspiration_window
+        if (self.last_score is None) or (delta <= 0):
+            (alpha, beta) = (float('-inf'), float('inf'))
+        else:
+            (alpha, beta) = (self.last_score - delta, self.last_score + delta)
+        while True:
+            (col, score, line) = self.pvs_root(brd, alpha, beta)
+            if score <= alpha:
+                delta *= ASPIRATION_GROWTH
+                alpha = max(score - delta, float('-inf'))
+            elif score >= beta:
+                delta *= ASPIRATION_GROWTH
+                beta = min(score + delta, float('inf'))
+            else:
+                break
+            self.researches += 1
+        self.pv = line
+        self.last_score = score
+        return (col, score)
+
+    # Search the moves at the root within a window: the first move with the
+    # full window, the others with a null window, searched again with the
+    # full window only if they beat the best score.
+    #
+    # PARAM [board.Board] brd:   the board state; it is restored on return
+    # PARAM [float]       alpha: the lower bound of the window
+    # PARAM [float]       beta:  the upper bound of the window
+    # RETURN [(int, float, list of int)]: the best column, its score (a
+    #                                     bound if outside the window) and
+    #                                     its principal variation
+    def pvs_root(self, brd, alpha, beta):
+        bestScore = float('-inf')
+        bestCol = 0
+        line = []
+        for (i, col) in enumerate(self.search_order(brd, 0, None)):
+            self.make(brd, col)
+            if i == 0:
+                nextScore = -self.negamax(brd, -beta, -alpha, 1)
+            else:
+                nextScore = -self.negamax(brd, -math.nextafter(alpha, math.inf), -alpha, 1)
+                if (nextScore > alpha) and (nextScore < beta):
+                    nextScore = -self.negamax(brd, -beta, -alpha, 1)
+            self.unmake(brd)
+            if nextScore > bestScore:
+                bestScore = nextScore
+                bestCol = col
+                line = [col] + self.pv_lines[1]
+            if bestScore >= beta:
+                break
+            alpha = max(alpha, bestScore)
+        return (bestCol, bestScore, line)
+
+    # Negamax principal variation search, in place
+    #
+    # Scores are from the point of view of the player to move. The table
+    # keeps the scores from the point of view of self.player, as
+    # AlphaBetaAgent does.
+    #
+    # PARAM [board.Board] brd: the board state; it is restored on return
+    # PARAM alpha
+    # PARAM beta
+    # PARAM depth   Current depth
+    def negamax(self, brd, alpha, beta, depth):
+        self.visit()
+        self.pv_lines[depth] = []
+        sign = 1
+        if brd.player != self.player:
+            sign = -1
+        if brd.get_outcome() != 0 or not brd.free_cols():
+            return sign * self.utility(brd)
+        # The window from the point of view of self.player
+        if sign == 1:
+            (a0, b0) = (alpha, beta)
+        else:
+            (a0, b0) = (-beta, -alpha)
+        (v, ttmove) = self.tt_lookup(brd, a0, b0, depth)
+        if v is not None:
+            return sign * v
+        v = float('-inf')
+        best = None
+        for (i, col) in enumerate(self.search_order(brd, depth, ttmove)):
+            self.make(brd, col)
+            if i == 0:
+                score = -self.negamax(brd, -beta, -alpha, depth + 1)
+            else:
+                score = -self.negamax(brd, -math.nextafter(alpha, math.inf), -alpha, depth + 1)
+                if (score > alpha) and (score < beta):
+                    score = -self.negamax(brd, -beta, -alpha, depth + 1)
+            self.unmake(brd)
+            if score > v:
+                v = score
+                best = col
+                self.pv_lines[depth] = [col] + self.pv_lines[depth + 1]
+            if v >= beta:
+                self.cutoff(brd, col, i, depth)
+                break
+            alpha = max(alpha, v)
+        self.tt_save(brd, depth, sign * v, a0, b0, best)
+        return v
@@ -4,40 +4,65 @@ import sys
 from pathlib import Path
 
 import game
-from players import PLAYERS
 
+# Play a game between two players of the registry and log it, unless its
+# log file already exists.
 #
-# Parse arguments
-#
-if not len(sys.argv) in [8,9]:
-    print("Usage:\n  {} <datadir> <board width> <board height> <tokens to win> <time limit> <player1> <player2> [replay]".format(sys.argv))
-    sys.exit(1)
+# PARAM [dict]     players: the player registry, name -> agent
+# PARAM [string]   datadir: the directory of the log files
+# PARAM [int]      width:   the board width
+# PARAM [int]      height:  the board height
+# PARAM [int]      tokens:  the number of tokens to line up to win
+# PARAM [int]      limit:   the time limit for a move in seconds
+# PARAM [string]   player1: the name of Player 1
+# PARAM [string]   player2: the name of Player 2
+# PARAM [bool]     replay:  whether to play the game even if it was logged
+# PARAM [function] make:    makes a fresh agent from a player name (see
+#                           make_players.py), or None to play with the
+#                           registry's agents
+# RETURN [string]: the path of the log file
+def run_match(players, datadir, width, height, tokens, limit, player1, player2, replay=False, make=None):
+    #
+    # Make file name and check if it exists
+    #
+    file_path = "{}/{}_{}_{}_{}_{}.dat".format(datadir, width, height, tokens, player1, player2)
+    if(Path(file_path).exists() and (not replay)):
+        print(file_path, "skipped")
+        return file_path
+    print(file_path, "started")
+    #
+    # Time to play!
+    #
+    if make is not None:
+        (p1, p2) = (make(player1), make(player2))
+    else:
+        (p1, p2) = (players[player1], players[player2])
+    g = game.Game(width,  # width
+                  height, # height
+                  tokens, # tokens in a row to win
+                  p1,     # player 1
+                  p2)     # player 2
+    g.logged_go(file_path, limit)
+    print(file_path, "done")
+    return file_path
 
-DATADIR      = sys.argv[1]
-BOARD_WIDTH  = int(sys.argv[2])
-BOARD_HEIGHT = int(sys.argv[3])
-TOKENS       = int(sys.argv[4])
-TIME_LIMIT   = int(sys.argv[5])
-PLAYER1      = sys.argv[6]
-PLAYER2      = sys.argv[7]
-REPLAY       = (len(sys.argv) == 9 and sys.argv[8] == "replay")
+if __name__ == "__main__":
+    from players import PLAYERS
 
-#
-# Make file name and check if it exists
-#
-FILE_PATH = "{}/{}_{}_{}_{}_{}.dat".format(DATADIR, BOARD_WIDTH, BOARD_HEIGHT, TOKENS, PLAYER1, PLAYER2)
-if(Path(FILE_PATH).exists() and (not REPLAY)):
-    print(FILE_PATH, "skipped")
-    sys.exit(0)
-print(FILE_PATH, "started")
+    #
+    # Parse arguments
+    #
+    if not len(sys.argv) in [8,9]:
+        print("Usage:\n  {} <datadir> <board width> <board height> <tokens to win> <time limit> <player1> <player2> [replay]".format(sys.argv))
+        sys.exit(1)
 
-#
-# Time to play!
-#
-g = game.Game(BOARD_WIDTH,      # width
-              BOARD_HEIGHT,     # height
-              TOKENS,           # tokens in a row to win
-              PLAYERS[PLAYER1], # player 1
-              PLAYERS[PLAYER2]) # player 2
-g.logged_go(FILE_PATH, TIME_LIMIT)
-print(FILE_PATH, "done")
+    DATADIR      = sys.argv[1]
+    BOARD_WIDTH  = int(sys.argv[2])
+    BOARD_HEIGHT = int(sys.argv[3])
+    TOKENS       = int(sys.argv[4])
+    TIME_LIMIT   = int(sys.argv[5])
+    PLAYER1      = sys.argv[6]
+    PLAYER2      = sys.argv[7]
+    REPLAY       = (len(sys.argv) == 9 and sys.argv[8] == "replay")
+
+    run_match(PLAYERS, DATADIR, BOARD_WIDTH, BOARD_HEIGHT, TOKENS, TIME_LIMIT, PLAYER1, PLAYER2, REPLAY)
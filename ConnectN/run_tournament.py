@@ -3,37 +3,153 @@
 import multiprocessing
 import os
 import sys
-from subprocess import call
-from players import PLAYERS
-
-def run_match(params):
-    datadir = params[0]
-    width   = params[1]
-    height  = params[2]
-    tokens  = params[3]
-    limit   = params[4]
-    p1      = params[5]
-    p2      = params[6]
-    call(["python3", "run_match.py", datadir, str(width), str(height), str(tokens), str(limit), p1, p2])
+import traceback
+from multiprocessing.connection import wait
 
+import run_match
+
+#
+# Play every ordered pair of players of the registry once, logging each game
+# to <datadir> as run_match.py does, in a pool of worker processes that each
+# load the registry once and play many matches
 #
-# Parse arguments
+# Usage: run_tournament.py <datadir> <board width> <board height> <tokens to win> <time limit>
+#
+
+###############
+# Worker pool #
+###############
+
+# Run a worker process: load the player registry, then play the matches
+# sent on the pipe until told to stop, answering each with its command.
+# Every match is played by fresh copies of the registry's agents from
+# players.make_player(), so that nothing an agent keeps between games
+# carries over from one match to the next. The submissions' modules are
+# only loaded once per worker: state they keep at module level does carry
+# over between the matches of a worker.
 #
-if not len(sys.argv) == 6:
-    print("Usage:\n  {} <datadir> <board width> <board height> <tokens to win> <time limit>".format(sys.argv))
-    sys.exit(1)
-
-DATADIR      = sys.argv[1]
-BOARD_WIDTH  = int(sys.argv[2])
-BOARD_HEIGHT = int(sys.argv[3])
-TOKENS       = int(sys.argv[4])
-TIME_LIMIT   = int(sys.argv[5])
-
-pool = multiprocessing.Pool()
-matches = []
-for p1 in PLAYERS.keys():
-    for p2 in PLAYERS.keys():
-        if p1 != p2:
-            matches.append((p1,p2))
-
-procs = pool.map(run_match, [(DATADIR, BOARD_WIDTH, BOARD_HEIGHT, TOKENS, TIME_LIMIT, m[0], m[1]) for m in matches])
+# PARAM [multiprocessing.Connection] conn: the command pipe
+def worker_main(conn):
+    """Plays the matches sent on conn"""
+    from players import PLAYERS, make_player
+    try:
+        while True:
+            command = conn.recv()
+            if command is None:
+                break
+            try:
+                run_match.run_match(PLAYERS, *command, make=make_player)
+            except Exception:
+                traceback.print_exc()
+            conn.send(command)
+    finally:
+        conn.close()
+
+class MatchPool(object):
+    """Long-lived worker processes that play matches sent over pipes"""
+
+    # Class constructor.
+    #
+    # Raises ImportError if players.py is too old to have make_player(),
+    # rather than have every worker die on its import.
+    #
+    # PARAM [int] workers: the number of processes, None for one per core
+    def __init__(self, workers=None):
+        """Class constructor"""
+        import players
+        if not hasattr(players, "make_player"):
+            raise ImportError("players.py has no make_player(): regenerate it with make_players.py")
+        self.conns = []
+        self.procs = []
+        for i in range(workers or os.cpu_count()):
+            self.start_worker()
+
+    # Start a worker process.
+    #
+    # RETURN [multiprocessing.Connection]: the pipe to the worker
+    def start_worker(self):
+        """Starts a worker and returns its pipe"""
+        (mine, theirs) = multiprocessing.Pipe()
+        p = multiprocessing.Process(target=worker_main, args=(theirs,))
+        p.start()
+        theirs.close()
+        self.conns.append(mine)
+        self.procs.append(p)
+        return mine
+
+    # Play matches, as many at a time as there are workers. A worker that
+    # dies is replaced, and its match is left unplayed.
+    #
+    # PARAM [list of tuple] matches: the arguments of run_match.run_match()
+    #                                after the player registry
+    def run(self, matches):
+        """Plays the matches in the workers"""
+        pending = list(reversed(matches))
+        busy = {}
+        for conn in self.conns:
+            if pending:
+                busy[conn] = pending.pop()
+                conn.send(busy[conn])
+        while busy:
+            for conn in wait(list(busy)):
+                command = busy.pop(conn)
+                try:
+                    conn.recv()
+                    crashed = False
+                except (EOFError, ConnectionResetError):
+                    crashed = True
+                if crashed:
+                    print("{} vs. {} crashed its worker".format(command[-2], command[-1]))
+                    i = self.conns.index(conn)
+                    self.procs[i].join()
+                    del self.conns[i]
+                    del self.procs[i]
+                    conn.close()
+                    conn = self.start_worker()
+                if pending:
+                    busy[conn] = pending.pop()
+                    conn.send(busy[conn])
+
+    # Stop the worker processes.
+    def close(self):
+        """Tells the workers to exit and waits for them"""
+        for conn in self.conns:
+            try:
+                conn.send(None)
+            except OSError:
+                pass
+            conn.close()
+        for p in self.procs:
+            p.join()
+
+if __name__ == "__main__":
+    from players import PLAYERS
+
+    #
+    # Parse arguments
+    #
+    if not len(sys.argv) == 6:
+        print("Usage:\n  {} <datadir> <board width> <board height> <tokens to win> <time limit>".format(sys.argv))
+        sys.exit(1)
+
+    DATADIR      = sys.argv[1]
+    BOARD_WIDTH  = int(sys.argv[2])
+    BOARD_HEIGHT = int(sys.argv[3])
+    TOKENS       = int(sys.argv[4])
+    TIME_LIMIT   = int(sys.argv[5])
+
+    matches = []
+    for p1 in PLAYERS.keys():
+        for p2 in PLAYERS.keys():
+            if p1 != p2:
+                matches.append((p1,p2))
+
+    try:
+        pool = MatchPool()
+    except ImportError as e:
+        print(e)
+        sys.exit(1)
+    try:
+        pool.run([(DATADIR, BOARD_WIDTH, BOARD_HEIGHT, TOKENS, TIME_LIMIT, m[0], m[1]) for m in matches])
+    finally:
+        pool.close()
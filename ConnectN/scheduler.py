@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+
+import math
+import multiprocessing
+import random
+import sys
+import parallel_tournament
+import tournament
+
+#
+# Rank the agents of tournament.py with adaptive rounds instead of a full
+# round robin: Swiss-system rounds or successive-halving races, with the
+# Glicko ratings updated after every match, until the top agents stand out
+#
+# Usage: scheduler.py <swiss|halving> [top] [workers] [seed]
+#
+
+###########
+# Ratings #
+###########
+
+# Glicko scale constant
+Q = math.log(10) / 400
+
+# Rating and deviation of a new agent
+INITIAL_RATING = 1500
+INITIAL_DEVIATION = 350
+
+class Rating(object):
+    """Glicko rating of an agent"""
+
+    # Class constructor.
+    def __init__(self):
+        """Class constructor"""
+        self.rating = INITIAL_RATING
+        self.deviation = INITIAL_DEVIATION
+        self.matches = 0
+
+    # Get the confidence interval of the rating.
+    #
+    # PARAM [float] z: the number of deviations on each side
+    # RETURN [(float, float)]: the lower and upper bounds
+    def interval(self, z):
+        """Returns (low, high), the rating plus or minus z deviations"""
+        return (self.rating - z * self.deviation, self.rating + z * self.deviation)
+
+# Get the weight of a result against an opponent whose rating is uncertain.
+#
+# PARAM [float] deviation: the opponent's rating deviation
+# RETURN [float]: the Glicko g() factor
+def glicko_g(deviation):
+    """Returns the Glicko g() factor of a rating deviation"""
+    return 1 / math.sqrt(1 + 3 * (Q * deviation / math.pi) ** 2)
+
+# Update the ratings of two agents with the result of a match, treated as
+# one rating period of a few games each.
+#
+# PARAM [Rating] a:     the rating of the first agent
+# PARAM [Rating] b:     the rating of the second agent
+# PARAM [float]  score: the first agent's total score, from 0 (lost every
+#                       game) to games (won every game)
+# PARAM [int]    games: the number of games in the match
+def update_ratings(a, b, score, games=1):
+    """Updates a and b with a match of games games that a scored score in"""
+    new = []
+    for (me, opp, s) in ((a, b, score), (b, a, games - score)):
+        g = glicko_g(opp.deviation)
+        e = 1 / (1 + 10 ** (-g * (me.rating - opp.rating) / 400))
+        d2 = 1 / (games * Q * Q * g * g * e * (1 - e))
+        inv = 1 / (me.deviation ** 2) + 1 / d2
+        new.append((me.rating + Q / inv * g * (s - games * e), math.sqrt(1 / inv)))
+    for (r, (rating, deviation)) in zip((a, b), new):
+        (r.rating, r.deviation) = (rating, deviation)
+        r.matches += 1
+
+#############
+# Scheduler #
+#############
+
+class Scheduler(object):
+    """Plays rounds of matches chosen from the ratings, dropping the agents out of contention"""
+
+    # Class constructor.
+    #
+    # Matches are played as in parallel_tournament.py: by fresh copies of
+    # the agents, with a seed per match and round, and their results are
+    # applied in a fixed order, so the ratings do not depend on the number
+    # of workers.
+    #
+    # PARAM [int]                 w:       the board width
+    # PARAM [int]                 h:       the board height
+    # PARAM [int]                 n:       the number of tokens to line up to win
+    # PARAM [int]                 l:       the time limit for a move in seconds
+    # PARAM [list of agent.Agent] ps:      the agents, with distinct names
+    # PARAM [int]                 top:     the number of best agents to find
+    # PARAM [int]                 workers: the number of processes, None for
+    #                                      one per core
+    # PARAM [int]                 seed:    the seed of the pairings and matches
+    # PARAM [float]               z:       the width of the confidence
+    #                                      intervals, in deviations
+    def __init__(self, w, h, n, l, ps, top=1, workers=None, seed=1, z=1.96):
+        """Class constructor"""
+        names = [p.name for p in ps]
+        if len(set(names)) != len(names):
+            raise ValueError("Agent names must be distinct")
+        (self.w, self.h, self.n, self.l) = (w, h, n, l)
+        self.ps = ps
+        self.top = top
+        self.workers = workers
+        self.seed = seed
+        self.z = z
+        self.rng = random.Random(seed)
+        self.ratings = [Rating() for p in ps]
+        # Indices of the agents still in contention
+        self.active = list(range(len(ps)))
+        # Pairs of indices that played each other
+        self.played = set()
+        self.rounds = 0
+        self.matches = 0
+
+    # Drop the agents that are out of contention: those whose rating is
+    # surely below that of at least top other agents.
+    def eliminate(self):
+        """Removes from the active agents those that cannot make the top"""
+        bounds = [self.ratings[i].interval(self.z) for i in self.active]
+        keep = []
+        for (i, (low, high)) in zip(self.active, bounds):
+            better = sum(1 for (l2, h2) in bounds if l2 > high)
+            if better < self.top:
+                keep.append(i)
+        self.active = keep
+
+    # Pair the active agents for a Swiss-system round: by rating, each with
+    # the next one it has not played yet. Agents left without such an
+    # opponent sit the round out.
+    #
+    # RETURN [list of (int, int)]: the pairs of agent indices
+    def swiss_pairs(self):
+        """Returns the pairs of a Swiss-system round"""
+        order = sorted(self.active, key=lambda i: -self.ratings[i].rating)
+        pairs = []
+        while order:
+            i = order.pop(0)
+            j = next((j for j in order if (min(i, j), max(i, j)) not in self.played), None)
+            if j is not None:
+                order.remove(j)
+                pairs.append((i, j))
+        return pairs
+
+    # Pair the active agents for a round of a successive-halving race: each
+    # agent plays 'matches' random opponents.
+    #
+    # PARAM [int] matches: the number of matches per agent
+    # RETURN [list of (int, int)]: the pairs of agent indices
+    def race_pairs(self, matches):
+        """Returns the pairs of a round of a race"""
+        pairs = []
+        for k in range(matches):
+            order = list(self.active)
+            self.rng.shuffle(order)
+            for m in range(0, len(order) - 1, 2):
+                pairs.append((order[m], order[m + 1]))
+        return pairs
+
+    # Play the matches of a round and update the ratings after each one,
+    # in the order of the pairs.
+    #
+    # PARAM [list of (int, int)] pairs: the pairs of agent indices
+    # PARAM [multiprocessing.Pool] pool: the worker pool, or None to play
+    #                                    here
+    def play_round(self, pairs, pool):
+        """Plays the matches of pairs and updates the ratings"""
+        self.rounds += 1
+        seed = "{}:{}".format(self.seed, self.rounds)
+        tasks = [(self.w, self.h, self.n, self.l, i, j, seed) for (i, j) in pairs]
+        if pool is None:
+            results = map(parallel_tournament.run_match, tasks)
+        else:
+            results = pool.imap(parallel_tournament.run_match, tasks)
+        for (i, j, s1, s2) in results:
+            # A match is two games, won (+1), tied (0) or lost (-1), so the
+            # games scored (s1 + 2) / 2 out of 2
+            update_ratings(self.ratings[i], self.ratings[j], (s1 + 2) / 2, 2)
+            self.played.add((min(i, j), max(i, j)))
+            self.matches += 1
+
+    # Run the scheduler.
+    #
+    # Swiss: rounds of Swiss pairings, without rematches. Halving: rounds in
+    # which every active agent plays 'matches' matches, after which only the
+    # better half (but at least top agents) stays. In both modes, the agents
+    # out of contention are dropped after each round, and it ends once only
+    # top agents are left, no pairs are left to play, after max_rounds
+    # rounds, or once budget matches are played.
+    #
+    # PARAM [string] mode:       "swiss" or "halving"
+    # PARAM [int]    max_rounds: the most rounds to play
+    # PARAM [int]    budget:     the most matches to play, None for no limit
+    # PARAM [int]    matches:    the matches per agent in a halving round
+    # RETURN [list of (string, Rating, bool)]: the agents by rank, with
+    #        their rating and whether they are still in contention
+    def run(self, mode, max_rounds=50, budget=None, matches=2):
+        if mode not in ("swiss", "halving"):
+            raise ValueError("Unknown scheduler mode: {}".format(mode))
+        pool = None
+        if self.workers != 1:
+            pool = multiprocessing.Pool(self.workers, parallel_tournament.init_worker, (self.ps,))
+        else:
+            parallel_tournament.init_worker(self.ps)
+        try:
+            while (len(self.active) > self.top) and (self.rounds < max_rounds):
+                if mode == "swiss":
+                    pairs = self.swiss_pairs()
+                else:
+                    pairs = self.race_pairs(matches)
+                if budget is not None:
+                    pairs = pairs[:budget - self.matches]
+                if not pairs:
+                    break
+                self.play_round(pairs, pool)
+                if mode == "halving":
+                    order = sorted(self.active, key=lambda i: -self.ratings[i].rating)
+                    self.active = sorted(order[:max(self.top, (len(order) + 1) // 2)])
+                self.eliminate()
+                print("Round {}: {} matches, {} agents in contention".format(self.rounds, self.matches, len(self.active)))
+        finally:
+            if pool is not None:
+                pool.terminate()
+                pool.join()
+        return self.ranking()
+
+    # Rank the agents: those in contention first, then by rating.
+    #
+    # RETURN [list of (string, Rating, bool)]: the agents by rank, with
+    #        their rating and whether they are still in contention
+    def ranking(self):
+        """Returns (name, rating, in contention) for each agent, best first"""
+        order = sorted(range(len(self.ps)),
+                       key=lambda i: (i not in self.active, -self.ratings[i].rating))
+        return [(self.ps[i].name, self.ratings[i], i in self.active) for i in order]
+
+#####################################
+# Rank the agents and print ratings #
+#####################################
+
+if __name__ == "__main__":
+    if not len(sys.argv) in [2,3,4,5]:
+        print("Usage:\n  {} <swiss|halving> [top] [workers] [seed]".format(sys.argv[0]))
+        sys.exit(1)
+    MODE = sys.argv[1]
+    TOP = 1
+    if len(sys.argv) > 2:
+        TOP = int(sys.argv[2])
+    WORKERS = None
+    if len(sys.argv) > 3:
+        WORKERS = int(sys.argv[3])
+    SEED = 1
+    if len(sys.argv) > 4:
+        SEED = int(sys.argv[4])
+    s = Scheduler(6,                           # board width
+                  6,                           # board height
+                  4,                           # tokens in a row to win
+                  15,                          # time limit in seconds
+                  tournament.make_agents(4),   # player list
+                  TOP, WORKERS, SEED)
+    ranking = s.run(MODE)
+    print("\nRATINGS ({} matches):".format(s.matches))
+    for (name, r, contending) in ranking:
+        print("{:7.1f} +- {:5.1f} {:3d} {}{}".format(r.rating, r.deviation, r.matches, name, "" if contending else " (out)"))
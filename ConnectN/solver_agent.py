@@ -0,0 +1,292 @@
+import array
+import agent
+import board
+
+################
+# Solver Agent #
+################
+
+class SolverAgent(agent.Agent):
+    """Agent that plays perfectly by solving the game with negamax on bitboards"""
+
+    # Class constructor.
+    #
+    # Scores are from the point of view of the player to move. A win with a
+    # token played when there are t tokens on the board scores
+    # (w*h + 1 - t) // 2, and a loss the opposite, so faster wins score
+    # higher, as in AlphaBetaAgent.utility(); a draw scores 0.
+    #
+    # Solving is exponential in the number of empty cells. In Python, an
+    # empty 5x4 board solves in about 2 s, a 6x5 board takes a few seconds
+    # a move from about 6 tokens in, and a 7x6 board under 2 s a move from
+    # about 16 tokens in (15 s on average from 12). Positions with more
+    # than max_empty empty cells are left to the fallback agent, e.g.
+    # max_empty=26 with an AlphaBetaAgent on 7x6.
+    #
+    # PARAM [string]      name:       the name of this player
+    # PARAM [float]       tt_size_mb: the transposition table size in MB
+    # PARAM [int]         max_empty:  the most empty cells to solve, None for
+    #                                 no limit
+    # PARAM [agent.Agent] fallback:   the agent asked for moves that are not
+    #                                 solved, or None to pick the first
+    #                                 column in search order
+    def __init__(self, name, tt_size_mb=64, max_empty=None, fallback=None):
+        """Class constructor"""
+        super().__init__(name)
+        self.tt_size_mb = tt_size_mb
+        self.max_empty = max_empty
+        self.fallback = fallback
+        # Board size the masks and the table are set up for
+        self.size = None
+        # Score of the last move chosen, and nodes searched for it
+        self.score = None
+        self.nodes = 0
+
+    # Set up the masks and the table for a board size.
+    #
+    # Cell (x,y) is bit x*(h+1)+y, as in board.BitBoard. Positions are
+    # stored as (cur, mask): the tokens of the player to move and all the
+    # tokens; cur + mask identifies the position.
+    #
+    # PARAM [int] w: the board width
+    # PARAM [int] h: the board height
+    # PARAM [int] n: the number of tokens to line up to win
+    def setup(self, w, h, n):
+        """Prepares the solver for w x h boards with n in a row to win"""
+        if w * (h + 1) > 64:
+            raise ValueError("SolverAgent only solves boards with w*(h+1) <= 64")
+        self.size = (w, h, n)
+        (self.w, self.h, self.n) = (w, h, n)
+        self.cells = w * h
+        self.shifts = (1, h + 1, h, h + 2)
+        if n == 4:
+            self.winning = self.winning4
+        elif "winning" in self.__dict__:
+            # Back to the generic test after an n = 4 board
+            del self.winning
+        # Bottom cell of each column, and all the cells of each column
+        self.bottom = 0
+        self.board_mask = 0
+        self.col_masks = []
+        for x in range(w):
+            col = ((1 << h) - 1) << (x * (h + 1))
+            self.col_masks.append(col)
+            self.board_mask |= col
+            self.bottom |= 1 << (x * (h + 1))
+        # Columns from the centre out
+        self.order = sorted(range(w), key=lambda x: (abs(2 * x - (w - 1)), x))
+        # Transposition table: the key and the upper bound of each position,
+        # stored as bound - min_score + 1 so that 0 is an empty slot. The
+        # first win possible is with the n-th token of player 1.
+        self.min_score = -((self.cells + 3 - 2 * n) // 2)
+        self.tt_slots = max(1, int(self.tt_size_mb * 1024 * 1024) // 9)
+        self.tt_keys = array.array('Q', [0]) * self.tt_slots
+        self.tt_vals = array.array('b', [0]) * self.tt_slots
+
+    # Get the empty cells where a player would complete a line.
+    #
+    # PARAM [int] pos:  the tokens of the player
+    # PARAM [int] mask: all the tokens
+    # RETURN [int]: the mask of the empty cells, playable or not, where a
+    #               token of the player makes n in a row
+    def winning(self, pos, mask):
+        """Returns the empty cells that would complete a line for the tokens pos"""
+        n = self.n
+        win = 0
+        for s in self.shifts:
+            # Bit c of after[k] (before[k]) is set iff the k cells after
+            # (before) c in direction s hold a token of the player
+            after = [-1]
+            before = [-1]
+            (a, b) = (-1, -1)
+            for k in range(1, n):
+                a &= pos >> (k * s)
+                b &= pos << (k * s)
+                after.append(a)
+                before.append(b)
+            for k in range(n):
+                win |= after[k] & before[n - 1 - k]
+        return win & (self.board_mask ^ mask)
+
+    # Get the empty cells where a player would complete a line of 4; same as
+    # winning(), unrolled for n = 4.
+    #
+    # PARAM [int] pos:  the tokens of the player
+    # PARAM [int] mask: all the tokens
+    # RETURN [int]: the mask of the empty cells where a token of the player
+    #               makes 4 in a row
+    def winning4(self, pos, mask):
+        """Returns the empty cells that would complete a line of 4 for the tokens pos"""
+        # Vertical: only three tokens below
+        win = (pos << 1) & (pos << 2) & (pos << 3)
+        for s in self.shifts[1:]:
+            q = (pos << s) & (pos << (2 * s))
+            win |= q & (pos << (3 * s))
+            win |= q & (pos >> s)
+            q = (pos >> s) & (pos >> (2 * s))
+            win |= q & (pos << s)
+            win |= q & (pos >> (3 * s))
+        return win & (self.board_mask ^ mask)
+
+    # Get the position of a board.
+    #
+    # PARAM [board.Board] brd: the board state
+    # RETURN [(int, int, int)]: the tokens of the player to move, all the
+    #                           tokens, and the number of tokens
+    def position(self, brd):
+        """Returns (tokens of the player to move, all tokens, token count) for brd"""
+        if isinstance(brd, board.BitBoard):
+            cur = brd.bits[brd.player]
+            mask = brd.bits[1] | brd.bits[2]
+        else:
+            (cur, mask) = (0, 0)
+            for y in range(brd.h):
+                for x in range(brd.w):
+                    if brd.board[y][x] != 0:
+                        bit = 1 << (x * (brd.h + 1) + y)
+                        mask |= bit
+                        if brd.board[y][x] == brd.player:
+                            cur |= bit
+        return (cur, mask, bin(mask).count("1"))
+
+    # Pick a column.
+    #
+    # Every move is solved, and the first best one in search order (from
+    # the centre out) is played.
+    #
+    # PARAM [board.Board] brd: the current board state
+    # RETURN [int]: the column where the token must be added
+    def go(self, brd):
+        """Returns the best column for the player to move, playing perfectly"""
+        if self.size != (brd.w, brd.h, brd.n):
+            self.setup(brd.w, brd.h, brd.n)
+        (cur, mask, moves) = self.position(brd)
+        self.nodes = 0
+        self.score = None
+        possible = (mask + self.bottom) & self.board_mask
+        cols = [x for x in self.order if possible & self.col_masks[x]]
+        if (self.max_empty is not None) and (self.cells - moves > self.max_empty):
+            if self.fallback is not None:
+                self.fallback.player = self.player
+                return self.fallback.go(brd)
+            return cols[0]
+        win = self.winning(cur, mask) & possible
+        for x in cols:
+            if win & self.col_masks[x]:
+                self.score = (self.cells + 1 - moves) // 2
+                return x
+        best = None
+        for x in cols:
+            move = possible & self.col_masks[x]
+            score = -self.solve(cur ^ mask, mask | move, moves + 1)
+            if (self.score is None) or (score > self.score):
+                (best, self.score) = (x, score)
+        return best
+
+    # Solve a board.
+    #
+    # PARAM [board.Board] brd: the board state, not over
+    # RETURN [int]: the score of brd for the player to move
+    def solve_board(self, brd):
+        """Returns the game-theoretic score of brd for the player to move"""
+        if self.size != (brd.w, brd.h, brd.n):
+            self.setup(brd.w, brd.h, brd.n)
+        (cur, mask, moves) = self.position(brd)
+        return self.solve(cur, mask, moves)
+
+    # Solve a position with a series of null-window searches that narrow
+    # down the score.
+    #
+    # PARAM [int] cur:   the tokens of the player to move
+    # PARAM [int] mask:  all the tokens
+    # PARAM [int] moves: the number of tokens
+    # RETURN [int]: the score of the position for the player to move
+    def solve(self, cur, mask, moves):
+        """Returns the exact score of a position for the player to move"""
+        if moves >= self.cells:
+            return 0
+        possible = (mask + self.bottom) & self.board_mask
+        if self.winning(cur, mask) & possible:
+            return (self.cells + 1 - moves) // 2
+        lo = -((self.cells - moves) // 2)
+        hi = (self.cells + 1 - moves) // 2
+        while lo < hi:
+            med = lo + (hi - lo) // 2
+            # Search closer to 0 first: most positions are near a draw
+            if (med <= 0) and (int(lo / 2) < med):
+                med = int(lo / 2)
+            elif (med >= 0) and (int(hi / 2) > med):
+                med = int(hi / 2)
+            r = self.negamax(cur, mask, moves, med, med + 1)
+            if r <= med:
+                hi = r
+            else:
+                lo = r
+        return lo
+
+    # Negamax with alpha-beta pruning, for a position where the player to
+    # move cannot win with its next token.
+    #
+    # PARAM [int] cur:   the tokens of the player to move
+    # PARAM [int] mask:  all the tokens
+    # PARAM [int] moves: the number of tokens
+    # PARAM [int] alpha: the lower bound of the window
+    # PARAM [int] beta:  the upper bound of the window
+    # RETURN [int]: the score if inside the window, else a bound on it
+    def negamax(self, cur, mask, moves, alpha, beta):
+        """Returns the score of a position for the player to move, within (alpha, beta)"""
+        self.nodes += 1
+        cells = self.cells
+        opp = cur ^ mask
+        possible = (mask + self.bottom) & self.board_mask
+        # Block the opponent's winning cell; two of them cannot be blocked
+        opp_win = self.winning(opp, mask)
+        forced = possible & opp_win
+        if forced:
+            if forced & (forced - 1):
+                return -((cells - moves) // 2)
+            possible = forced
+        # Do not play right under an opponent's winning cell
+        nxt = possible & ~(opp_win >> 1)
+        if nxt == 0:
+            return -((cells - moves) // 2)
+        if moves >= cells - 2:
+            return 0
+        # The opponent cannot win with its next token
+        lo = -((cells - 2 - moves) // 2)
+        if alpha < lo:
+            alpha = lo
+            if alpha >= beta:
+                return alpha
+        # We cannot win with our next token
+        hi = (cells - 1 - moves) // 2
+        key = cur + mask
+        i = key % self.tt_slots
+        if (self.tt_keys[i] == key) and (self.tt_vals[i] != 0):
+            hi = self.tt_vals[i] + self.min_score - 1
+        if beta > hi:
+            beta = hi
+            if alpha >= beta:
+                return beta
+        # Try the moves that make the most winning cells first, then from
+        # the centre out
+        moves_list = []
+        if nxt & (nxt - 1):
+            winning = self.winning
+            for x in self.order:
+                move = nxt & self.col_masks[x]
+                if move:
+                    threats = bin(winning(cur | move, mask | move)).count("1")
+                    moves_list.append((-threats, len(moves_list), move))
+            moves_list.sort()
+        else:
+            moves_list.append((0, 0, nxt))
+        for (t, j, move) in moves_list:
+            score = -self.negamax(opp, mask | move, moves + 1, -beta, -alpha)
+            if score >= beta:
+                return score
+            if score > alpha:
+                alpha = score
+        self.tt_keys[i] = key
+        self.tt_vals[i] = alpha - self.min_score + 1
+        return alpha
@@ -0,0 +1,84 @@
+import book
+
+#####################
+# Endgame tablebase #
+#####################
+
+# Magic of tablebase files
+MAGIC = b"CNTB"
+
+# Get how good a tablebase value is for the player to move.
+#
+# PARAM [int] value: d > 0 for a win in d plies, -d for a loss in d plies,
+#                    0 for a draw
+# RETURN [int]: a rank, higher for better values: faster wins first, then
+#               draws, then slower losses
+def rank(value):
+    """Returns the rank of a tablebase value, higher is better"""
+    if value > 0:
+        return 1000 - value
+    if value < 0:
+        return -1000 - value
+    return 0
+
+# Get the value of a position from the value of one of its children.
+#
+# PARAM [int] value: the value of the child, for the player to move there
+# RETURN [int]: the value of the move for the player making it
+def parent_value(value):
+    """Returns the value of a move, given the value of the position it leads to"""
+    if value > 0:
+        return -(value + 1)
+    if value < 0:
+        return -value + 1
+    return 0
+
+# Solve every position reachable from a board, and add them to a table.
+#
+# PARAM [board.Board] brd:     the board state, not over; it is restored
+#                              on return
+# PARAM [dict]        entries: canonical key -> (move, value), with the
+#                              move for the position whose hash is the key
+# RETURN [int]: the value of brd for the player to move
+def solve(brd, entries):
+    """Adds brd and the positions below it to entries; returns the value of brd"""
+    key = brd.canonical_key()
+    if key in entries:
+        return entries[key][1]
+    (best, best_value) = (None, None)
+    for x in brd.free_cols():
+        brd.play(x)
+        if brd.get_outcome() != 0:
+            v = 1
+        elif not brd.free_cols():
+            v = 0
+        else:
+            v = parent_value(solve(brd, entries))
+        brd.undo()
+        if (best is None) or (rank(v) > rank(best_value)):
+            (best, best_value) = (x, v)
+    if key != brd.hash:
+        best = brd.w - 1 - best
+    entries[key] = (best, best_value)
+    return best_value
+
+class Tablebase(book.OpeningBook):
+    """Tablebase file of solved endgame positions, in the book file format"""
+
+    # The records hold the best move and the value of the position for the
+    # player to move: d > 0 for a win in d plies, -d for a loss in d plies
+    # (counting the winning token), 0 for a draw. The header limit is the
+    # most empty cells of a position in the table.
+    MAGIC = MAGIC
+
+    # Get the value of a board.
+    #
+    # PARAM [board.Board] brd: the board state
+    # RETURN [int]: the value of brd for the player to move, or None if brd
+    #               is not in the table
+    def value(self, brd):
+        """Returns the value of brd for the player to move, or None"""
+        e = self.probe(brd)
+        if e is None:
+            return None
+        return e[1]
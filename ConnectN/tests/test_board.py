@@ -0,0 +1,128 @@
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import board
+
+#
+# Board and BitBoard against each other and against a full scan of the
+# board, over random games of several sizes
+#
+
+# Board sizes checked: (w, h, n)
+SIZES = [(7, 6, 4), (6, 7, 4), (4, 4, 3), (5, 5, 5), (10, 10, 5), (9, 8, 4)]
+
+# Play random games on both implementations at once.
+#
+# PARAM [random.Random] rng:   the random generator
+# PARAM [int]           w:     the board width
+# PARAM [int]           h:     the board height
+# PARAM [int]           n:     the number of tokens to line up to win
+# PARAM [int]           games: the number of games
+# RETURN [generator of (board.Board, board.Board)]: the boards after each move
+def random_games(rng, w, h, n, games):
+    """Yields (Board, BitBoard) after every move of random games"""
+    for g in range(games):
+        lst = board.new_board(w, h, n, "list")
+        bits = board.new_board(w, h, n, "bitboard")
+        while lst.free_cols() and lst.get_outcome() == 0:
+            x = rng.choice(lst.free_cols())
+            lst.add_token(x)
+            bits.add_token(x)
+            yield (lst, bits)
+
+class BoardTest(unittest.TestCase):
+
+    def test_same_outcomes(self):
+        rng = random.Random(1)
+        for (w, h, n) in SIZES:
+            for (lst, bits) in random_games(rng, w, h, n, 30):
+                self.assertEqual(bits.board, lst.board)
+                self.assertEqual(lst.get_outcome(), lst.scan_outcome())
+                self.assertEqual(bits.get_outcome(), lst.get_outcome())
+                self.assertEqual(bits.scan_outcome(), lst.scan_outcome())
+                self.assertEqual(bits.player, lst.player)
+                self.assertEqual(bits.heights, lst.heights)
+
+    def test_same_winning_cols(self):
+        rng = random.Random(2)
+        for (w, h, n) in SIZES:
+            for (lst, bits) in random_games(rng, w, h, n, 20):
+                if lst.get_outcome() != 0:
+                    continue
+                for p in (1, 2):
+                    cols = lst.winning_cols(p)
+                    self.assertEqual(bits.winning_cols(p), cols)
+                    # A winning column wins when played
+                    for x in cols:
+                        child = lst.copy()
+                        child.player = p
+                        child.add_token(x)
+                        self.assertEqual(child.scan_outcome(), p)
+
+    def test_same_hashes(self):
+        rng = random.Random(3)
+        for (w, h, n) in SIZES:
+            for (lst, bits) in random_games(rng, w, h, n, 10):
+                self.assertEqual(bits.hash, lst.hash)
+                self.assertEqual(bits.mirror_hash, lst.mirror_hash)
+                # The hash is that of the tokens, however they were added
+                fresh = board.Board([row[:] for row in lst.board], w, h, n)
+                self.assertEqual(fresh.hash, lst.hash)
+                self.assertEqual(fresh.mirror_hash, lst.mirror_hash)
+
+    def test_mirror(self):
+        rng = random.Random(4)
+        for (w, h, n) in SIZES:
+            for (lst, bits) in random_games(rng, w, h, n, 10):
+                mirror = board.Board([row[::-1] for row in lst.board], w, h, n)
+                self.assertEqual(mirror.hash, lst.mirror_hash)
+                self.assertEqual(mirror.canonical_key(), lst.canonical_key())
+                self.assertEqual(lst.is_symmetric(), lst.board == mirror.board)
+                self.assertEqual(bits.is_symmetric(), lst.is_symmetric())
+
+    def test_play_undo(self):
+        rng = random.Random(5)
+        for impl in ("list", "bitboard"):
+            for (w, h, n) in SIZES:
+                brd = board.new_board(w, h, n, impl)
+                states = []
+                while brd.free_cols() and brd.get_outcome() == 0:
+                    states.append(([row[:] for row in brd.board], list(brd.heights), brd.player,
+                                   brd.hash, brd.mirror_hash, brd.get_outcome(), brd.last_move))
+                    brd.play(rng.choice(brd.free_cols()))
+                while states:
+                    brd.undo()
+                    self.assertEqual(([row[:] for row in brd.board], list(brd.heights), brd.player,
+                                      brd.hash, brd.mirror_hash, brd.get_outcome(), brd.last_move),
+                                     states.pop())
+
+    def test_full_history(self):
+        for impl in ("list", "bitboard"):
+            brd = board.new_board(7, 6, 4, impl)
+            for x in (3, 3, 2):
+                brd.play(x)
+            self.assertTrue(brd.has_full_history())
+            # Tokens given with the rows are not in the moves
+            rows = [row[:] for row in brd.board]
+            built = board.IMPLEMENTATIONS[impl](rows, 7, 6, 4)
+            self.assertFalse(built.has_full_history())
+            built.play(4)
+            self.assertFalse(built.has_full_history())
+            self.assertTrue(board.new_board(7, 6, 4, impl).has_full_history())
+
+    def test_copy(self):
+        rng = random.Random(6)
+        for (lst, bits) in random_games(rng, 7, 6, 4, 5):
+            for brd in (lst, bits):
+                cpy = brd.copy()
+                self.assertIs(type(cpy), type(brd))
+                if cpy.free_cols() and cpy.get_outcome() == 0:
+                    cpy.add_token(cpy.free_cols()[0])
+                    self.assertNotEqual(cpy.board, brd.board)
+
+if __name__ == "__main__":
+    unittest.main()
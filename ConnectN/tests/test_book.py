@@ -0,0 +1,106 @@
+import os
+import random
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import alpha_beta_agent as aba
+import board
+import book
+import positions
+
+#
+# Opening book files: written with write_book(), read back with mmap and
+# binary search, for positions and their mirrors
+#
+
+# Get the left-right mirror of a board.
+#
+# PARAM [board.Board] brd: the board state
+# RETURN [board.Board]: its mirror, with the same player to move
+def mirror(brd):
+    """Returns the mirror of brd"""
+    m = board.Board([row[::-1] for row in brd.board], brd.w, brd.h, brd.n)
+    m.player = brd.player
+    return m
+
+class BookTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, "test.book")
+        # Store, for each position, its first free column from the left as
+        # seen from the position whose hash is the key
+        self.positions = positions.random_positions(random.Random(9), 7, 6, 4, 200, 1, 10)
+        self.entries = {}
+        self.moves = {}
+        for brd in self.positions:
+            x = brd.free_cols()[0]
+            key = brd.canonical_key()
+            stored = x
+            if key != brd.hash:
+                stored = brd.w - 1 - x
+            self.entries.setdefault(key, (stored, 5))
+            self.moves[key] = self.entries[key][0]
+        book.write_book(self.path, 7, 6, 4, 10, self.entries)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_round_trip(self):
+        b = book.OpeningBook(self.path)
+        try:
+            self.assertEqual((b.w, b.h, b.n, b.limit, b.count), (7, 6, 4, 10, len(self.entries)))
+            for (key, e) in self.entries.items():
+                self.assertEqual(b.lookup(key), e)
+            self.assertIsNone(b.lookup(12345))
+        finally:
+            b.close()
+
+    def test_probe_and_mirror(self):
+        b = book.OpeningBook(self.path)
+        try:
+            for brd in self.positions:
+                x = b.move(brd)
+                self.assertIn(x, brd.free_cols())
+                # The mirror gets the mirrored move, unless it is the same board
+                if brd.is_symmetric():
+                    self.assertEqual(b.move(mirror(brd)), x)
+                else:
+                    self.assertEqual(b.move(mirror(brd)), brd.w - 1 - x)
+                # The move is the one stored, in the board's orientation
+                stored = self.moves[brd.canonical_key()]
+                if brd.canonical_key() != brd.hash:
+                    stored = brd.w - 1 - stored
+                self.assertEqual(x, stored)
+            self.assertIsNone(b.move(board.new_board(6, 6, 4)))
+        finally:
+            b.close()
+
+    def test_bad_files(self):
+        with open(self.path, "rb") as f:
+            data = f.read()
+        with open(self.path, "wb") as f:
+            f.write(data[:-1])
+        with self.assertRaises(ValueError):
+            book.OpeningBook(self.path)
+        book.write_book(self.path, 7, 6, 4, 10, self.entries, b"XXXX")
+        with self.assertRaises(ValueError):
+            book.OpeningBook(self.path)
+
+    def test_agent_plays_from_book(self):
+        a = aba.AlphaBetaAgent("book", 1, book=self.path)
+        b = book.OpeningBook(self.path)
+        try:
+            for brd in self.positions[:20]:
+                a.player = brd.player
+                self.assertEqual(a.go(brd.copy()), b.move(brd))
+        finally:
+            b.close()
+            a.close()
+
+if __name__ == "__main__":
+    unittest.main()
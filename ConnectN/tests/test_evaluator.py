@@ -0,0 +1,106 @@
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import alpha_beta_agent as aba
+import board
+import evaluator
+
+#
+# The incremental evaluators, kept up to date move by move over random
+# games, against heuristic() and against a count of every n-window
+#
+
+# Board sizes checked: (w, h, n)
+SIZES = [(7, 6, 4), (4, 4, 3), (10, 10, 5), (5, 7, 4)]
+
+# Weights checked, in the order of the AlphaBetaAgent constructor
+WEIGHTS = [(3, 0, 1, 1, 1), (3, 1, 2, 1, 1), (2.5, 1.3, 0.7, 1.9, 0.3)]
+
+# Play random games, keeping an evaluator up to date.
+#
+# PARAM [random.Random] rng:   the random generator
+# PARAM [object]        ev:    the evaluator, with reset()/play()/undo()
+# PARAM [int]           w:     the board width
+# PARAM [int]           h:     the board height
+# PARAM [int]           n:     the number of tokens to line up to win
+# PARAM [int]           games: the number of games
+# RETURN [generator of board.Board]: the board after each move and after
+#                                    each move taken back
+def random_games(rng, ev, w, h, n, games):
+    """Yields the board after every move and undo of random games"""
+    for g in range(games):
+        brd = board.new_board(w, h, n)
+        ev.reset(brd)
+        while brd.free_cols() and brd.get_outcome() == 0:
+            p = brd.player
+            brd.play(rng.choice(brd.free_cols()))
+            (x, y) = brd.last_move
+            ev.play(x, y, p)
+            yield brd
+        while brd.moves:
+            x = brd.moves[-1]
+            ev.undo(x, brd.heights[x] - 1)
+            brd.undo()
+            yield brd
+
+# Score a board by counting the tokens in every n-window.
+#
+# PARAM [board.Board] brd:     the board state
+# PARAM [int]         player:  the player the score is for
+# PARAM [tuple]       weights: the five weights
+# RETURN [float]: the score of evaluator.WindowEvaluator
+def window_score(brd, player, weights):
+    """Returns the window evaluation of brd for player, by brute force"""
+    (self_potential, enemy_potential, in_a_row, growth, token_height) = weights
+    factor = [0, 1]
+    for c in range(2, brd.n + 1):
+        factor.append(growth * (factor[-1] + 1))
+    totals = [None, 0, 0]
+    for x in range(brd.w):
+        for y in range(brd.h):
+            for (dx, dy) in ((1, 0), (0, 1), (1, 1), (1, -1)):
+                cells = [(x + i*dx, y + i*dy) for i in range(brd.n)]
+                (ex, ey) = cells[-1]
+                if (ex >= brd.w) or (ey < 0) or (ey >= brd.h):
+                    continue
+                for p in (1, 2):
+                    mine = [(cx, cy) for (cx, cy) in cells if brd.board[cy][cx] == p]
+                    theirs = [(cx, cy) for (cx, cy) in cells if brd.board[cy][cx] == 3 - p]
+                    if (not mine) or theirs:
+                        continue
+                    exposed = len([(cx, cy) for (cx, cy) in mine
+                                   if (cy + 1 < brd.h) and (brd.board[cy + 1][cx] == 0)])
+                    totals[p] += in_a_row * factor[len(mine)] - token_height * exposed
+    return self_potential * totals[player] - enemy_potential * totals[3 - player]
+
+class EvaluatorTest(unittest.TestCase):
+
+    def test_heuristic_evaluator(self):
+        # Same scores as heuristic(), to the last bit, for any weights
+        rng = random.Random(8)
+        for weights in WEIGHTS:
+            a = aba.AlphaBetaAgent("heuristic", 1, *weights)
+            for (w, h, n) in SIZES:
+                ev = evaluator.HeuristicEvaluator(w, h, n, *weights)
+                for brd in random_games(rng, ev, w, h, n, 5):
+                    for player in (1, 2):
+                        a.player = player
+                        self.assertEqual(ev.score(player), a.heuristic(brd), "moves {}".format(brd.moves))
+
+    def test_window_evaluator(self):
+        # Integer weights, so that summing in another order gives the same
+        rng = random.Random(9)
+        for weights in WEIGHTS[:2]:
+            for (w, h, n) in SIZES:
+                ev = evaluator.WindowEvaluator(w, h, n, *weights)
+                for brd in random_games(rng, ev, w, h, n, 5):
+                    for player in (1, 2):
+                        self.assertEqual(ev.score(player), window_score(brd, player, weights),
+                                         "moves {}".format(brd.moves))
+
+if __name__ == "__main__":
+    unittest.main()
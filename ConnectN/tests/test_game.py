@@ -0,0 +1,115 @@
+import os
+import sys
+import tempfile
+import time
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import agent
+import game
+
+#
+# What game.Game tells the agents: the move context for agents that take it,
+# the board only for the others, the end of the game, and the move times
+#
+
+class RecordingAgent(agent.Agent):
+    """Agent that plays the first free column and records its calls"""
+
+    # Class constructor.
+    #
+    # PARAM [string] name:          the name of this player
+    # PARAM [bool]   takes_context: whether go() takes a MoveContext
+    def __init__(self, name, takes_context):
+        """Class constructor"""
+        super().__init__(name)
+        self.takes_context = takes_context
+        # (move count of the board, context) of each call to go()
+        self.calls = []
+        self.ends = 0
+
+    def go(self, brd, *args):
+        self.calls.append((len(brd.moves), args))
+        return brd.free_cols()[0]
+
+    def end_game(self):
+        self.ends += 1
+
+class GameTest(unittest.TestCase):
+
+    def play(self, how):
+        p1 = RecordingAgent("context", True)
+        p2 = RecordingAgent("legacy", False)
+        g = game.Game(4, 4, 3, p1, p2)
+        st = time.perf_counter()
+        if how == "untimed":
+            outcome = g.go()
+        elif how == "timed":
+            outcome = g.timed_go(5)
+        else:
+            (fd, path) = tempfile.mkstemp(suffix=".dat")
+            os.close(fd)
+            try:
+                outcome = g.logged_go(path, 5)
+            finally:
+                os.remove(path)
+        return (g, p1, p2, st, outcome)
+
+    def test_context(self):
+        for how in ("untimed", "timed", "logged"):
+            (g, p1, p2, st, outcome) = self.play(how)
+            self.assertTrue(p1.calls)
+            last = None
+            for (moves, args) in p1.calls:
+                self.assertEqual(len(args), 1)
+                ctx = args[0]
+                self.assertIsInstance(ctx, agent.MoveContext)
+                self.assertEqual(ctx.move_number, moves)
+                if moves > 0:
+                    last = g.board.moves[moves - 1]
+                self.assertEqual(ctx.last_move, last)
+                if how == "untimed":
+                    self.assertIsNone(ctx.deadline)
+                    self.assertIsNone(ctx.limit)
+                    self.assertIsNone(ctx.time_left())
+                else:
+                    self.assertEqual(ctx.limit, 5)
+                    self.assertGreater(ctx.deadline, st)
+                    self.assertLessEqual(ctx.deadline, time.perf_counter() + 5)
+                    self.assertLess(ctx.time_left(), 5)
+
+    def test_legacy_go(self):
+        # An agent that does not take the context is called with the board only
+        for how in ("untimed", "timed", "logged"):
+            (g, p1, p2, st, outcome) = self.play(how)
+            self.assertTrue(p2.calls)
+            for (moves, args) in p2.calls:
+                self.assertEqual(args, ())
+
+    def test_end_game(self):
+        for how in ("untimed", "timed", "logged"):
+            (g, p1, p2, st, outcome) = self.play(how)
+            self.assertEqual((p1.ends, p2.ends), (1, 1))
+
+    def test_end_game_on_illegal_move(self):
+        class FullColumnAgent(RecordingAgent):
+            def go(self, brd, *args):
+                return brd.w
+        p1 = FullColumnAgent("illegal", False)
+        p2 = RecordingAgent("legal", False)
+        self.assertEqual(game.Game(4, 4, 3, p1, p2).go(), 2)
+        self.assertEqual((p1.ends, p2.ends), (1, 1))
+
+    def test_move_times(self):
+        for how in ("untimed", "timed", "logged"):
+            (g, p1, p2, st, outcome) = self.play(how)
+            self.assertEqual(len(g.move_times), len(g.board.moves))
+            for (i, (p, x, wall, cpu)) in enumerate(g.move_times):
+                self.assertEqual(p, 1 + i % 2)
+                self.assertEqual(x, g.board.moves[i])
+                self.assertGreaterEqual(wall, 0)
+                self.assertGreaterEqual(cpu, 0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import board
+import mcts_agent
+
+#
+# Reuse of the MCTS tree from one move to the next: the subtree of the moves
+# played since the last search is kept, anything else starts a new tree
+#
+
+# Get the child of a node reached by a column.
+#
+# PARAM [mcts_agent.MCTSAgent] a:    the agent
+# PARAM [int]                  node: the node
+# PARAM [int]                  col:  the column
+# RETURN [int]: the child, or None if the node has none for col
+def child(a, node, col):
+    """Returns the child of node for col, or None"""
+    for c in range(a.first_child[node], a.first_child[node] + a.child_count[node]):
+        if a.move[c] == col:
+            return c
+    return None
+
+# Get the statistics of a subtree, level by level.
+#
+# PARAM [mcts_agent.MCTSAgent] a:    the agent
+# PARAM [int]                  node: the root of the subtree
+# RETURN [list of list of (int, int, float)]: the (move, visits, reward) of
+#                                             the nodes of each level
+def subtree(a, node):
+    """Returns the statistics of the subtree of node"""
+    levels = []
+    level = [node]
+    while level:
+        levels.append([(a.move[c], a.visits[c], a.reward[c]) for c in level])
+        level = [c for p in level for c in range(a.first_child[p], a.first_child[p] + a.child_count[p])]
+    return levels
+
+class MCTSTest(unittest.TestCase):
+
+    def setUp(self):
+        self.brd = board.new_board(7, 6, 4)
+        for x in (3, 3, 2):
+            self.brd.add_token(x)
+        self.a = mcts_agent.MCTSAgent("mcts", playouts=3000, seed=1)
+        self.a.player = self.brd.player
+        self.x = self.a.go(self.brd.copy())
+
+    # The expected reply to our move: its most visited child
+    def reply(self):
+        node = child(self.a, 0, self.x)
+        best = None
+        for c in range(self.a.first_child[node], self.a.first_child[node] + self.a.child_count[node]):
+            if (best is None) or (self.a.visits[c] > self.a.visits[best]):
+                best = c
+        return (node, best)
+
+    def test_keeps_subtree(self):
+        (node, grandchild) = self.reply()
+        kept = subtree(self.a, grandchild)
+        self.assertGreater(len(kept), 1)
+        nxt = self.brd.copy()
+        nxt.add_token(self.x)
+        nxt.add_token(self.a.move[grandchild])
+        self.a.find_root(nxt)
+        self.assertEqual(subtree(self.a, 0)[1:], kept[1:])
+        self.assertEqual((self.a.visits[0], self.a.reward[0]), kept[0][0][1:])
+        self.assertEqual(self.a.root_moves, nxt.moves)
+        # The search goes on from the kept tree
+        self.assertIn(self.a.go(nxt.copy()), nxt.free_cols())
+        self.assertGreater(self.a.visits[0], kept[0][0][1])
+
+    def test_same_position(self):
+        kept = subtree(self.a, 0)
+        self.a.find_root(self.brd.copy())
+        self.assertEqual(subtree(self.a, 0), kept)
+
+    def test_other_game(self):
+        # Fewer moves, or other moves: a new tree
+        for moves in ([3], [4, 3, 2, 1]):
+            self.a.go(self.brd.copy())
+            other = board.new_board(7, 6, 4)
+            for x in moves:
+                other.add_token(x)
+            self.a.find_root(other)
+            self.assertEqual(subtree(self.a, 0), [[(-1, 0, 0.0)]])
+            self.assertEqual(self.a.root_moves, moves)
+
+    def test_unknown_history(self):
+        # The same moves from a board built with tokens: not the same position
+        built = board.Board([row[:] for row in self.brd.board], 7, 6, 4)
+        built.player = self.brd.player
+        self.a.find_root(built)
+        self.assertEqual(subtree(self.a, 0), [[(-1, 0, 0.0)]])
+        self.assertIsNone(self.a.root_moves)
+        # ...and the next search does not reuse its tree either
+        self.a.go(built.copy())
+        after = self.brd.copy()
+        after.add_token(0)
+        after.add_token(0)
+        self.a.find_root(after)
+        self.assertEqual(subtree(self.a, 0), [[(-1, 0, 0.0)]])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,54 @@
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import parallel_tournament
+
+#
+# Checkpoint files of parallel_tournament.py, including one cut short in
+# the middle of a write
+#
+
+class CheckpointTest(unittest.TestCase):
+
+    def setUp(self):
+        (fd, self.path) = tempfile.mkstemp(suffix=".jsonl")
+        os.close(fd)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def record(self, p1, p2, s1, s2):
+        return json.dumps({"seed": 1, "p1": p1, "p2": p2, "s1": s1, "s2": s2}) + "\n"
+
+    def test_round_trip(self):
+        with open(self.path, "w") as f:
+            f.write(self.record("a", "b", 2, -2))
+            f.write(self.record("a", "c", 0, 0))
+        self.assertEqual(parallel_tournament.read_checkpoint(self.path, 1),
+                         {("a", "b"): (2, -2), ("a", "c"): (0, 0)})
+
+    def test_cut_short(self):
+        with open(self.path, "w") as f:
+            f.write(self.record("a", "b", 2, -2))
+            f.write(self.record("a", "c", 0, 0)[:20])
+        self.assertEqual(parallel_tournament.read_checkpoint(self.path, 1),
+                         {("a", "b"): (2, -2)})
+        # The next result appended must not be lost with the partial line
+        with open(self.path, "a") as f:
+            f.write(self.record("b", "c", -2, 2))
+        self.assertEqual(parallel_tournament.read_checkpoint(self.path, 1),
+                         {("a", "b"): (2, -2), ("b", "c"): (-2, 2)})
+
+    def test_other_seed(self):
+        with open(self.path, "w") as f:
+            f.write(self.record("a", "b", 2, -2))
+        with self.assertRaises(ValueError):
+            parallel_tournament.read_checkpoint(self.path, 2)
+
+if __name__ == "__main__":
+    unittest.main()
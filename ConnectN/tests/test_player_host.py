@@ -0,0 +1,139 @@
+import os
+import random
+import sys
+import time
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import agent
+import board
+import player_host
+import positions
+
+#
+# Hosted players: the request encoding, and the moves forfeited when the
+# hosted agent is late or dies
+#
+
+class FirstColumnAgent(agent.Agent):
+    """Agent that plays the first free column"""
+
+    def go(self, brd):
+        return brd.free_cols()[0]
+
+class SlowAgent(FirstColumnAgent):
+    """Agent that takes a second to answer on a board with one token"""
+
+    def go(self, brd):
+        if len(brd.moves) == 1:
+            time.sleep(1)
+        return super().go(brd)
+
+class CrashingAgent(FirstColumnAgent):
+    """Agent whose process dies on a board with one token"""
+
+    def go(self, brd):
+        if len(brd.moves) == 1:
+            os._exit(1)
+        return super().go(brd)
+
+# Make a board with some moves.
+#
+# PARAM [list of int] moves: the columns to play
+# RETURN [board.Board]: the board
+def played(moves):
+    """Returns a 7x6 board after the given moves"""
+    brd = board.new_board(7, 6, 4)
+    for x in moves:
+        brd.add_token(x)
+    return brd
+
+class EncodingTest(unittest.TestCase):
+
+    def check_round_trip(self, brd, ctx):
+        data = player_host.encode_request(7, brd, 2, ctx)
+        (seq, got, player, got_ctx) = player_host.decode_request(data)
+        self.assertEqual((seq, player), (7, 2))
+        self.assertIs(type(got), type(brd))
+        self.assertEqual((got.w, got.h, got.n, got.player), (brd.w, brd.h, brd.n, brd.player))
+        self.assertEqual(got.board, brd.board)
+        self.assertEqual(got.heights, brd.heights)
+        self.assertEqual(got.hash, brd.hash)
+        self.assertEqual(got.get_outcome(), brd.get_outcome())
+        if brd.has_full_history():
+            self.assertEqual(got.moves, brd.moves)
+        if ctx is None:
+            self.assertEqual(got_ctx.move_number, len(brd.moves))
+            self.assertIsNone(got_ctx.last_move)
+            self.assertIsNone(got_ctx.deadline)
+            self.assertIsNone(got_ctx.limit)
+        else:
+            self.assertEqual((got_ctx.move_number, got_ctx.last_move, got_ctx.limit),
+                             (ctx.move_number, ctx.last_move, ctx.limit))
+            if ctx.deadline is None:
+                self.assertIsNone(got_ctx.deadline)
+            else:
+                self.assertAlmostEqual(got_ctx.deadline, ctx.deadline, delta=0.05)
+
+    def test_round_trip(self):
+        rng = random.Random(11)
+        for impl in ("list", "bitboard"):
+            for (w, h, n) in ((7, 6, 4), (10, 10, 5), (4, 4, 3)):
+                for brd in positions.random_positions(rng, w, h, n, 20, impl=impl):
+                    last = None
+                    if brd.moves:
+                        last = brd.moves[-1]
+                    self.check_round_trip(brd, None)
+                    self.check_round_trip(brd, agent.MoveContext(None, None, len(brd.moves), last))
+                    self.check_round_trip(brd, agent.MoveContext(time.perf_counter() + 3, 5,
+                                                                 len(brd.moves), last))
+                    # A board whose moves are not all of its tokens goes as
+                    # its cells
+                    built = board.IMPLEMENTATIONS[impl]([row[:] for row in brd.board], w, h, n)
+                    built.player = brd.player
+                    if brd.moves:
+                        self.assertFalse(built.has_full_history())
+                    self.check_round_trip(built, None)
+
+class HostTest(unittest.TestCase):
+
+    def test_moves(self):
+        hosted = player_host.HostedAgent(FirstColumnAgent("first"))
+        try:
+            for moves in ([], [0], [0, 0, 0, 0, 0, 0]):
+                ctx = agent.MoveContext(time.perf_counter() + 5, 5, len(moves), None)
+                self.assertEqual(hosted.go(played(moves), ctx), played(moves).free_cols()[0])
+        finally:
+            hosted.close()
+
+    def test_timeout(self):
+        hosted = player_host.HostedAgent(SlowAgent("slow"))
+        try:
+            ctx = agent.MoveContext(time.perf_counter() + 0.2, 0.2, 1, 0)
+            st = time.perf_counter()
+            self.assertEqual(hosted.go(played([0]), ctx), player_host.NO_MOVE)
+            self.assertLess(time.perf_counter() - st, 0.9)
+            self.assertEqual(hosted.timeouts, 1)
+            # The late answer to the forfeited move is dropped
+            ctx = agent.MoveContext(time.perf_counter() + 5, 5, 6, 0)
+            self.assertEqual(hosted.go(played([0] * 6), ctx), 1)
+            self.assertEqual((hosted.timeouts, hosted.crashes), (1, 0))
+        finally:
+            hosted.close()
+
+    def test_crash(self):
+        hosted = player_host.HostedAgent(CrashingAgent("crashing"))
+        try:
+            ctx = agent.MoveContext(time.perf_counter() + 5, 5, 1, 0)
+            self.assertEqual(hosted.go(played([0]), ctx), player_host.NO_MOVE)
+            self.assertEqual(hosted.crashes, 1)
+            # The process was replaced: the next move is played
+            ctx = agent.MoveContext(time.perf_counter() + 5, 5, 2, 0)
+            self.assertEqual(hosted.go(played([0, 1]), ctx), 0)
+            self.assertEqual(hosted.crashes, 1)
+        finally:
+            hosted.close()
+
+if __name__ == "__main__":
+    unittest.main()
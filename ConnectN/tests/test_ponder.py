@@ -0,0 +1,84 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import alpha_beta_agent as aba
+import board
+
+#
+# Pondering: the background search of the expected position, used when the
+# opponent plays the expected reply (a hit) and dropped otherwise (a miss)
+#
+
+# Search depth of the checks
+DEPTH = 3
+
+class PonderTest(unittest.TestCase):
+
+    def setUp(self):
+        self.brd = board.new_board(7, 6, 4)
+        for x in (3, 3, 2):
+            self.brd.add_token(x)
+        self.a = aba.AlphaBetaAgent("ponder", DEPTH, inplace=True, ponder=True)
+        self.a.player = self.brd.player
+        self.choice = self.a.go(self.brd.copy())
+        # The background search is of the position after the expected reply;
+        # let it end, so that it has a choice
+        self.reply = self.a.ponderer.moves[-1]
+        self.a.ponderer.thread.join()
+
+    def tearDown(self):
+        self.a.close()
+
+    # Get the board after our move and a reply.
+    def after(self, reply):
+        brd = self.brd.copy()
+        brd.add_token(self.choice)
+        brd.add_token(reply)
+        return brd
+
+    def test_hit(self):
+        brd = self.after(self.reply)
+        fresh = aba.AlphaBetaAgent("fresh", DEPTH, inplace=True)
+        fresh.player = self.a.player
+        expected = fresh.go(brd.copy())
+        self.assertEqual(self.a.ponderer.choice, expected)
+        self.assertEqual(self.a.go(brd.copy()), expected)
+        self.assertEqual((self.a.ponderer.hits, self.a.ponderer.misses), (1, 0))
+
+    def test_miss(self):
+        other = [x for x in self.brd.free_cols() if x != self.reply][0]
+        brd = self.after(other)
+        self.assertIsNone(self.a.ponderer.take(brd))
+        self.assertEqual((self.a.ponderer.hits, self.a.ponderer.misses), (0, 1))
+        # The result is dropped: taking it again gets nothing
+        self.assertIsNone(self.a.ponderer.take(self.after(self.reply)))
+        self.assertEqual(self.a.ponderer.hits, 0)
+
+    def test_same_moves_other_position(self):
+        # A board built with tokens, then given the same moves, is another
+        # position
+        rows = [[0] * 7 for y in range(6)]
+        rows[0][6] = 1
+        built = board.Board(rows, 7, 6, 4)
+        for x in self.brd.moves + [self.choice, self.reply]:
+            built.add_token(x)
+        self.assertIsNone(self.a.ponderer.take(built))
+        self.assertEqual((self.a.ponderer.hits, self.a.ponderer.misses), (0, 1))
+
+    def test_stopped(self):
+        # A search stopped before its end has no choice to give
+        self.a.ponderer.choice = None
+        self.assertIsNone(self.a.ponderer.take(self.after(self.reply)))
+        self.assertEqual(self.a.ponderer.hits, 1)
+
+    def test_end_game(self):
+        self.a.end_game()
+        self.assertIsNone(self.a.ponderer.thread)
+        self.assertIsNone(self.a.ponderer.take(self.after(self.reply)))
+        self.assertEqual((self.a.ponderer.hits, self.a.ponderer.misses), (0, 0))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,126 @@
+import copy
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import agent
+import scheduler
+
+#
+# Adaptive tournaments: the Glicko update, the Swiss pairings and the
+# elimination of the agents out of contention
+#
+
+# Make a rating.
+#
+# PARAM [float] rating:    the rating
+# PARAM [float] deviation: the rating deviation
+# RETURN [scheduler.Rating]: the rating
+def rated(rating, deviation):
+    """Returns a Rating with the given rating and deviation"""
+    r = scheduler.Rating()
+    (r.rating, r.deviation) = (rating, deviation)
+    return r
+
+# Make a scheduler for some agents; no match is played by the checks.
+#
+# PARAM [int] count: the number of agents
+# PARAM [int] top:   the number of best agents to find
+# RETURN [scheduler.Scheduler]: the scheduler
+def make_scheduler(count, top=1):
+    """Returns a scheduler for count random agents"""
+    ps = [agent.RandomAgent("random-{}".format(i)) for i in range(count)]
+    return scheduler.Scheduler(6, 6, 4, 15, ps, top, workers=1)
+
+class RatingTest(unittest.TestCase):
+
+    def test_symmetric(self):
+        # Swapping the agents and their scores gives the same ratings
+        rng = random.Random(3)
+        for k in range(200):
+            a = rated(rng.uniform(1000, 2000), rng.uniform(30, 350))
+            b = rated(rng.uniform(1000, 2000), rng.uniform(30, 350))
+            games = rng.choice((1, 2, 4))
+            score = rng.randint(0, 2 * games) / 2
+            (a2, b2) = (copy.deepcopy(a), copy.deepcopy(b))
+            scheduler.update_ratings(a, b, score, games)
+            scheduler.update_ratings(b2, a2, games - score, games)
+            for (r, r2) in ((a, a2), (b, b2)):
+                self.assertEqual((r.rating, r.deviation, r.matches),
+                                 (r2.rating, r2.deviation, r2.matches))
+
+    def test_equal_deviations(self):
+        # With the same deviation, one gains what the other loses
+        rng = random.Random(4)
+        for k in range(200):
+            deviation = rng.uniform(30, 350)
+            (ra, rb) = (rng.uniform(1000, 2000), rng.uniform(1000, 2000))
+            (a, b) = (rated(ra, deviation), rated(rb, deviation))
+            scheduler.update_ratings(a, b, rng.randint(0, 4) / 2, 2)
+            self.assertAlmostEqual(a.rating - ra, rb - b.rating, places=6)
+            self.assertAlmostEqual(a.deviation, b.deviation, places=6)
+            self.assertLess(a.deviation, deviation)
+
+    def test_draw(self):
+        # A draw between equal agents leaves their ratings as they were
+        (a, b) = (scheduler.Rating(), scheduler.Rating())
+        scheduler.update_ratings(a, b, 1, 2)
+        self.assertEqual((a.rating, b.rating), (scheduler.INITIAL_RATING, scheduler.INITIAL_RATING))
+        self.assertLess(a.deviation, scheduler.INITIAL_DEVIATION)
+        self.assertEqual((a.matches, b.matches), (1, 1))
+
+class SwissTest(unittest.TestCase):
+
+    def test_no_rematches(self):
+        rng = random.Random(5)
+        for count in (2, 5, 8, 13):
+            s = make_scheduler(count)
+            rounds = 0
+            while True:
+                pairs = s.swiss_pairs()
+                if not pairs:
+                    break
+                seen = [i for pair in pairs for i in pair]
+                self.assertEqual(len(seen), len(set(seen)))
+                for (i, j) in pairs:
+                    self.assertNotIn((min(i, j), max(i, j)), s.played)
+                    self.assertIn(i, s.active)
+                    self.assertIn(j, s.active)
+                # Random results, as play_round() applies them
+                for (i, j) in pairs:
+                    scheduler.update_ratings(s.ratings[i], s.ratings[j], rng.randint(0, 4) / 2, 2)
+                    s.played.add((min(i, j), max(i, j)))
+                rounds += 1
+                self.assertLessEqual(rounds, count * count)
+            # Without eliminations, the rounds end once every pair has played
+            self.assertEqual(len(s.played), count * (count - 1) // 2)
+
+class EliminationTest(unittest.TestCase):
+
+    def test_keeps_top(self):
+        rng = random.Random(6)
+        for k in range(500):
+            count = rng.randint(1, 12)
+            top = rng.randint(1, 4)
+            s = make_scheduler(count, top)
+            s.ratings = [rated(rng.uniform(1000, 2000), rng.uniform(1, 200)) for i in range(count)]
+            s.active = sorted(rng.sample(range(count), rng.randint(1, count)))
+            before = list(s.active)
+            s.eliminate()
+            self.assertGreaterEqual(len(s.active), min(top, len(before)))
+            self.assertTrue(set(s.active) <= set(before))
+            # The top agents by upper bound are never dropped
+            highest = sorted(before, key=lambda i: -s.ratings[i].interval(s.z)[1])[:top]
+            self.assertTrue(set(highest) <= set(s.active))
+
+    def test_drops_clear_losers(self):
+        s = make_scheduler(4, 2)
+        s.ratings = [rated(2000, 10), rated(1900, 10), rated(1500, 10), rated(1000, 10)]
+        s.eliminate()
+        self.assertEqual(s.active, [0, 1])
+
+if __name__ == "__main__":
+    unittest.main()
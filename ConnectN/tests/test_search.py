@@ -0,0 +1,130 @@
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import alpha_beta_agent as aba
+import board
+import positions
+import pvs_agent
+
+#
+# The variants of the alpha-beta search against the board-copying search
+# of alphabeta_decision(), on a fixed suite of 7x6 positions
+#
+
+# Search depth of the checks
+DEPTH = 3
+
+# Ask an agent for its move.
+#
+# PARAM [agent.Agent] a:   the agent
+# PARAM [board.Board] brd: the board state
+# RETURN [int]: the column chosen
+def choose(a, brd):
+    """Returns the move of a on a copy of brd"""
+    a.player = brd.player
+    return a.go(brd.copy())
+
+class SearchTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.positions = positions.random_positions(random.Random(7), 7, 6, 4, 16, 0, 16)
+        base = aba.AlphaBetaAgent("base", DEPTH)
+        cls.expected = []
+        cls.values = []
+        for brd in cls.positions:
+            base.player = brd.player
+            cls.expected.append(base.alphabeta_decision(brd.copy()))
+            cls.values.append({x: base.min_value(child, float('-inf'), float('inf'), 1)
+                               for (child, x) in base.get_successors(brd)})
+
+    # Check that an agent plays the baseline move on every position.
+    def check_same_move(self, a):
+        try:
+            for (brd, x) in zip(self.positions, self.expected):
+                self.assertEqual(choose(a, brd), x, "moves {}".format(brd.moves))
+        finally:
+            a.close()
+
+    # Check that an agent plays a move of the baseline's best value on every
+    # position; searches that order the root moves differently can break
+    # ties differently.
+    def check_same_value(self, a):
+        try:
+            for (brd, values) in zip(self.positions, self.values):
+                x = choose(a, brd)
+                self.assertEqual(values[x], max(values.values()), "moves {}".format(brd.moves))
+        finally:
+            a.close()
+
+    def test_inplace(self):
+        self.check_same_move(aba.AlphaBetaAgent("inplace", DEPTH, inplace=True))
+
+    def test_transposition_table(self):
+        self.check_same_move(aba.AlphaBetaAgent("tt", DEPTH, inplace=True, tt_size_mb=1))
+
+    def test_incremental_evaluator(self):
+        self.check_same_move(aba.AlphaBetaAgent("incremental", DEPTH, inplace=True, incremental_eval=True))
+
+    def test_dynamic_ordering(self):
+        self.check_same_move(aba.AlphaBetaAgent("ordering", DEPTH, inplace=True, tt_size_mb=1,
+                                                dynamic_ordering=True))
+
+    def test_pvs(self):
+        self.check_same_move(pvs_agent.PVSAgent("pvs", DEPTH))
+        self.check_same_move(pvs_agent.PVSAgent("pvs-tt", DEPTH, tt_size_mb=1))
+
+    def test_pvs_window_reset(self):
+        # The first window is only centred on the last score within a game
+        # and for the same side
+        brd = board.new_board(7, 6, 4)
+        for x in (3, 3, 2, 4):
+            brd.add_token(x)
+        a = pvs_agent.PVSAgent("pvs", DEPTH)
+        choose(a, brd)
+        later = brd.copy()
+        for x in (1, 5):
+            later.add_token(x)
+        a.start_search(later)
+        self.assertIsNotNone(a.last_score)
+        # A new game
+        choose(a, later)
+        a.start_search(brd)
+        self.assertIsNone(a.last_score)
+        # The other side
+        choose(a, later)
+        later.add_token(0)
+        a.player = later.player
+        a.start_search(later)
+        self.assertIsNone(a.last_score)
+        # The end of the game
+        choose(a, later)
+        a.end_game()
+        self.assertIsNone(a.last_score)
+
+    def test_parallel_root(self):
+        self.check_same_move(aba.AlphaBetaAgent("parallel", DEPTH, workers=2))
+
+    def test_iterative_deepening(self):
+        self.check_same_value(aba.AlphaBetaAgent("deepening", DEPTH, move_time=1000, tt_size_mb=1))
+
+    def test_lazy_smp(self):
+        self.check_same_value(aba.AlphaBetaAgent("smp", DEPTH, smp_helpers=1, tt_size_mb=1))
+
+    def test_threats(self):
+        a = aba.AlphaBetaAgent("threats", DEPTH, inplace=True, threats=True)
+        for brd in self.positions:
+            x = choose(a, brd)
+            wins = brd.winning_cols(brd.player)
+            blocks = brd.winning_cols(3 - brd.player)
+            if wins:
+                self.assertIn(x, wins)
+            elif blocks:
+                self.assertIn(x, blocks)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import board
+import positions
+import solver_agent
+
+#
+# SolverAgent values against a plain negamax over Board, for several board
+# sizes and numbers of tokens to line up
+#
+
+# Solve a board by trying every move, with the scores of SolverAgent.
+#
+# PARAM [board.Board] brd:  the board state, not over
+# PARAM [dict]        memo: the scores of the positions already solved
+# RETURN [int]: the score of brd for the player to move
+def brute_force(brd, memo):
+    """Returns the score of brd for the player to move"""
+    key = tuple(tuple(row) for row in brd.board)
+    if key in memo:
+        return memo[key]
+    moves = len(brd.moves)
+    best = None
+    for x in brd.free_cols():
+        child = brd.copy()
+        child.add_token(x)
+        if child.get_outcome() != 0:
+            score = (brd.w * brd.h + 1 - moves) // 2
+        elif not child.free_cols():
+            score = 0
+        else:
+            score = -brute_force(child, memo)
+        if (best is None) or (score > best):
+            best = score
+    memo[key] = best
+    return best
+
+class SolverTest(unittest.TestCase):
+
+    def check(self, solver, w, h, n):
+        memo = {}
+        rng = random.Random("{}x{}x{}".format(w, h, n))
+        for brd in positions.random_positions(rng, w, h, n, 25, w * h // 2, impl="list"):
+            self.assertEqual(solver.solve_board(brd), brute_force(brd, memo),
+                             "{}x{} n={}, moves {}".format(w, h, n, brd.moves))
+
+    def test_values(self):
+        for (w, h, n) in [(4, 4, 3), (4, 4, 4), (5, 4, 4), (4, 5, 3)]:
+            self.check(solver_agent.SolverAgent("solver", tt_size_mb=1), w, h, n)
+
+    def test_reuse_across_n(self):
+        # One solver for several sizes: nothing of a size may leak into the next
+        solver = solver_agent.SolverAgent("solver", tt_size_mb=1)
+        for (w, h, n) in [(4, 4, 4), (4, 4, 3), (5, 4, 4), (4, 5, 3), (4, 4, 4)]:
+            self.check(solver, w, h, n)
+
+    def test_bitboard_position(self):
+        solver = solver_agent.SolverAgent("solver", tt_size_mb=1)
+        for brd in positions.random_positions(random.Random("5x4x4"), 5, 4, 4, 20, 6, impl="list"):
+            bits = board.new_board(5, 4, 4, "bitboard")
+            for x in brd.moves:
+                bits.add_token(x)
+            self.assertEqual(solver.solve_board(bits), solver.solve_board(brd))
+
+    def test_go_plays_a_best_move(self):
+        solver = solver_agent.SolverAgent("solver", tt_size_mb=1)
+        memo = {}
+        for brd in positions.random_positions(random.Random("4x4x3"), 4, 4, 3, 20, 5, impl="list"):
+            solver.player = brd.player
+            x = solver.go(brd)
+            self.assertEqual(solver.score, brute_force(brd, memo))
+            child = brd.copy()
+            child.add_token(x)
+            if (child.get_outcome() == 0) and child.free_cols():
+                self.assertEqual(-brute_force(child, memo), solver.score)
+
+if __name__ == "__main__":
+    unittest.main()
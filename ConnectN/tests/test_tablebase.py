@@ -0,0 +1,159 @@
+import os
+import random
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import alpha_beta_agent as aba
+import board
+import book
+import tablebase
+
+#
+# Endgame tablebases: solve() against a plain search of every line of play,
+# and the values and moves read back from the file
+#
+
+# Most empty cells of the positions solved
+EMPTY = 9
+
+# Make random 4x4 positions with few empty cells where neither player can
+# win at once.
+#
+# PARAM [int] count: the number of positions
+# RETURN [list of board.Board]: the positions
+def random_positions(count):
+    """Returns count random 4x4 positions with EMPTY empty cells and no threat"""
+    rng = random.Random(10)
+    positions = []
+    while len(positions) < count:
+        brd = board.new_board(4, 4, 3)
+        for i in range(16 - EMPTY):
+            if brd.get_outcome() != 0:
+                break
+            cols = [x for x in brd.free_cols() if x not in brd.winning_cols(brd.player)]
+            if not cols:
+                break
+            brd.play(rng.choice(cols))
+        if ((brd.get_outcome() == 0) and (len(brd.moves) == 16 - EMPTY) and
+            not brd.winning_cols(1) and not brd.winning_cols(2)):
+            positions.append(brd)
+    return positions
+
+# Solve a board by searching every line of play.
+#
+# PARAM [board.Board] brd: the board state, not over; it is restored on
+#                          return
+# RETURN [int]: the value of brd for the player to move, as in tablebase.py
+def plain_value(brd):
+    """Returns the value of brd by a full search"""
+    best = None
+    for x in brd.free_cols():
+        brd.play(x)
+        if brd.get_outcome() != 0:
+            v = 1
+        elif not brd.free_cols():
+            v = 0
+        else:
+            v = tablebase.parent_value(plain_value(brd))
+        brd.undo()
+        if (best is None) or (tablebase.rank(v) > tablebase.rank(best)):
+            best = v
+    return best
+
+# Get the value of playing a column.
+#
+# PARAM [board.Board]         brd:   the board state, not over
+# PARAM [int]                 x:     the column
+# PARAM [tablebase.Tablebase] table: the table holding the child of brd
+# RETURN [int]: the value of the move for the player making it
+def move_value(brd, x, table):
+    """Returns the value of playing x in brd, looked up in table"""
+    brd.play(x)
+    try:
+        if brd.get_outcome() != 0:
+            return 1
+        if not brd.free_cols():
+            return 0
+        return tablebase.parent_value(table.value(brd))
+    finally:
+        brd.undo()
+
+class TablebaseTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.dir = tempfile.mkdtemp()
+        cls.path = os.path.join(cls.dir, "test.tb")
+        cls.positions = random_positions(8)
+        cls.entries = {}
+        cls.values = [tablebase.solve(brd, cls.entries) for brd in cls.positions]
+        book.write_book(cls.path, 4, 4, 3, EMPTY, cls.entries, tablebase.MAGIC)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.dir)
+
+    def test_values(self):
+        for (brd, v) in zip(self.positions, self.values):
+            self.assertEqual(v, plain_value(brd), "moves {}".format(brd.moves))
+
+    def test_round_trip(self):
+        table = tablebase.Tablebase(self.path)
+        try:
+            self.assertEqual((table.w, table.h, table.n, table.limit, table.count),
+                             (4, 4, 3, EMPTY, len(self.entries)))
+            for (key, e) in self.entries.items():
+                self.assertEqual(table.lookup(key), e)
+            for (brd, v) in zip(self.positions, self.values):
+                self.assertEqual(table.value(brd), v)
+        finally:
+            table.close()
+
+    def test_moves(self):
+        # The stored move gets the stored value, and no move does better,
+        # in every position below the roots
+        table = tablebase.Tablebase(self.path)
+        try:
+            stack = [brd.copy() for brd in self.positions]
+            seen = set()
+            while stack:
+                brd = stack.pop()
+                if brd.canonical_key() in seen:
+                    continue
+                seen.add(brd.canonical_key())
+                v = table.value(brd)
+                x = table.move(brd)
+                self.assertIn(x, brd.free_cols())
+                self.assertEqual(move_value(brd, x, table), v)
+                for y in brd.free_cols():
+                    self.assertLessEqual(tablebase.rank(move_value(brd, y, table)), tablebase.rank(v))
+                    child = brd.copy()
+                    child.play(y)
+                    if (child.get_outcome() == 0) and child.free_cols():
+                        stack.append(child)
+            self.assertEqual(len(seen), len(self.entries))
+        finally:
+            table.close()
+
+    def test_bad_magic(self):
+        with self.assertRaises(ValueError):
+            book.OpeningBook(self.path)
+
+    def test_agent_plays_from_table(self):
+        a = aba.AlphaBetaAgent("tablebase", 1, tablebase=self.path)
+        table = tablebase.Tablebase(self.path)
+        try:
+            for brd in self.positions:
+                a.player = brd.player
+                x = a.go(brd.copy())
+                self.assertEqual(move_value(brd, x, table), table.value(brd))
+        finally:
+            table.close()
+            a.close()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import agent
+import tune
+
+#
+# SPSA tuning in one process: the weights, perturbed or not, stay within
+# [LOWEST, HIGHEST], and every evaluation is logged
+#
+
+class FirstColumnAgent(agent.Agent):
+    """Agent that plays the first free column"""
+
+    def go(self, brd):
+        return brd.free_cols()[0]
+
+class TuneTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.log = os.path.join(self.dir, "tune.log")
+        self.pool = [FirstColumnAgent("first")]
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def records(self):
+        with open(self.log) as f:
+            return [json.loads(line) for line in f]
+
+    def check_bounds(self, weights):
+        self.assertEqual(len(weights), len(tune.WEIGHTS))
+        for x in weights:
+            self.assertGreaterEqual(x, tune.LOWEST)
+            self.assertLessEqual(x, tune.HIGHEST)
+
+    def test_clamped(self):
+        # Scores that favour the larger weight sum, with a step large enough
+        # to throw every weight far out of range
+        def play(task):
+            (weights, i, seed) = task
+            if sum(weights) > 25:
+                return 2
+            return -2
+        for start in ([5, 5, 5, 5, 5], [0, 10, 0, 10, 0]):
+            t = tune.Tuner(4, 4, 3, 5, 1, self.pool, self.log, workers=1, a=1000, c=2)
+            with mock.patch.object(tune, "play_candidate", play):
+                (weights, score) = t.run(start, 1)
+            self.check_bounds(weights)
+            self.assertTrue(all(x in (tune.LOWEST, tune.HIGHEST) for x in weights))
+            for r in self.records():
+                self.check_bounds([r["weights"][name] for name in tune.WEIGHTS])
+            os.remove(self.log)
+
+    def test_one_iteration(self):
+        t = tune.Tuner(4, 4, 3, 5, 1, self.pool, self.log, workers=1)
+        (weights, score) = t.run([3, 0, 1, 1, 1], 1)
+        self.check_bounds(weights)
+        self.assertGreaterEqual(score, -1)
+        self.assertLessEqual(score, 1)
+        # Two perturbed vectors and the final one, two games each
+        self.assertEqual(t.games, 6)
+        self.assertEqual([r["kind"] for r in self.records()], ["plus", "minus", "final"])
+        self.assertEqual(self.records()[-1]["weights"], dict(zip(tune.WEIGHTS, weights)))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -103,48 +103,61 @@ def play_tournament(w, h, n, l, ps):
         print(v,k)
 
 #######################
-# Run the tournament! #
+# Tournament entrants #
 #######################
 
-# Set random seed for reproducibility
-random.seed(1)
+# Make the agents of the tournament.
+#
+# PARAM [int] depth: the search depth of the alpha-beta agents
+# RETURN [list of agent.Agent]: the agents
+def make_agents(depth):
+    # agents = [
+    #     aba.AlphaBetaAgent("alpha-beta-3-2-3-1-1", depth, 3, 2, 3, 1, 1),
+    #     aba.AlphaBetaAgent("alpha-beta-3-2-2-1-1", depth, 3, 2, 2, 1, 1),
+    #     aba.AlphaBetaAgent("alpha-beta-3-1-2-1-1", depth, 3, 1, 2, 1, 1),
+        
+    #     aba.AlphaBetaAgent("alpha-beta-3-0-1-1-1", depth, 3, 0, 1, 1, 1),
+    #     aba.AlphaBetaAgent("alpha-beta-3-3-1-1-1", depth, 3, 3, 1, 1, 1),
+
+    #     aba.AlphaBetaAgent("alpha-beta-4-0-2-1-1", depth, 4,0,2,1,1),
+    #     aba.AlphaBetaAgent("alpha-beta-1-0-2-1-1", depth, 1,0,2,1,1),
+    #     agent.RandomAgent("poor-random-guy :(")
+    # ]
+    # agents = [ aba.AlphaBetaAgent("alpha-beta-" + str(a) + "-" + str(b) + "-" + str(c) + "-" + str(d) + "-" + str(e), depth, a, b, c, d, e) 
+    # for a in [3]
+    # for b in range(0,4) 
+    # for c in range(1,4) 
+    # for d in [1]
+    # for e in range(0,2)
+    # ]
+
+    d = 1
+    e = 1
 
-depth = 4
-# Construct list of agents in the tournament
-# agents = [
-#     aba.AlphaBetaAgent("alpha-beta-3-2-3-1-1", depth, 3, 2, 3, 1, 1),
-#     aba.AlphaBetaAgent("alpha-beta-3-2-2-1-1", depth, 3, 2, 2, 1, 1),
-#     aba.AlphaBetaAgent("alpha-beta-3-1-2-1-1", depth, 3, 1, 2, 1, 1),
-    
-#     aba.AlphaBetaAgent("alpha-beta-3-0-1-1-1", depth, 3, 0, 1, 1, 1),
-#     aba.AlphaBetaAgent("alpha-beta-3-3-1-1-1", depth, 3, 3, 1, 1, 1),
+    agents = [ aba.AlphaBetaAgent("alpha-beta-" + str(a) + "-" + str(b) + "-" + str(c) + "-" + str(d) + "-" + str(e), depth, a, b, c, d, e) 
+    for a in range(3,4)
+    for b in range(0,2) 
+    for c in range(1,3) 
+    ]
 
-#     aba.AlphaBetaAgent("alpha-beta-4-0-2-1-1", depth, 4,0,2,1,1),
-#     aba.AlphaBetaAgent("alpha-beta-1-0-2-1-1", depth, 1,0,2,1,1),
-#     agent.RandomAgent("poor-random-guy :(")
-# ]
-# agents = [ aba.AlphaBetaAgent("alpha-beta-" + str(a) + "-" + str(b) + "-" + str(c) + "-" + str(d) + "-" + str(e), depth, a, b, c, d, e) 
-# for a in [3]
-# for b in range(0,4) 
-# for c in range(1,4) 
-# for d in [1]
-# for e in range(0,2)
-# ]
+    agents.append(agent.RandomAgent("poor-random-guy :("))
+    agents.append(aba.AlphaBetaAgent("defaults", depth))
+    return agents
 
-d = 1
-e = 1
+#######################
+# Run the tournament! #
+#######################
 
-agents = [ aba.AlphaBetaAgent("alpha-beta-" + str(a) + "-" + str(b) + "-" + str(c) + "-" + str(d) + "-" + str(e), depth, a, b, c, d, e) 
-for a in range(3,4)
-for b in range(0,2) 
-for c in range(1,3) 
-]
+if __name__ == "__main__":
+    # Set random seed for reproducibility
+    random.seed(1)
 
-agents.append(agent.RandomAgent("poor-random-guy :("))
-agents.append(aba.AlphaBetaAgent("defaults", depth))
-# Run! 
-play_tournament(6,      # board width
-                6,      # board height
-                4,      # tokens in a row to win
-                15,     # time limit in seconds
-                agents) # player list
+    depth = 4
+    # Construct list of agents in the tournament
+    agents = make_agents(depth)
+    # Run! 
+    play_tournament(6,      # board width
+                    6,      # board height
+                    4,      # tokens in a row to win
+                    15,     # time limit in seconds
+                    agents) # player list
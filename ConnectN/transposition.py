@@ -0,0 +1,287 @@
+import struct
+from multiprocessing import shared_memory
+
+#######################
+# Transposition table #
+#######################
+
+# Bound types of a stored score
+EXACT = 0 # the score is the value of the position
+LOWER = 1 # the value of the position is at least the score
+UPPER = 2 # the value of the position is at most the score
+
+# Get the bound type of a score returned by an alpha-beta search.
+#
+# PARAM [float] score: the score returned by the search
+# PARAM [float] alpha: the alpha the search was called with
+# PARAM [float] beta:  the beta the search was called with
+# RETURN [int]: EXACT, LOWER or UPPER
+def bound(score, alpha, beta):
+    """Returns the bound type of a score found with window (alpha, beta)"""
+    if score <= alpha:
+        return UPPER
+    if score >= beta:
+        return LOWER
+    return EXACT
+
+# Approximate memory taken by one slot: the list pointer, the entry tuple
+# and the int/float objects it holds
+ENTRY_BYTES = 160
+
+# Available replacement policies
+POLICIES = ("always", "depth", "buckets")
+
+class TranspositionTable(object):
+    """Bounded table of search results, indexed by Zobrist hash"""
+
+    # Class constructor.
+    #
+    # The replacement policies are:
+    #  - "always":  a new entry always replaces the one in its slot
+    #  - "depth":   a new entry replaces the one in its slot only if it was
+    #               searched at least as deep, or is for the same position
+    #  - "buckets": each key maps to a bucket of two slots, one kept with the
+    #               "depth" policy and one with the "always" policy
+    #
+    # PARAM [float]  size_mb: the approximate memory budget in MB
+    # PARAM [string] policy:  the replacement policy
+    def __init__(self, size_mb=16, policy="buckets"):
+        """Class constructor"""
+        if policy not in POLICIES:
+            raise ValueError("Unknown replacement policy: {}".format(policy))
+        # Replacement policy
+        self.policy = policy
+        # Number of slots, at least one bucket
+        self.size = max(2, int(size_mb * 1024 * 1024) // ENTRY_BYTES)
+        if policy == "buckets":
+            self.size -= self.size % 2
+        # Slots: None or (key, depth, score, flag, move)
+        self.slots = [None] * self.size
+        self.reset_counters()
+
+    # Empty the table and reset the statistics.
+    def clear(self):
+        """Removes all entries and resets the counters"""
+        self.slots = [None] * self.size
+        self.reset_counters()
+
+    # Reset the statistics.
+    def reset_counters(self):
+        """Resets the counters"""
+        self.hits = 0       # probes that found their position
+        self.misses = 0     # probes that did not (including collisions)
+        self.collisions = 0 # probes that found another position in the slot
+        self.stores = 0     # entries written
+        self.overwrites = 0 # entries written over another position
+
+    # Look up a position.
+    #
+    # PARAM [int] key: the Zobrist hash of the position
+    # RETURN [tuple]: the entry (key, depth, score, flag, move), or None
+    def probe(self, key):
+        """Returns the entry stored for key, or None"""
+        if self.policy == "buckets":
+            i = (key % (self.size // 2)) * 2
+            e = self.read(i)
+            if (e is None) or (e[0] != key):
+                e = self.read(i + 1)
+        else:
+            e = self.read(key % self.size)
+        if e is None:
+            self.misses += 1
+            return None
+        if e[0] != key:
+            self.misses += 1
+            self.collisions += 1
+            return None
+        self.hits += 1
+        return e
+
+    # Store a search result.
+    #
+    # PARAM [int]   key:   the Zobrist hash of the position
+    # PARAM [int]   depth: the depth the position was searched to
+    # PARAM [float] score: the score found
+    # PARAM [int]   flag:  EXACT, LOWER or UPPER
+    # PARAM [int]   move:  the best column found, or None
+    def store(self, key, depth, score, flag, move):
+        """Stores a search result for key, according to the replacement policy"""
+        entry = (key, depth, score, flag, move)
+        if self.policy == "always":
+            i = key % self.size
+        elif self.policy == "depth":
+            i = key % self.size
+            e = self.read(i)
+            if (e is not None) and (e[0] != key) and (e[1] > depth):
+                return
+        else:
+            # Keep the deeper entry in the first slot and push the other one
+            # to the always-replace slot
+            i = (key % (self.size // 2)) * 2
+            e = self.read(i)
+            if (e is not None) and (e[0] != key) and (e[1] > depth):
+                i = i + 1
+        old = self.read(i)
+        if (old is not None) and (old[0] != key):
+            self.overwrites += 1
+        self.write(i, entry)
+        self.stores += 1
+
+    # Read a slot.
+    #
+    # PARAM [int] i: the slot index
+    # RETURN [tuple]: the entry (key, depth, score, flag, move), or None
+    def read(self, i):
+        """Returns the entry in slot i, or None"""
+        return self.slots[i]
+
+    # Write a slot.
+    #
+    # PARAM [int]   i:     the slot index
+    # PARAM [tuple] entry: the entry (key, depth, score, flag, move)
+    def write(self, i, entry):
+        """Puts entry in slot i"""
+        self.slots[i] = entry
+
+    # Get the share of probes that found their position.
+    #
+    # RETURN [float]: hits / probes, 0 if there was no probe
+    def hit_rate(self):
+        """Returns the share of probes that found their position"""
+        probes = self.hits + self.misses
+        if probes == 0:
+            return 0
+        return self.hits / probes
+
+    # Get the share of slots in use.
+    #
+    # RETURN [float]: the share of non-empty slots
+    def fill_rate(self):
+        """Returns the share of slots holding an entry"""
+        return (self.size - self.slots.count(None)) / self.size
+
+    # Get the table statistics.
+    #
+    # RETURN [dict]: the counters, hit rate and fill rate
+    def stats(self):
+        """Returns the table counters as a dictionary"""
+        return {
+            "size":       self.size,
+            "hits":       self.hits,
+            "misses":     self.misses,
+            "collisions": self.collisions,
+            "stores":     self.stores,
+            "overwrites": self.overwrites,
+            "hit_rate":   self.hit_rate(),
+            "fill_rate":  self.fill_rate(),
+        }
+
+
+##############################
+# Shared transposition table #
+##############################
+
+# Binary layout of a shared table entry: three unsigned 64-bit words
+#  - check: key ^ data ^ meta, so that an entry torn by a concurrent write
+#           does not match its key
+#  - data:  the bits of the score, a double
+#  - meta:  VALID | (depth + DEPTH_BIAS) | flag << 16 | (move + 1) << 24,
+#           with move + 1 = 0 for no move
+ENTRY = struct.Struct("<QQQ")
+DOUBLE = struct.Struct("<d")
+WORD = struct.Struct("<Q")
+VALID = 1 << 63
+DEPTH_BIAS = 1 << 15
+
+class SharedTranspositionTable(TranspositionTable):
+    """Transposition table in shared memory, usable by several processes"""
+
+    # Class constructor.
+    #
+    # The table is created if no name is given, and attached to otherwise.
+    # Reads and writes take no lock: each entry is checked against its key,
+    # so a torn entry reads as a miss. The counters are per process.
+    #
+    # PARAM [float]  size_mb: the memory budget in MB
+    # PARAM [string] policy:  the replacement policy, see TranspositionTable
+    # PARAM [string] name:    the name of the shared memory block to attach
+    #                         to, or None to create one
+    def __init__(self, size_mb=16, policy="buckets", name=None):
+        """Class constructor"""
+        if policy not in POLICIES:
+            raise ValueError("Unknown replacement policy: {}".format(policy))
+        self.policy = policy
+        self.size_mb = size_mb
+        self.size = max(2, int(size_mb * 1024 * 1024) // ENTRY.size)
+        if policy == "buckets":
+            self.size -= self.size % 2
+        self.owner = name is None
+        if self.owner:
+            self.shm = shared_memory.SharedMemory(create=True, size=self.size * ENTRY.size)
+            self.shm.buf[:self.size * ENTRY.size] = bytes(self.size * ENTRY.size)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+        self.name = self.shm.name
+        self.buf = self.shm.buf
+        self.reset_counters()
+
+    # Pickle the table as its name, to attach to it on unpickling.
+    def __getstate__(self):
+        return (self.size_mb, self.policy, self.name)
+
+    def __setstate__(self, state):
+        (size_mb, policy, name) = state
+        self.__init__(size_mb, policy, name)
+
+    # Empty the table and reset the statistics.
+    def clear(self):
+        """Removes all entries and resets the counters"""
+        self.buf[:self.size * ENTRY.size] = bytes(self.size * ENTRY.size)
+        self.reset_counters()
+
+    # Read a slot.
+    #
+    # PARAM [int] i: the slot index
+    # RETURN [tuple]: the entry (key, depth, score, flag, move), or None
+    def read(self, i):
+        """Returns the entry in slot i, or None"""
+        (check, data, meta) = ENTRY.unpack_from(self.buf, i * ENTRY.size)
+        if meta == 0:
+            return None
+        move = ((meta >> 24) & 0xFFFF) - 1
+        if move < 0:
+            move = None
+        return (check ^ data ^ meta, (meta & 0xFFFF) - DEPTH_BIAS,
+                DOUBLE.unpack(WORD.pack(data))[0], (meta >> 16) & 0xFF, move)
+
+    # Write a slot.
+    #
+    # PARAM [int]   i:     the slot index
+    # PARAM [tuple] entry: the entry (key, depth, score, flag, move)
+    def write(self, i, entry):
+        """Puts entry in slot i"""
+        (key, depth, score, flag, move) = entry
+        if move is None:
+            move = -1
+        data = WORD.unpack(DOUBLE.pack(score))[0]
+        meta = VALID | (depth + DEPTH_BIAS) | (flag << 16) | ((move + 1) << 24)
+        ENTRY.pack_into(self.buf, i * ENTRY.size, key ^ data ^ meta, data, meta)
+
+    # Get the share of slots in use.
+    #
+    # RETURN [float]: the share of non-empty slots
+    def fill_rate(self):
+        """Returns the share of slots holding an entry"""
+        used = 0
+        for (check, data, meta) in ENTRY.iter_unpack(self.buf[:self.size * ENTRY.size]):
+            if meta != 0:
+                used += 1
+        return used / self.size
+
+    # Detach from the table, and free it if this process created it.
+    def close(self):
+        """Releases the shared memory block"""
+        self.buf = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
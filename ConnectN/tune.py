@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+
+import copy
+import json
+import multiprocessing
+import random
+import sys
+import agent
+import alpha_beta_agent as aba
+import tournament
+
+#
+# Tune the five heuristic weights of AlphaBetaAgent with SPSA: each
+# iteration plays two perturbed weight vectors against a fixed pool of
+# reference agents, in parallel, and moves the weights along the estimated
+# gradient of the score. Every evaluation is logged to a JSON lines file.
+#
+# Usage: tune.py <log file> [iterations] [workers] [seed]
+#
+
+# The weights, in the order of the AlphaBetaAgent constructor
+WEIGHTS = ["weight_self_potential", "weight_enemy_potential", "weight_in_a_row",
+           "multiplier_growth_rate", "weight_token_height"]
+
+# Range of every weight
+LOWEST = 0.0
+HIGHEST = 10.0
+
+#############################
+# Games in a worker process #
+#############################
+
+# State of a worker process, set by init_worker(): the reference agents and
+# the game settings (w, h, n, l, depth)
+WORKER_POOL = None
+WORKER_SETTINGS = None
+
+# Set up a worker process.
+#
+# PARAM [list of agent.Agent] pool:     the reference agents
+# PARAM [tuple]               settings: (w, h, n, l, depth), the board, the
+#                                       time limit and the search depth of
+#                                       the candidates
+def init_worker(pool, settings):
+    """Stores the reference agents and the game settings in the worker"""
+    global WORKER_POOL, WORKER_SETTINGS
+    WORKER_POOL = pool
+    WORKER_SETTINGS = settings
+
+# Make an agent with given weights. It scores positions with heuristic(),
+# as the default agent (THE_AGENT) does, so that the weights found apply to
+# it. It searches in place with a table to play the games faster.
+#
+# PARAM [string]         name:    the name of the agent
+# PARAM [int]            depth:   the search depth
+# PARAM [list of float]  weights: the weights, in WEIGHTS order
+# RETURN [alpha_beta_agent.AlphaBetaAgent]: the agent
+def make_candidate(name, depth, weights):
+    """Returns an in-place alpha-beta agent with the given weights"""
+    return aba.AlphaBetaAgent(name, depth, *weights, inplace=True, tt_size_mb=4)
+
+# Play a match between a candidate and a reference agent.
+#
+# PARAM [tuple] task: (weights, index of the reference agent, seed)
+# RETURN [int]: the candidate's score, from -2 to 2
+def play_candidate(task):
+    """Plays a candidate against a reference agent; returns its score"""
+    (weights, i, seed) = task
+    (w, h, n, l, depth) = WORKER_SETTINGS
+    candidate = make_candidate("candidate", depth, weights)
+    opponent = copy.deepcopy(WORKER_POOL[i])
+    random.seed(seed)
+    try:
+        (s1, s2) = tournament.play_match(w, h, n, l, candidate, opponent)
+    finally:
+        for p in (candidate, opponent):
+            if hasattr(p, "close"):
+                p.close()
+    return s1
+
+########
+# SPSA #
+########
+
+class Tuner(object):
+    """Simultaneous perturbation stochastic approximation over the weights"""
+
+    # Class constructor.
+    #
+    # PARAM [int]                 w:       the board width
+    # PARAM [int]                 h:       the board height
+    # PARAM [int]                 n:       the number of tokens to line up to win
+    # PARAM [int]                 l:       the time limit for a move in seconds
+    # PARAM [int]                 depth:   the search depth of the candidates
+    # PARAM [list of agent.Agent] pool:    the reference agents
+    # PARAM [string]              log:     the JSON lines file to log to
+    # PARAM [int]                 workers: the number of processes, None for
+    #                                      one per core
+    # PARAM [int]                 seed:    the seed of the perturbations and
+    #                                      of the games
+    # PARAM [float]               a:       the step size of the first
+    #                                      iteration (before stability)
+    # PARAM [float]               c:       the perturbation size of the first
+    #                                      iteration
+    def __init__(self, w, h, n, l, depth, pool, log, workers=None, seed=1, a=0.5, c=0.5):
+        """Class constructor"""
+        self.settings = (w, h, n, l, depth)
+        self.pool = pool
+        self.log = log
+        self.workers = workers
+        self.seed = seed
+        self.rng = random.Random(seed)
+        (self.a, self.c) = (a, c)
+        self.games = 0
+        # Best evaluation so far: (score, weights)
+        self.best = None
+
+    # Score weight vectors against the reference pool, all in one batch.
+    #
+    # Every vector plays every reference agent once (two games), with the
+    # same seed for the same iteration and agent, so that the vectors of an
+    # iteration face the same random moves.
+    #
+    # PARAM [list of list of float] candidates: the weight vectors
+    # PARAM [int]                   iteration:  the iteration number
+    # PARAM [multiprocessing.Pool]  workers:    the worker pool, or None to
+    #                                           play here
+    # RETURN [list of float]: the mean score of each vector, from -1 to 1
+    def evaluate(self, candidates, iteration, workers):
+        """Returns the scores of the weight vectors against the pool"""
+        tasks = []
+        for weights in candidates:
+            for (i, p) in enumerate(self.pool):
+                tasks.append((weights, i, "{}:{}:{}".format(self.seed, iteration, p.name)))
+        if workers is None:
+            results = list(map(play_candidate, tasks))
+        else:
+            results = workers.map(play_candidate, tasks, chunksize=1)
+        self.games += 2 * len(tasks)
+        k = len(self.pool)
+        return [sum(results[m * k:(m + 1) * k]) / (2 * k) for m in range(len(candidates))]
+
+    # Append an evaluation to the log, and remember the best one.
+    #
+    # PARAM [int]           iteration: the iteration number
+    # PARAM [string]        kind:      "plus", "minus" or "final"
+    # PARAM [list of float] weights:   the weights evaluated
+    # PARAM [float]         score:     their score
+    def record(self, iteration, kind, weights, score):
+        """Logs an evaluation"""
+        with open(self.log, "a") as f:
+            f.write(json.dumps({"seed": self.seed, "iteration": iteration, "kind": kind,
+                                "weights": dict(zip(WEIGHTS, weights)), "score": score,
+                                "games": self.games}) + "\n")
+        if (self.best is None) or (score > self.best[0]):
+            self.best = (score, list(weights))
+
+    # Run SPSA.
+    #
+    # Iteration k perturbs every weight by +c_k or -c_k at random, scores
+    # both perturbed vectors, and moves the weights by a_k times the score
+    # difference over the perturbation, with the usual gains
+    # a_k = a / (k + 1 + A)^0.602 and c_k = c / (k + 1)^0.101, A being a
+    # tenth of the iterations. The weights stay within [LOWEST, HIGHEST].
+    #
+    # PARAM [list of float] start:      the initial weights
+    # PARAM [int]           iterations: the number of iterations
+    # RETURN [(list of float, float)]: the final weights and their score
+    def run(self, start, iterations):
+        theta = [float(x) for x in start]
+        stability = iterations / 10
+        workers = None
+        if self.workers != 1:
+            workers = multiprocessing.Pool(self.workers, init_worker, (self.pool, self.settings))
+        else:
+            init_worker(self.pool, self.settings)
+        try:
+            for k in range(iterations):
+                ak = self.a / (k + 1 + stability) ** 0.602
+                ck = self.c / (k + 1) ** 0.101
+                delta = [self.rng.choice((-1, 1)) for x in theta]
+                plus = [min(HIGHEST, max(LOWEST, x + ck * d)) for (x, d) in zip(theta, delta)]
+                minus = [min(HIGHEST, max(LOWEST, x - ck * d)) for (x, d) in zip(theta, delta)]
+                (y_plus, y_minus) = self.evaluate([plus, minus], k, workers)
+                self.record(k, "plus", plus, y_plus)
+                self.record(k, "minus", minus, y_minus)
+                # Gradient estimate along each weight, using the actual
+                # (clamped) perturbation
+                theta = [min(HIGHEST, max(LOWEST, x + ak * (y_plus - y_minus) / (p - m)))
+                         if p != m else x
+                         for (x, p, m) in zip(theta, plus, minus)]
+                print("Iteration {}: {:+.3f} / {:+.3f}, weights {}".format(
+                    k, y_plus, y_minus, " ".join("{:.2f}".format(x) for x in theta)))
+            (score,) = self.evaluate([theta], iterations, workers)
+            self.record(iterations, "final", theta, score)
+        finally:
+            if workers is not None:
+                workers.terminate()
+                workers.join()
+        return (theta, score)
+
+##################
+# Reference pool #
+##################
+
+# Make the reference agents the candidates are scored against.
+#
+# PARAM [int] depth: the search depth of the alpha-beta agents
+# RETURN [list of agent.Agent]: the agents
+def reference_pool(depth):
+    return [
+        aba.AlphaBetaAgent("defaults", depth, inplace=True, tt_size_mb=4),
+        aba.AlphaBetaAgent("alpha-beta-3-1-2-1-1", depth, 3, 1, 2, 1, 1, inplace=True, tt_size_mb=4),
+        aba.AlphaBetaAgent("alpha-beta-4-0-2-1-1", depth, 4, 0, 2, 1, 1, inplace=True, tt_size_mb=4),
+        aba.AlphaBetaAgent("alpha-beta-3-2-3-1-1", depth, 3, 2, 3, 1, 1, inplace=True, tt_size_mb=4),
+        agent.RandomAgent("poor-random-guy :(")
+    ]
+
+###################
+# Run the tuning! #
+###################
+
+if __name__ == "__main__":
+    if not len(sys.argv) in [2,3,4,5]:
+        print("Usage:\n  {} <log file> [iterations] [workers] [seed]".format(sys.argv[0]))
+        sys.exit(1)
+    LOG = sys.argv[1]
+    ITERATIONS = 25
+    if len(sys.argv) > 2:
+        ITERATIONS = int(sys.argv[2])
+    WORKERS = None
+    if len(sys.argv) > 3:
+        WORKERS = int(sys.argv[3])
+    SEED = 1
+    if len(sys.argv) > 4:
+        SEED = int(sys.argv[4])
+    depth = 4
+    t = Tuner(6,      # board width
+              6,      # board height
+              4,      # tokens in a row to win
+              15,     # time limit in seconds
+              depth,  # search depth
+              reference_pool(depth), LOG, WORKERS, SEED)
+    (weights, score) = t.run([3, 0, 1, 1, 1], ITERATIONS)
+    print("\nFINAL ({} games): {:+.3f}".format(t.games, score))
+    for (name, x) in zip(WEIGHTS, weights):
+        print("{:.3f} {}".format(x, name))
+    print("\nBEST EVALUATED: {:+.3f}".format(t.best[0]))
+    for (name, x) in zip(WEIGHTS, t.best[1]):
+        print("{:.3f} {}".format(x, name))